@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 
 from app.api.routes import router
+from app.core.compression import CompressionMiddleware
 from app.db import init_db
 
 
@@ -8,6 +9,8 @@ def create_app() -> FastAPI:
     """Create and configure the FastAPI application."""
     application = FastAPI(title="Auth Service", version="0.1.0")
 
+    application.add_middleware(CompressionMiddleware)
+
     @application.on_event("startup")
     def on_startup() -> None:
         init_db()
@@ -29,7 +29,7 @@ settings = get_settings()
 TARGET_TZ = tz.tzutc()  # or tz.gettz("Asia/Kolkata") if tzdata is installed
 
 def run_migrations_offline() -> None:
-    url = settings.database_url
+    url = settings.db_url
     context.configure(
         url=url,
         target_metadata=target_metadata,
@@ -43,22 +43,24 @@ def run_migrations_offline() -> None:
 
 def run_migrations_online() -> None:
     configuration = config.get_section(config.config_ini_section) or {}
-    configuration["sqlalchemy.url"] = settings.database_url
-    connectable = engine_from_config(
-        configuration,
-        prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
-    )
-    with connectable.connect() as connection:
-        context.configure(
-            connection=connection,
-            target_metadata=target_metadata,
-            compare_type=True,
-            compare_server_default=True,
-            timezone=TARGET_TZ,  # tzinfo object, not string
+    # Every shard carries the same schema, so migrate each of them in turn.
+    for url in dict.fromkeys([settings.db_url, *settings.shard_db_urls]):
+        configuration["sqlalchemy.url"] = url
+        connectable = engine_from_config(
+            configuration,
+            prefix="sqlalchemy.",
+            poolclass=pool.NullPool,
         )
-        with context.begin_transaction():
-            context.run_migrations()
+        with connectable.connect() as connection:
+            context.configure(
+                connection=connection,
+                target_metadata=target_metadata,
+                compare_type=True,
+                compare_server_default=True,
+                timezone=TARGET_TZ,  # tzinfo object, not string
+            )
+            with context.begin_transaction():
+                context.run_migrations()
 
 if context.is_offline_mode():
     run_migrations_offline()
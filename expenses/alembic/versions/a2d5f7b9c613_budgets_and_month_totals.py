@@ -0,0 +1,60 @@
+"""budgets and month-to-date expense totals
+
+Revision ID: a2d5f7b9c613
+Revises: f3c8e1a5b472
+Create Date: 2026-10-19 22:41:17.308264+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services import budgets
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2d5f7b9c613'
+down_revision: Union[str, Sequence[str], None] = 'f3c8e1a5b472'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    The month counters are filled from the expenses already stored, in the
+    same transaction, so writes made after the upgrade find them complete.
+    """
+    op.create_table(
+        "budgets",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=False),
+        sa.Column("currency", sa.String(length=3), nullable=False),
+        sa.Column("limit_minor", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("user_id", "category_id", "currency"),
+    )
+    op.create_table(
+        "expense_month_totals",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=False),
+        sa.Column("currency", sa.String(length=3), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("total_minor", sa.BigInteger(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "category_id", "currency", "month"),
+    )
+    if sa.inspect(op.get_bind()).has_table("expenses"):
+        budgets.rebuild(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("expense_month_totals")
+    op.drop_table("budgets")
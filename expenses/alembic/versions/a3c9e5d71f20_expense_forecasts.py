@@ -0,0 +1,38 @@
+"""expense forecasts
+
+Revision ID: a3c9e5d71f20
+Revises: ed4e162d1a1c
+Create Date: 2026-10-19 13:41:09.218457+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9e5d71f20'
+down_revision: Union[str, Sequence[str], None] = 'ed4e162d1a1c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "expense_forecasts",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("currency", sa.String(length=3), nullable=False),
+        sa.Column("month_to_date", sa.Float(), nullable=False),
+        sa.Column("projected_total", sa.Float(), nullable=False),
+        sa.Column("daily_level", sa.Float(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "month", "currency"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("expense_forecasts")
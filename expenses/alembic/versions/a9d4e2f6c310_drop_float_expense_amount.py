@@ -0,0 +1,46 @@
+"""drop float expense amounts (contract)
+
+Revision ID: a9d4e2f6c310
+Revises: f1a7c3e5b902
+Create Date: 2026-10-19 18:05:13.902174+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db import currency
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d4e2f6c310'
+down_revision: Union[str, Sequence[str], None] = 'f1a7c3e5b902'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Run once every instance writes ``amount_minor``. Rows written by older
+    instances since the expand step are converted before ``amount`` goes.
+    """
+    if not sa.inspect(op.get_bind()).has_table("expenses"):
+        return
+    with op.get_context().autocommit_block():
+        currency.backfill_minor(op.get_bind())
+    with op.batch_alter_table("expenses") as batch:
+        batch.alter_column("amount_minor", existing_type=sa.BigInteger(), nullable=False)
+        batch.drop_column("amount")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table("expenses"):
+        return
+    with op.batch_alter_table("expenses") as batch:
+        batch.add_column(sa.Column("amount", sa.Float(), nullable=True))
+        batch.alter_column("amount_minor", existing_type=sa.BigInteger(), nullable=True)
+    with op.get_context().autocommit_block():
+        currency.backfill_major(op.get_bind())
@@ -0,0 +1,153 @@
+"""expense category dictionary
+
+Revision ID: b6e8d1f4a237
+Revises: a9d4e2f6c310
+Create Date: 2026-10-19 19:21:36.204518+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e8d1f4a237'
+down_revision: Union[str, Sequence[str], None] = 'a9d4e2f6c310'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_ROWS = 10_000
+
+FILL_DICTIONARY = sa.text(
+    """
+    INSERT INTO categories (user_id, id, name)
+    SELECT user_id,
+           (SELECT coalesce(max(c.id), 0) FROM categories c WHERE c.user_id = named.user_id)
+             + row_number() OVER (PARTITION BY user_id ORDER BY category),
+           category
+    FROM (
+        SELECT DISTINCT user_id, category FROM expenses
+        WHERE category_id IS NULL
+    ) named
+    WHERE NOT EXISTS (
+        SELECT 1 FROM categories c
+        WHERE c.user_id = named.user_id AND c.name = named.category
+    )
+    """
+)
+FILL_IDS = sa.text(
+    """
+    UPDATE expenses SET category_id = (
+        SELECT c.id FROM categories c
+        WHERE c.user_id = expenses.user_id AND c.name = expenses.category
+    )
+    WHERE category_id IS NULL AND id >= :low AND id < :high
+    """
+)
+FILL_NAMES = sa.text(
+    """
+    UPDATE expenses SET category = (
+        SELECT c.name FROM categories c
+        WHERE c.user_id = expenses.user_id AND c.id = expenses.category_id
+    )
+    WHERE category IS NULL AND id >= :low AND id < :high
+    """
+)
+
+STATS_BY_ID = (
+    "SELECT s.user_id, c.id, s.currency, s.count, s.mean, s.m2, s.updated_at "
+    "FROM expense_category_stats s JOIN categories c "
+    "ON c.user_id = s.user_id AND c.name = s.category"
+)
+STATS_BY_NAME = (
+    "SELECT s.user_id, c.name, s.currency, s.count, s.mean, s.m2, s.updated_at "
+    "FROM expense_category_stats s JOIN categories c "
+    "ON c.user_id = s.user_id AND c.id = s.category_id"
+)
+
+
+def _in_batches(bind, statement: sa.TextClause) -> None:
+    low, high = bind.execute(sa.text("SELECT min(id), max(id) FROM expenses")).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, BATCH_ROWS):
+        bind.execute(statement, {"low": start, "high": start + BATCH_ROWS})
+
+
+def _rebuild_stats(key: sa.Column, select_rows: str) -> None:
+    """Recreate ``expense_category_stats`` keyed by ``key``, copying every row."""
+    op.create_table(
+        "expense_category_stats_new",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        key,
+        sa.Column("currency", sa.String(length=3), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("mean", sa.Float(), nullable=False),
+        sa.Column("m2", sa.Float(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint(
+            "user_id", key.name, "currency", name="expense_category_stats_new_pkey"
+        ),
+    )
+    op.execute(
+        "INSERT INTO expense_category_stats_new "
+        f"(user_id, {key.name}, currency, count, mean, m2, updated_at) {select_rows}"
+    )
+    op.drop_table("expense_category_stats")
+    op.rename_table("expense_category_stats_new", "expense_category_stats")
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            "ALTER TABLE expense_category_stats RENAME CONSTRAINT "
+            "expense_category_stats_new_pkey TO expense_category_stats_pkey"
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Every distinct (user, category) becomes a dictionary entry. Expenses get
+    their ``category_id`` in id-range batches that commit one by one, then a
+    final pass inside the migration transaction picks up rows written in the
+    meantime before the name column is dropped.
+    """
+    op.create_table(
+        "categories",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("name", sa.String(length=120), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "id"),
+        sa.UniqueConstraint("user_id", "name", name="uq_categories_user_id_name"),
+    )
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table("expenses"):
+        # Fresh databases get the new layout from init_db().
+        _rebuild_stats(sa.Column("category_id", sa.Integer(), nullable=False), STATS_BY_ID)
+        return
+    op.add_column("expenses", sa.Column("category_id", sa.Integer(), nullable=True))
+    with op.get_context().autocommit_block():
+        bind.execute(FILL_DICTIONARY)
+        _in_batches(bind, FILL_IDS)
+    bind.execute(FILL_DICTIONARY)
+    _in_batches(bind, FILL_IDS)
+    with op.batch_alter_table("expenses") as batch:
+        batch.alter_column("category_id", existing_type=sa.Integer(), nullable=False)
+        batch.drop_column("category")
+    _rebuild_stats(sa.Column("category_id", sa.Integer(), nullable=False), STATS_BY_ID)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rebuild_stats(sa.Column("category", sa.String(length=120), nullable=False), STATS_BY_NAME)
+    if sa.inspect(op.get_bind()).has_table("expenses"):
+        op.add_column("expenses", sa.Column("category", sa.String(length=120), nullable=True))
+        _in_batches(op.get_bind(), FILL_NAMES)
+        with op.batch_alter_table("expenses") as batch:
+            batch.alter_column("category", existing_type=sa.String(length=120), nullable=False)
+            batch.drop_column("category_id")
+    op.drop_table("categories")
@@ -0,0 +1,91 @@
+"""shared expense groups
+
+Revision ID: b8e4f6a2c375
+Revises: a2d5f7b9c613
+Create Date: 2026-10-19 23:18:52.604117+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e4f6a2c375'
+down_revision: Union[str, Sequence[str], None] = 'a2d5f7b9c613'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "expense_groups",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(length=120), nullable=False),
+        sa.Column("currency", sa.String(length=3), nullable=False),
+        sa.Column("created_by", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "expense_group_members",
+        sa.Column("group_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("balance_minor", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "joined_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("group_id", "user_id"),
+    )
+    op.create_index(
+        "ix_expense_group_members_user_id", "expense_group_members", ["user_id"], unique=False
+    )
+    op.create_table(
+        "expense_group_expenses",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("group_id", sa.Integer(), nullable=False),
+        sa.Column("paid_by", sa.Integer(), nullable=False),
+        sa.Column("amount_minor", sa.BigInteger(), nullable=False),
+        sa.Column("description", sa.String(length=200), nullable=True),
+        sa.Column("kind", sa.String(length=16), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_expense_group_expenses_group_id_id",
+        "expense_group_expenses",
+        ["group_id", "id"],
+        unique=False,
+    )
+    op.create_table(
+        "expense_group_splits",
+        sa.Column("group_expense_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("share_minor", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("group_expense_id", "user_id"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("expense_group_splits")
+    op.drop_index("ix_expense_group_expenses_group_id_id", table_name="expense_group_expenses")
+    op.drop_table("expense_group_expenses")
+    op.drop_index("ix_expense_group_members_user_id", table_name="expense_group_members")
+    op.drop_table("expense_group_members")
+    op.drop_table("expense_groups")
@@ -0,0 +1,42 @@
+"""expense tags
+
+Revision ID: c3f5a7e9b148
+Revises: b6e8d1f4a237
+Create Date: 2026-10-19 20:07:52.661093+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f5a7e9b148'
+down_revision: Union[str, Sequence[str], None] = 'b6e8d1f4a237'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "expense_tags",
+        sa.Column("expense_id", sa.Integer(), nullable=False),
+        sa.Column("tag", sa.String(length=64), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("expense_id", "tag"),
+    )
+    op.create_index(
+        "ix_expense_tags_user_id_tag_created_at",
+        "expense_tags",
+        ["user_id", "tag", "created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_expense_tags_user_id_tag_created_at", table_name="expense_tags")
+    op.drop_table("expense_tags")
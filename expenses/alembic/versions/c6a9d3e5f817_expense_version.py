@@ -0,0 +1,45 @@
+"""expense version for optimistic concurrency
+
+Revision ID: c6a9d3e5f817
+Revises: b8e4f6a2c375
+Create Date: 2026-10-20 08:12:05.417930+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db import search
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6a9d3e5f817'
+down_revision: Union[str, Sequence[str], None] = 'b8e4f6a2c375'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    A constant server default makes this a metadata-only change on
+    PostgreSQL 11+, without rewriting the table.
+    """
+    if not sa.inspect(op.get_bind()).has_table("expenses"):
+        # Fresh databases get the column from init_db().
+        return
+    op.add_column(
+        "expenses",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table("expenses"):
+        return
+    with op.batch_alter_table("expenses") as batch:
+        batch.drop_column("version")
+    # Rebuilding the table on SQLite drops the search triggers.
+    search.install(op.get_bind())
@@ -0,0 +1,53 @@
+"""expense anomaly scores
+
+Revision ID: c71d0b8e94a6
+Revises: a3c9e5d71f20
+Create Date: 2026-10-19 15:12:36.804127+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c71d0b8e94a6'
+down_revision: Union[str, Sequence[str], None] = 'a3c9e5d71f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fresh databases get these columns from init_db().
+    if sa.inspect(op.get_bind()).has_table("expenses"):
+        op.add_column("expenses", sa.Column("anomaly_score", sa.Float(), nullable=True))
+        op.add_column(
+            "expenses",
+            sa.Column("is_anomaly", sa.Boolean(), server_default=sa.false(), nullable=False),
+        )
+    op.create_table(
+        "expense_category_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("category", sa.String(length=120), nullable=False),
+        sa.Column("currency", sa.String(length=3), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("mean", sa.Float(), nullable=False),
+        sa.Column("m2", sa.Float(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("user_id", "category", "currency"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("expense_category_stats")
+    if sa.inspect(op.get_bind()).has_table("expenses"):
+        op.drop_column("expenses", "is_anomaly")
+        op.drop_column("expenses", "anomaly_score")
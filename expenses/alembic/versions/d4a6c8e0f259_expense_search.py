@@ -0,0 +1,44 @@
+"""expense merchants, notes and search indexes
+
+Revision ID: d4a6c8e0f259
+Revises: c3f5a7e9b148
+Create Date: 2026-10-19 20:48:19.530227+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db import search
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a6c8e0f259'
+down_revision: Union[str, Sequence[str], None] = 'c3f5a7e9b148'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Installs ``pg_trgm`` and ``btree_gin`` when the server offers them; the
+    plain full-text index is created either way.
+    """
+    if not sa.inspect(op.get_bind()).has_table("expenses"):
+        # Fresh databases get the columns and indexes from init_db().
+        return
+    op.add_column("expenses", sa.Column("merchant", sa.String(length=120), nullable=True))
+    op.add_column("expenses", sa.Column("note", sa.Text(), nullable=True))
+    search.install(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table("expenses"):
+        return
+    search.uninstall(op.get_bind())
+    with op.batch_alter_table("expenses") as batch:
+        batch.drop_column("note")
+        batch.drop_column("merchant")
@@ -0,0 +1,41 @@
+"""expense fingerprints
+
+Revision ID: d82f4a1c6b37
+Revises: c71d0b8e94a6
+Create Date: 2026-10-19 16:48:05.377912+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd82f4a1c6b37'
+down_revision: Union[str, Sequence[str], None] = 'c71d0b8e94a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Existing rows keep a NULL fingerprint until ``python -m app.cli.dedupe
+    --backfill`` fills them in batches.
+    """
+    if not sa.inspect(op.get_bind()).has_table("expenses"):
+        # Fresh databases get the column and index from init_db().
+        return
+    op.add_column("expenses", sa.Column("fingerprint", sa.BigInteger(), nullable=True))
+    op.create_index(
+        "ix_expenses_user_id_fingerprint", "expenses", ["user_id", "fingerprint"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table("expenses"):
+        return
+    op.drop_index("ix_expenses_user_id_fingerprint", table_name="expenses")
+    op.drop_column("expenses", "fingerprint")
@@ -0,0 +1,54 @@
+"""expense amounts in minor units (expand)
+
+Revision ID: f1a7c3e5b902
+Revises: e4b6a9d2c815
+Create Date: 2026-10-19 18:02:47.518630+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db import currency
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a7c3e5b902'
+down_revision: Union[str, Sequence[str], None] = 'e4b6a9d2c815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Adds ``amount_minor`` next to the float ``amount`` and backfills it in
+    batches that commit one by one, so the table is never locked for the
+    whole copy and the running application keeps writing ``amount``.
+    """
+    op.create_table(
+        "currency_exponents",
+        sa.Column("currency", sa.String(length=3), nullable=False),
+        sa.Column("exponent", sa.SmallInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("currency"),
+    )
+    currency.seed(op.get_bind())
+    if not sa.inspect(op.get_bind()).has_table("expenses"):
+        # Fresh databases get the column from init_db().
+        return
+    op.add_column("expenses", sa.Column("amount_minor", sa.BigInteger(), nullable=True))
+    with op.batch_alter_table("expenses") as batch:
+        batch.alter_column("amount", existing_type=sa.Float(), nullable=True)
+    with op.get_context().autocommit_block():
+        currency.backfill_minor(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("expenses"):
+        currency.backfill_major(op.get_bind())
+        with op.batch_alter_table("expenses") as batch:
+            batch.alter_column("amount", existing_type=sa.Float(), nullable=False)
+            batch.drop_column("amount_minor")
+    op.drop_table("currency_exponents")
@@ -0,0 +1,78 @@
+"""recurring expenses
+
+Revision ID: f3c8e1a5b472
+Revises: e7b9d2f4a361
+Create Date: 2026-10-19 22:02:41.570913+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.db import search
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c8e1a5b472'
+down_revision: Union[str, Sequence[str], None] = 'e7b9d2f4a361'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "recurring_expenses",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=False),
+        sa.Column("amount_minor", sa.BigInteger(), nullable=False),
+        sa.Column("currency", sa.String(length=3), nullable=False),
+        sa.Column("merchant", sa.String(length=120), nullable=True),
+        sa.Column("note", sa.Text(), nullable=True),
+        sa.Column("interval_months", sa.Integer(), nullable=False),
+        sa.Column("day_of_month", sa.Integer(), nullable=False),
+        sa.Column("starts_on", sa.Date(), nullable=False),
+        sa.Column("ends_on", sa.Date(), nullable=True),
+        sa.Column("next_run_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_recurring_expenses_user_id", "recurring_expenses", ["user_id"], unique=False
+    )
+    op.create_index(
+        "ix_recurring_expenses_next_run_at_id",
+        "recurring_expenses",
+        ["next_run_at", "id"],
+        unique=False,
+    )
+    if not sa.inspect(op.get_bind()).has_table("expenses"):
+        # Fresh databases get the column and index from init_db().
+        return
+    op.add_column("expenses", sa.Column("recurring_id", sa.Integer(), nullable=True))
+    op.create_index(
+        "uq_expenses_recurring_id_created_at",
+        "expenses",
+        ["recurring_id", "created_at"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("expenses"):
+        op.drop_index("uq_expenses_recurring_id_created_at", table_name="expenses")
+        with op.batch_alter_table("expenses") as batch:
+            batch.drop_column("recurring_id")
+        # Rebuilding the table on SQLite drops the search triggers.
+        search.install(op.get_bind())
+    op.drop_index("ix_recurring_expenses_next_run_at_id", table_name="recurring_expenses")
+    op.drop_index("ix_recurring_expenses_user_id", table_name="recurring_expenses")
+    op.drop_table("recurring_expenses")
@@ -0,0 +1,118 @@
+"""partition expenses by month
+
+Revision ID: fec001c605b2
+Revises: b5c3b1b380f4
+Create Date: 2026-10-19 10:12:31.418207+00:00
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import get_settings
+from app.db import partitions
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fec001c605b2'
+down_revision: Union[str, Sequence[str], None] = 'b5c3b1b380f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, user_id, category, amount, currency, created_at"
+
+
+def _applies() -> bool:
+    bind = op.get_bind()
+    return bind.dialect.name == "postgresql" and sa.inspect(bind).has_table("expenses")
+
+
+def upgrade() -> None:
+    """Rebuild ``expenses`` as a table range-partitioned by ``created_at``."""
+    if not _applies():
+        # Fresh databases get the partitioned table from init_db().
+        return
+    bind = op.get_bind()
+    if partitions.is_partitioned(bind):
+        return
+
+    op.execute("ALTER TABLE expenses RENAME TO expenses_unpartitioned")
+    op.execute(
+        "ALTER TABLE expenses_unpartitioned "
+        "RENAME CONSTRAINT expenses_pkey TO expenses_unpartitioned_pkey"
+    )
+    op.execute("ALTER INDEX IF EXISTS ix_expenses_id RENAME TO ix_expenses_unpartitioned_id")
+    op.execute(
+        "ALTER INDEX IF EXISTS ix_expenses_user_id "
+        "RENAME TO ix_expenses_unpartitioned_user_id"
+    )
+    op.execute(
+        """
+        CREATE TABLE expenses (
+            id INTEGER NOT NULL DEFAULT nextval('expenses_id_seq'),
+            user_id INTEGER NOT NULL,
+            category VARCHAR(120) NOT NULL,
+            amount FLOAT NOT NULL,
+            currency VARCHAR(3) NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("ALTER SEQUENCE expenses_id_seq OWNED BY expenses.id")
+    op.create_index("ix_expenses_id", "expenses", ["id"])
+    op.create_index("ix_expenses_user_id", "expenses", ["user_id"])
+    op.create_index("ix_expenses_user_id_created_at", "expenses", ["user_id", "created_at"])
+    op.execute(
+        f"CREATE TABLE {partitions.DEFAULT_PARTITION} "
+        f"PARTITION OF expenses DEFAULT"
+    )
+
+    oldest = bind.execute(
+        sa.text("SELECT min(created_at) FROM expenses_unpartitioned")
+    ).scalar()
+    partitions.ensure_partitions(
+        bind,
+        get_settings().partition_months_ahead,
+        start=oldest or datetime.now(timezone.utc),
+    )
+    op.execute(
+        f"INSERT INTO expenses ({COLUMNS}) "
+        f"SELECT id, user_id, category, amount, currency, coalesce(created_at, now()) "
+        f"FROM expenses_unpartitioned"
+    )
+    op.execute("DROP TABLE expenses_unpartitioned")
+
+
+def downgrade() -> None:
+    """Fold the partitions back into a single heap table."""
+    if not _applies():
+        return
+    bind = op.get_bind()
+    if not partitions.is_partitioned(bind):
+        return
+
+    op.execute(
+        """
+        CREATE TABLE expenses_unpartitioned (
+            id INTEGER NOT NULL DEFAULT nextval('expenses_id_seq'),
+            user_id INTEGER NOT NULL,
+            category VARCHAR(120) NOT NULL,
+            amount FLOAT NOT NULL,
+            currency VARCHAR(3) NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            CONSTRAINT expenses_unpartitioned_pkey PRIMARY KEY (id)
+        )
+        """
+    )
+    op.execute(
+        f"INSERT INTO expenses_unpartitioned ({COLUMNS}) SELECT {COLUMNS} FROM expenses"
+    )
+    op.execute("ALTER SEQUENCE expenses_id_seq OWNED BY expenses_unpartitioned.id")
+    op.execute("DROP TABLE expenses")
+    op.execute("ALTER TABLE expenses_unpartitioned RENAME TO expenses")
+    op.execute("ALTER TABLE expenses RENAME CONSTRAINT expenses_unpartitioned_pkey TO expenses_pkey")
+    op.create_index("ix_expenses_id", "expenses", ["id"])
+    op.create_index("ix_expenses_user_id", "expenses", ["user_id"])
@@ -0,0 +1,276 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.auth import get_current_user_id
+from app.core.deps import get_primary_db
+from app.db.currency import BelowMinorUnit, to_major, to_minor, to_positive_minor
+from app.db.models import ExpenseGroup, GroupExpense, GroupMember
+from app.schema.groups import (
+    GroupCreate,
+    GroupExpenseCreate,
+    GroupExpenseRead,
+    GroupMemberAdd,
+    GroupRead,
+    MemberBalance,
+    PaymentCreate,
+    Settlement,
+    Share,
+    Transfer,
+)
+from app.services import groups
+
+router = APIRouter(prefix="/expenses/groups", tags=["groups"])
+
+
+def _group_of_member(db: Session, group_id: int, user_id: int) -> ExpenseGroup:
+    """The group, or 404 when it is missing or the caller is not in it."""
+    group = db.get(ExpenseGroup, group_id)
+    if group is None or not groups.is_member(db, group_id, user_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="group not found")
+    return group
+
+
+def _group_read(db: Session, group: ExpenseGroup) -> GroupRead:
+    return GroupRead(
+        id=group.id,
+        name=group.name,
+        currency=group.currency,
+        created_by=group.created_by,
+        created_at=group.created_at,
+        members=[
+            MemberBalance(user_id=user_id, balance=to_major(balance, group.currency))
+            for user_id, balance in groups.balances(db, group.id).items()
+        ],
+    )
+
+
+def _expense_read(expense: GroupExpense, currency: str) -> GroupExpenseRead:
+    return GroupExpenseRead(
+        id=expense.id,
+        group_id=expense.group_id,
+        paid_by=expense.paid_by,
+        amount=to_major(expense.amount_minor, currency),
+        description=expense.description,
+        kind=expense.kind,
+        created_at=expense.created_at,
+        shares=[
+            Share(user_id=split.user_id, amount=to_major(split.share_minor, currency))
+            for split in expense.splits
+        ],
+    )
+
+
+def _forbidden(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+
+def _bad_request(exc: groups.GroupError) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+def _minor_amount(amount: float, group: ExpenseGroup) -> int:
+    """``amount`` in the group's minor units, or 422 when that rounds to zero."""
+    try:
+        return to_positive_minor(amount, group.currency)
+    except BelowMinorUnit as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+
+
+@router.post(
+    "/",
+    response_model=GroupRead,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create a group to share expenses in",
+)
+def create_group(
+    payload: GroupCreate,
+    db: Session = Depends(get_primary_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> GroupRead:
+    """The caller is always a member."""
+    group = groups.create_group(
+        db, payload.name, payload.currency, current_user_id, payload.members
+    )
+    return _group_read(db, group)
+
+
+@router.get("/", response_model=list[GroupRead], summary="List the caller's groups")
+def list_groups(
+    db: Session = Depends(get_primary_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> list[GroupRead]:
+    mine = db.scalars(
+        select(ExpenseGroup)
+        .join(GroupMember, GroupMember.group_id == ExpenseGroup.id)
+        .where(GroupMember.user_id == current_user_id)
+        .order_by(ExpenseGroup.id)
+    ).all()
+    return [_group_read(db, group) for group in mine]
+
+
+@router.get("/{group_id}", response_model=GroupRead, summary="A group with member balances")
+def get_group(
+    group_id: int,
+    db: Session = Depends(get_primary_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> GroupRead:
+    """Balances are kept up to date on every write, so this reads one row per member."""
+    return _group_read(db, _group_of_member(db, group_id, current_user_id))
+
+
+@router.post(
+    "/{group_id}/members",
+    response_model=GroupRead,
+    summary="Add a member to a group",
+)
+def add_member(
+    group_id: int,
+    payload: GroupMemberAdd,
+    db: Session = Depends(get_primary_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> GroupRead:
+    """Only the group's creator may add members; others get 403."""
+    group = _group_of_member(db, group_id, current_user_id)
+    if group.created_by != current_user_id:
+        raise _forbidden("only the group's creator can add members")
+    groups.add_member(db, group.id, payload.user_id)
+    return _group_read(db, group)
+
+
+@router.post(
+    "/{group_id}/expenses",
+    response_model=GroupExpenseRead,
+    status_code=status.HTTP_201_CREATED,
+    summary="Add a shared expense",
+)
+def add_group_expense(
+    group_id: int,
+    payload: GroupExpenseCreate,
+    db: Session = Depends(get_primary_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> GroupExpenseRead:
+    """Give either exact ``shares`` or ``split_between``; without both, everyone shares equally."""
+    group = _group_of_member(db, group_id, current_user_id)
+    if payload.shares is not None and payload.split_between is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="give either shares or split_between, not both",
+        )
+    amount_minor = _minor_amount(payload.amount, group)
+    try:
+        if payload.shares is not None:
+            shares = {
+                user_id: to_minor(share, group.currency)
+                for user_id, share in payload.shares.items()
+            }
+        else:
+            shares = groups.equal_shares(
+                amount_minor, payload.split_between or groups.member_ids(db, group.id)
+            )
+        expense = groups.add_expense(
+            db,
+            group,
+            payload.paid_by or current_user_id,
+            amount_minor,
+            shares,
+            payload.description,
+        )
+    except groups.GroupError as exc:
+        raise _bad_request(exc)
+    return _expense_read(expense, group.currency)
+
+
+@router.get(
+    "/{group_id}/expenses",
+    response_model=list[GroupExpenseRead],
+    summary="List a group's expenses and payments, newest first",
+)
+def list_group_expenses(
+    group_id: int,
+    limit: int = Query(default=50, ge=1, le=500),
+    before_id: int | None = Query(default=None, description="Only entries older than this id"),
+    db: Session = Depends(get_primary_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> list[GroupExpenseRead]:
+    group = _group_of_member(db, group_id, current_user_id)
+    return [
+        _expense_read(expense, group.currency)
+        for expense in groups.expenses(db, group.id, limit, before_id)
+    ]
+
+
+@router.delete(
+    "/{group_id}/expenses/{group_expense_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Delete a shared expense or payment",
+)
+def delete_group_expense(
+    group_id: int,
+    group_expense_id: int,
+    db: Session = Depends(get_primary_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> None:
+    """Balances are moved back as if the entry had never been added.
+
+    Only whoever paid the entry, or the group's creator, may delete it.
+    """
+    group = _group_of_member(db, group_id, current_user_id)
+    expense = db.get(GroupExpense, group_expense_id)
+    if expense is None or expense.group_id != group_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="expense not found")
+    if current_user_id not in (expense.paid_by, group.created_by):
+        raise _forbidden("only the payer or the group's creator can delete this entry")
+    groups.delete_expense(db, expense)
+
+
+@router.get(
+    "/{group_id}/settlement",
+    response_model=Settlement,
+    summary="Payments that settle every balance in the group",
+)
+def settlement(
+    group_id: int,
+    db: Session = Depends(get_primary_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> Settlement:
+    """At most one transfer fewer than there are members with a balance."""
+    group = _group_of_member(db, group_id, current_user_id)
+    return Settlement(
+        group_id=group.id,
+        currency=group.currency,
+        transfers=[
+            Transfer(
+                from_user_id=debtor,
+                to_user_id=creditor,
+                amount=to_major(amount, group.currency),
+            )
+            for debtor, creditor, amount in groups.settle(groups.balances(db, group.id))
+        ],
+    )
+
+
+@router.post(
+    "/{group_id}/payments",
+    response_model=GroupExpenseRead,
+    status_code=status.HTTP_201_CREATED,
+    summary="Record paying another member back",
+)
+def record_payment(
+    group_id: int,
+    payload: PaymentCreate,
+    db: Session = Depends(get_primary_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> GroupExpenseRead:
+    group = _group_of_member(db, group_id, current_user_id)
+    try:
+        payment = groups.record_payment(
+            db,
+            group,
+            current_user_id,
+            payload.to_user_id,
+            _minor_amount(payload.amount, group),
+        )
+    except groups.GroupError as exc:
+        raise _bad_request(exc)
+    return _expense_read(payment, group.currency)
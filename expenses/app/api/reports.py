@@ -0,0 +1,109 @@
+from datetime import datetime, timezone
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import Field
+
+from app.core.auth import get_current_user_id
+from app.schema.reports import (
+    CategoryPercentiles,
+    CategoryPivotReport,
+    CategoryYearTotals,
+    PercentileReport,
+    YearOverYearReport,
+    YearTotal,
+)
+from app.services import analytics
+
+router = APIRouter(prefix="/expenses/reports", tags=["reports"])
+
+
+def _unavailable(exc: analytics.SnapshotUnavailable) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(exc))
+
+
+@router.get(
+    "/year-over-year",
+    response_model=YearOverYearReport,
+    summary="Yearly totals with change against the previous year",
+)
+def year_over_year(
+    current_user_id: int = Depends(get_current_user_id),
+) -> YearOverYearReport:
+    """Served from the analytics snapshot, never from the OLTP database."""
+    try:
+        snapshot_at, rows = analytics.year_over_year(current_user_id)
+    except analytics.SnapshotUnavailable as exc:
+        raise _unavailable(exc)
+    return YearOverYearReport(
+        snapshot_at=snapshot_at,
+        years=[
+            YearTotal(year=year, currency=currency, count=count, total=total, change_pct=change)
+            for year, currency, count, total, change in rows
+        ],
+    )
+
+
+@router.get(
+    "/category-pivot",
+    response_model=CategoryPivotReport,
+    summary="Category by year totals",
+)
+def category_pivot(
+    first_year: int | None = None,
+    last_year: int | None = None,
+    current_user_id: int = Depends(get_current_user_id),
+) -> CategoryPivotReport:
+    """Totals per category for every year in ``[first_year, last_year]``."""
+    last_year = last_year or datetime.now(timezone.utc).year
+    first_year = first_year or last_year - 4
+    if first_year > last_year:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="first_year must not be after last_year",
+        )
+    try:
+        snapshot_at, years, rows = analytics.category_pivot(
+            current_user_id, first_year, last_year
+        )
+    except analytics.SnapshotUnavailable as exc:
+        raise _unavailable(exc)
+    return CategoryPivotReport(
+        snapshot_at=snapshot_at,
+        years=years,
+        categories=[
+            CategoryYearTotals(category=category, currency=currency, totals=totals)
+            for category, currency, totals in rows
+        ],
+    )
+
+
+@router.get(
+    "/percentiles",
+    response_model=PercentileReport,
+    summary="Expense amount percentiles per category",
+)
+def percentiles(
+    q: list[Annotated[float, Field(ge=0, le=1)]] = Query(default=[0.5, 0.9, 0.99]),
+    start: datetime | None = None,
+    end: datetime | None = None,
+    current_user_id: int = Depends(get_current_user_id),
+) -> PercentileReport:
+    """Continuous quantiles of expense amounts, e.g. ``?q=0.5&q=0.9``."""
+    try:
+        snapshot_at, rows = analytics.percentiles(current_user_id, q, start, end)
+    except analytics.SnapshotUnavailable as exc:
+        raise _unavailable(exc)
+    return PercentileReport(
+        snapshot_at=snapshot_at,
+        quantiles=q,
+        categories=[
+            CategoryPercentiles(
+                category=category,
+                currency=currency,
+                count=count,
+                values={str(quantile): value for quantile, value in zip(q, values)},
+            )
+            for category, currency, count, values in rows
+        ],
+    )
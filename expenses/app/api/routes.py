@@ -1,15 +1,258 @@
-from typing import List
+from datetime import date, datetime, timezone
+import heapq
+from itertools import islice
+from typing import List, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, status
+import pyarrow as pa
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    HTTPException,
+    Path,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
 
 from app.core.deps import get_db
 from app.core.auth import get_current_user_id
-from app.db.models import Expense
-from app.schema.exp import ExpenseCreate, ExpenseRead, ExpenseUpdate
+from app.core.formats import (
+    ARROW_STREAM,
+    JSON,
+    MSGPACK,
+    ArrowResponse,
+    NegotiatedResponse,
+    preferred,
+)
+from app.db.currency import BelowMinorUnit, to_minor, to_positive_minor
+from app.db.models import Expense, ExpenseForecast, RecurringExpense
+from app.schema.exp import (
+    ExpenseCreate,
+    ExpenseImport,
+    ExpenseRead,
+    ExpenseSearchHit,
+    ExpenseUpdate,
+    ExpenseWriteResult,
+)
+from app.schema.budgets import BudgetSet, BudgetStatus
+from app.schema.bulk import BulkResult, ExpenseBulkChange, ExpenseBulkDelete
+from app.schema.forecast import CurrencyForecast, ExpenseForecastRead
+from app.schema.imports import ImportResult
+from app.schema.receipts import ReceiptRead
+from app.schema.recurring import RecurringExpenseCreate, RecurringExpenseRead
+from app.schema.series import ExpenseSeries
+from app.schema.stats import ExpenseStatistics
+from app.schema.summary import ExpenseSummary
+from app.schema.tags import TagCloud, TagCount
+from app.services import (
+    anomaly,
+    archive,
+    budgets,
+    bulk,
+    categories,
+    columnar,
+    dedupe,
+    fx,
+    jobs,
+    projection,
+    receipts,
+    recurring,
+    series,
+    tags,
+)
+from app.services.export import EXPORT_COLUMNS, export_arrow, export_csv
+from app.services.imports import import_expenses
+from app.services.search import SearchUnsupported, search_expenses
+from app.services.stats import compute_statistics
+from app.services.summary import summarize
 
 router = APIRouter(prefix="/expenses", tags=["expenses"])
 
+SHA256 = Path(pattern="^[0-9a-f]{64}$", description="Hex SHA-256 of the receipt file")
+_MULTIPART_FILE = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
+
+
+IF_MATCH = Header(
+    default=None,
+    description="ETag of the version the change is based on; 412 if the expense has moved on",
+)
+
+
+def _etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def _check_version(expense: Expense, if_match: str | None, version: int | None = None) -> None:
+    """Raise 412 unless ``expense`` is at the version the client last saw.
+
+    ``If-Match`` takes strong ETags (weak ones never match) or ``*``; the body
+    ``version`` is for clients that cannot set headers. Without either the
+    write skips this check but is still safe from lost updates: ``version``
+    is the mapper's ``version_id_col``, so a row changed since it was read
+    fails the flush with ``StaleDataError``, which the handlers turn into 412.
+    """
+    if if_match is not None and if_match.strip() != "*":
+        candidates = {tag.strip() for tag in if_match.split(",")}
+        if _etag(expense.version) not in candidates:
+            raise _stale()
+    if version is not None and version != expense.version:
+        raise _stale()
+
+
+def _stale() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail="expense was changed by another request; fetch it again and retry",
+    )
+
+
+def _fields(
+    fields: str | None = Query(
+        default=None,
+        description="Comma-separated fields to return, e.g. id,amount,category; default all",
+    ),
+) -> list[str] | None:
+    try:
+        return projection.parse(fields)
+    except projection.UnknownField as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+def _export_fields(
+    fields: str | None = Query(
+        default=None,
+        description=f"Comma-separated CSV columns out of {','.join(EXPORT_COLUMNS)}",
+    ),
+) -> list[str] | None:
+    try:
+        return projection.parse(fields, EXPORT_COLUMNS)
+    except projection.UnknownField as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+def _user_expenses(
+    db: Session,
+    user_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    tagged: list[str] | None = None,
+):
+    """Expenses owned by ``user_id``, optionally limited to ``[start, end)``.
+
+    Bounding ``created_at`` lets PostgreSQL prune monthly partitions.
+    ``tagged`` keeps expenses carrying every given tag, found through the
+    tag index.
+    """
+    query = db.query(Expense).filter(Expense.user_id == user_id)
+    if start is not None:
+        query = query.filter(Expense.created_at >= start)
+    if end is not None:
+        query = query.filter(Expense.created_at < end)
+    if tagged:
+        query = query.filter(Expense.id.in_(tags.tagged_ids(user_id, tagged, start, end)))
+    return query.order_by(Expense.created_at, Expense.id)
+
+
+def _expense_page(
+    db: Session,
+    user_id: int,
+    start: datetime | None,
+    end: datetime | None,
+    skip: int,
+    limit: int,
+    tagged: list[str] | None = None,
+) -> List[ExpenseRead]:
+    """One page of expenses, merged with cold storage when the range reaches it."""
+    query = _user_expenses(db, user_id, start, end, tagged)
+    if not archive.reaches_archive(db, user_id, start):
+        return [ExpenseRead.model_validate(expense) for expense in query.offset(skip).limit(limit)]
+
+    hot = (ExpenseRead.model_validate(expense) for expense in query.limit(skip + limit))
+    archived = archive.read_archived(db, user_id, start, end)
+    if tagged:
+        archived = tags.filter_archived(db, archived, user_id, tagged, start, end)
+    rows = archived.slice(0, skip + limit).to_pylist()
+    labels = tags.tags_for(db, [row["id"] for row in rows])
+    cold = (ExpenseRead.model_validate({**row, "tags": labels.get(row["id"], [])}) for row in rows)
+    merged = heapq.merge(
+        cold, hot, key=lambda expense: (archive.as_utc(expense.created_at), expense.id)
+    )
+    return list(islice(merged, skip, skip + limit))
+
+
+def _projected_page(
+    db: Session,
+    user_id: int,
+    start: datetime | None,
+    end: datetime | None,
+    skip: int,
+    limit: int,
+    tagged: list[str] | None,
+    fields: list[str],
+) -> list[dict]:
+    """:func:`_expense_page` narrowed to ``fields``, selecting only their columns."""
+    if archive.reaches_archive(db, user_id, start):
+        # Archived rows come from Parquet files; narrow the merged page instead.
+        page = _expense_page(db, user_id, start, end, skip, limit, tagged)
+        return [
+            {name: values[name] for name in fields}
+            for values in (expense.model_dump(include=set(fields)) for expense in page)
+        ]
+    query = _user_expenses(db, user_id, start, end, tagged).with_entities(
+        *projection.columns(fields)
+    )
+    return projection.rows(db, query.offset(skip).limit(limit), fields)
+
+
+def _arrow_page(
+    db: Session,
+    user_id: int,
+    start: datetime | None,
+    end: datetime | None,
+    skip: int,
+    limit: int,
+    tagged: list[str] | None,
+    fields: list[str],
+) -> pa.Table:
+    """:func:`_projected_page` as an Arrow table, built from the selected columns."""
+    names = [name for name in dict.fromkeys([*fields, "id", "created_at"]) if name != "tags"]
+    query = _user_expenses(db, user_id, start, end, tagged).with_entities(
+        *projection.columns(names)
+    )
+    if not archive.reaches_archive(db, user_id, start):
+        page = columnar.from_rows(query.offset(skip).limit(limit).all(), names)
+    else:
+        archived = archive.read_archived(db, user_id, start, end)
+        if tagged:
+            archived = tags.filter_archived(db, archived, user_id, tagged, start, end)
+        page = columnar.merged(
+            columnar.from_archived(archived.slice(0, skip + limit), names),
+            columnar.from_rows(query.limit(skip + limit).all(), names),
+        ).slice(skip, limit)
+    return columnar.narrow(db, page, fields)
+
 
 @router.get("/health", summary="Service healthcheck")
 async def healthcheck() -> dict[str, str]:
@@ -18,26 +261,124 @@ async def healthcheck() -> dict[str, str]:
 
 @router.post(
     "/",
-    response_model=ExpenseRead,
+    response_model=ExpenseWriteResult,
     status_code=status.HTTP_201_CREATED,
     summary="Create a new expense",
 )
 def create_expense(
     expense: ExpenseCreate,
+    response: Response,
+    allow_duplicate: bool = Query(
+        default=False, description="Store the expense even if it looks like a repeat"
+    ),
     db: Session = Depends(get_db),
     current_user_id: int = Depends(get_current_user_id),
-) -> ExpenseRead:
-    """Create a new expense record."""
+) -> ExpenseWriteResult:
+    """Create a new expense record.
+
+    ``budget`` reports the month-to-date status of the matching budget,
+    including this expense, so the client can warn as soon as it is exceeded.
+    """
     db_expense = Expense(
         user_id=current_user_id,
-        amount=expense.amount,
+        amount_minor=to_minor(expense.amount, expense.currency),
         currency=expense.currency,
+        category_id=categories.resolve_one(db, current_user_id, expense.category),
         category=expense.category,
+        merchant=expense.merchant,
+        note=expense.note,
     )
+    now = datetime.now(timezone.utc)
+    db_expense.created_at = now
+    if not allow_duplicate:
+        (existing,) = dedupe.find_existing(db, current_user_id, [(db_expense, now)])
+        if existing is not None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"possible duplicate of expense {existing.id}",
+            )
+    db_expense.fingerprint = dedupe.fingerprint_of(db_expense, now)
+    tags.set_tags(db_expense, expense.tags)
+    anomaly.observe(db, db_expense)
+    budget = budgets.observe(db, db_expense)
     db.add(db_expense)
     db.commit()
     db.refresh(db_expense)
-    return ExpenseRead.model_validate(db_expense)
+    response.headers["ETag"] = _etag(db_expense.version)
+    return ExpenseWriteResult(**ExpenseRead.model_validate(db_expense).model_dump(), budget=budget)
+
+
+@router.post(
+    "/import",
+    response_model=ImportResult,
+    summary="Import many expenses at once",
+)
+def import_expense_batch(
+    items: List[ExpenseImport] = Body(max_length=1000),
+    allow_duplicates: bool = Query(
+        default=False, description="Store items even if they look like repeats"
+    ),
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> ImportResult:
+    """Insert up to 1000 expenses, skipping near-duplicates of stored or earlier items."""
+    return import_expenses(db, current_user_id, items, allow_duplicates)
+
+
+@router.patch(
+    "/bulk",
+    response_model=BulkResult,
+    summary="Change many expenses at once",
+)
+def bulk_update_expenses(
+    changes: List[ExpenseBulkChange] = Body(max_length=5000),
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> BulkResult:
+    """Apply partial changes to up to 5000 expenses, all or none.
+
+    Fails with 404 if any id is not the caller's, with 412 if any given
+    ``version`` is out of date, and with 422 if an amount rounds to zero.
+    """
+    if len({change.id for change in changes}) < len(changes):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="each expense may appear only once",
+        )
+    try:
+        affected = bulk.update_many(
+            db, current_user_id, [change.model_dump(exclude_unset=True) for change in changes]
+        )
+    except bulk.ExpensesMissing as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(exc))
+    except bulk.VersionConflict as exc:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(exc))
+    except BelowMinorUnit as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    db.commit()
+    return BulkResult(affected=affected)
+
+
+@router.post(
+    "/bulk-delete",
+    response_model=BulkResult,
+    summary="Delete expenses by id or by filter",
+)
+def bulk_delete_expenses(
+    criteria: ExpenseBulkDelete,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> BulkResult:
+    """Delete the caller's expenses matching every given criterion, in one statement."""
+    if not criteria.model_dump(exclude_none=True):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="give ids or at least one filter",
+        )
+    affected = bulk.delete_matching(db, current_user_id, **criteria.model_dump())
+    db.commit()
+    return BulkResult(affected=affected)
 
 
 @router.get(
@@ -46,20 +387,381 @@ def create_expense(
     summary="List all expenses",
 )
 def list_expenses(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    tag: List[str] | None = Query(default=None, description="Only expenses with every tag"),
+    fields: list[str] | None = Depends(_fields),
     db: Session = Depends(get_db),
     current_user_id: int = Depends(get_current_user_id),
 ) -> List[ExpenseRead]:
-    """List expenses for the authenticated user."""
-    expenses = (
-        db.query(Expense)
-        .filter(Expense.user_id == current_user_id)
-        .offset(skip)
-        .limit(limit)
+    """List expenses for the authenticated user.
+
+    With ``fields`` each item carries only those fields, and only the columns
+    they need are read. ``Accept: application/vnd.apache.arrow.stream``
+    returns the page as one Arrow record batch stream instead.
+    """
+    if preferred(request.headers.get("accept"), (JSON, MSGPACK, ARROW_STREAM)) == ARROW_STREAM:
+        return ArrowResponse(
+            _arrow_page(
+                db, current_user_id, start, end, skip, limit, tag, fields or list(projection.FIELDS)
+            )
+        )
+    if fields is None:
+        return _expense_page(db, current_user_id, start, end, skip, limit, tag)
+    return NegotiatedResponse(
+        jsonable_encoder(
+            _projected_page(db, current_user_id, start, end, skip, limit, tag, fields)
+        )
+    )
+
+
+@router.get(
+    "/series",
+    response_model=ExpenseSeries,
+    summary="Spend per day, week or month, for charts",
+)
+def expense_series(
+    start: datetime | None = Query(default=None, description="Defaults to a year before end"),
+    end: datetime | None = Query(default=None, description="Exclusive; defaults to now"),
+    interval: Literal["day", "week", "month"] = "day",
+    cumulative: bool = Query(default=False, description="Also return running totals"),
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> ExpenseSeries:
+    """Zero-filled totals per UTC bucket and currency, as arrays parallel to ``buckets``."""
+    end = archive.as_utc(end) if end is not None else datetime.now(timezone.utc)
+    if start is None:
+        start = end.replace(year=end.year - 1, day=min(end.day, 28))
+    start = archive.as_utc(start)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must be before end",
+        )
+    try:
+        return series.series(db, current_user_id, start, end, interval, cumulative)
+    except series.TooManyBuckets as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+@router.get(
+    "/summary",
+    response_model=ExpenseSummary,
+    summary="Summarize expenses by category",
+)
+def summarize_expenses(
+    start: datetime | None = None,
+    end: datetime | None = None,
+    currency: str | None = Query(
+        default=None,
+        min_length=3,
+        max_length=3,
+        description="Convert every total into this currency at each expense's daily rate",
+    ),
+    tag: List[str] | None = Query(default=None, description="Only expenses with every tag"),
+    approx: bool = Query(
+        default=False,
+        description="Estimate from a random sample when the range holds more than "
+        "`sample_size` rows; see `approximate` in the response",
+    ),
+    sample_size: int | None = Query(
+        default=None,
+        ge=100,
+        le=1_000_000,
+        description="Rows to sample with `approx`; defaults to EXPENSES_APPROX_SAMPLE_ROWS",
+    ),
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> ExpenseSummary:
+    """Count and total the user's expenses per category and currency."""
+    try:
+        return summarize(db, current_user_id, start, end, currency, tag, approx, sample_size)
+    except fx.RateMissing as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+@router.get(
+    "/stats",
+    response_model=ExpenseStatistics,
+    summary="Amount statistics per category",
+)
+def expense_statistics(
+    start: datetime | None = None,
+    end: datetime | None = None,
+    bins: int = Query(default=20, ge=1, le=200),
+    approx: bool = Query(
+        default=False,
+        description="Estimate from a random sample when the range holds more than "
+        "`sample_size` rows; see `approximate` in the response",
+    ),
+    sample_size: int | None = Query(
+        default=None,
+        ge=100,
+        le=1_000_000,
+        description="Rows to sample with `approx`; defaults to EXPENSES_APPROX_SAMPLE_ROWS",
+    ),
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> ExpenseStatistics:
+    """Mean, median, p90/p99, standard deviation and a histogram per category."""
+    return compute_statistics(db, current_user_id, start, end, bins, approx, sample_size)
+
+
+@router.get(
+    "/search",
+    response_model=List[ExpenseSearchHit],
+    summary="Search merchants and notes",
+)
+def search(
+    q: str = Query(min_length=1, max_length=200, description="Words to look for"),
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> List[ExpenseSearchHit]:
+    """Ranked full-text matches among the user's expenses, best first.
+
+    Fails with 501 when the database has no supported text index.
+    """
+    try:
+        hits = search_expenses(db, current_user_id, q, skip, limit)
+    except SearchUnsupported as exc:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(exc))
+    return [
+        ExpenseSearchHit(**ExpenseRead.model_validate(expense).model_dump(), rank=rank)
+        for expense, rank in hits
+    ]
+
+
+@router.get(
+    "/tags",
+    response_model=TagCloud,
+    summary="Tag cloud",
+)
+def tag_cloud(
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int = Query(default=100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> TagCloud:
+    """How many expenses carry each tag, most used first."""
+    counts = tags.tag_cloud(db, current_user_id, start, end, limit)
+    return TagCloud(
+        start=start,
+        end=end,
+        tags=[TagCount(tag=tag, count=count) for tag, count in counts],
+    )
+
+
+@router.get(
+    "/budgets",
+    response_model=List[BudgetStatus],
+    summary="Budgets and their month-to-date spend",
+)
+def list_budgets(
+    month: date | None = Query(default=None, description="Any day of the month; defaults to now"),
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> List[BudgetStatus]:
+    """Read from the month counters; no expenses are summed."""
+    month = date(month.year, month.month, 1) if month else budgets.month_of(datetime.now(timezone.utc))
+    return budgets.statuses(db, current_user_id, month)
+
+
+@router.put(
+    "/budgets",
+    response_model=BudgetStatus,
+    summary="Set a monthly budget for a category",
+)
+def set_budget(
+    budget: BudgetSet,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> BudgetStatus:
+    """Create or replace the category's budget in ``currency``; returns this month's status."""
+    return budgets.set_budget(
+        db,
+        current_user_id,
+        categories.resolve_one(db, current_user_id, budget.category),
+        budget.category,
+        budget.currency,
+        to_minor(budget.limit, budget.currency),
+    )
+
+
+@router.delete(
+    "/budgets",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Remove a budget",
+)
+def delete_budget(
+    category: str = Query(max_length=120),
+    currency: str = Query(default="USD", max_length=3),
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> None:
+    if not budgets.remove(db, current_user_id, category, currency):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"no {currency} budget for {category}",
+        )
+    return None
+
+
+@router.post(
+    "/recurring",
+    response_model=RecurringExpenseRead,
+    status_code=status.HTTP_201_CREATED,
+    summary="Create a recurring expense template",
+)
+def create_recurring_expense(
+    template: RecurringExpenseCreate,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> RecurringExpenseRead:
+    """Occurrences that are already due are created by the job worker shortly after.
+
+    Later ones are left to the materializer.
+    """
+    if template.ends_on is not None and template.ends_on < template.starts_on:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ends_on must not be before starts_on",
+        )
+    day_of_month = template.day_of_month or template.starts_on.day
+    db_template = RecurringExpense(
+        user_id=current_user_id,
+        category_id=categories.resolve_one(db, current_user_id, template.category),
+        amount_minor=to_minor(template.amount, template.currency),
+        currency=template.currency,
+        merchant=template.merchant,
+        note=template.note,
+        interval_months=template.interval_months,
+        day_of_month=day_of_month,
+        starts_on=template.starts_on,
+        ends_on=template.ends_on,
+        next_run_at=recurring.first_run(template.starts_on, day_of_month, template.ends_on),
+    )
+    db.add(db_template)
+    db.flush()
+    next_run_at = db_template.next_run_at
+    if next_run_at is not None and next_run_at <= datetime.now(timezone.utc):
+        jobs.enqueue(db, jobs.MaterializeRecurring(template_id=db_template.id))
+    db.commit()
+    db.refresh(db_template)
+    return RecurringExpenseRead.model_validate(db_template)
+
+
+@router.get(
+    "/recurring",
+    response_model=List[RecurringExpenseRead],
+    summary="List recurring expense templates",
+)
+def list_recurring_expenses(
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> List[RecurringExpenseRead]:
+    templates = (
+        db.query(RecurringExpense)
+        .filter(RecurringExpense.user_id == current_user_id)
+        .order_by(RecurringExpense.id)
+    )
+    return [RecurringExpenseRead.model_validate(template) for template in templates]
+
+
+@router.delete(
+    "/recurring/{recurring_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Delete a recurring expense template",
+)
+def delete_recurring_expense(
+    recurring_id: int,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> None:
+    """Stop future occurrences; expenses already created are kept."""
+    template = db.get(RecurringExpense, recurring_id)
+    if not template or template.user_id != current_user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"recurring expense {recurring_id} not found",
+        )
+    db.delete(template)
+    db.commit()
+    return None
+
+
+@router.get(
+    "/forecast",
+    response_model=ExpenseForecastRead,
+    summary="Projected month-end spend",
+)
+def get_forecast(
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> ExpenseForecastRead:
+    """Latest batch forecast for the current month, one entry per currency."""
+    month = datetime.now(timezone.utc).date().replace(day=1)
+    forecasts = (
+        db.query(ExpenseForecast)
+        .filter(ExpenseForecast.user_id == current_user_id, ExpenseForecast.month == month)
+        .order_by(ExpenseForecast.currency)
         .all()
     )
-    return [ExpenseRead.model_validate(expense) for expense in expenses]
+    return ExpenseForecastRead(
+        month=month,
+        forecasts=[CurrencyForecast.model_validate(forecast) for forecast in forecasts],
+    )
+
+
+@router.get(
+    "/export",
+    response_class=StreamingResponse,
+    summary="Export expenses as CSV or Arrow",
+)
+def export_expenses(
+    request: Request,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    currency: str | None = Query(
+        default=None,
+        min_length=3,
+        max_length=3,
+        description="Add amounts converted into this currency at each expense's daily rate",
+    ),
+    fields: list[str] | None = Depends(_export_fields),
+    current_user_id: int = Depends(get_current_user_id),
+) -> StreamingResponse:
+    """Stream every expense in the range as CSV, oldest first, optionally only some columns.
+
+    With ``Accept: application/vnd.apache.arrow.stream`` the same columns
+    come as an Arrow IPC stream of record batches.
+    """
+    if currency is not None:
+        currency = currency.upper()
+        if not fx.rate_table().knows(currency):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"no exchange rates for {currency}",
+            )
+    if preferred(request.headers.get("accept"), ("text/csv", ARROW_STREAM)) == ARROW_STREAM:
+        return StreamingResponse(
+            export_arrow(current_user_id, start, end, currency, fields),
+            media_type=ARROW_STREAM,
+            headers={
+                "Content-Disposition": 'attachment; filename="expenses.arrows"',
+                "Vary": "Accept",
+            },
+        )
+    return StreamingResponse(
+        export_csv(current_user_id, start, end, currency, fields),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="expenses.csv"', "Vary": "Accept"},
+    )
 
 
 @router.get(
@@ -69,46 +771,103 @@ def list_expenses(
 )
 def get_expense(
     expense_id: int,
+    response: Response,
+    fields: list[str] | None = Depends(_fields),
     db: Session = Depends(get_db),
     current_user_id: int = Depends(get_current_user_id),
 ) -> ExpenseRead:
-    """Get a specific expense by its ID."""
+    """Get a specific expense by its ID, optionally only some ``fields``.
+
+    The ``ETag`` header holds the version to send back in ``If-Match``.
+    """
+    if fields is not None:
+        row = db.execute(
+            select(*projection.columns(fields, "user_id", "version")).where(
+                Expense.id == expense_id
+            )
+        ).first()
+        if row is None or row.user_id != current_user_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Expense with ID {expense_id} not found",
+            )
+        (item,) = projection.rows(db, [row], fields)
+        return NegotiatedResponse(jsonable_encoder(item), headers={"ETag": _etag(row.version)})
     expense = db.query(Expense).filter(Expense.id == expense_id).first()
     if not expense or expense.user_id != current_user_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Expense with ID {expense_id} not found",
         )
+    response.headers["ETag"] = _etag(expense.version)
     return ExpenseRead.model_validate(expense)
 
 
 @router.put(
     "/{expense_id}",
-    response_model=ExpenseRead,
+    response_model=ExpenseWriteResult,
     summary="Update an expense",
 )
 def update_expense(
     expense_id: int,
     expense_update: ExpenseUpdate,
+    response: Response,
+    if_match: str | None = IF_MATCH,
     db: Session = Depends(get_db),
     current_user_id: int = Depends(get_current_user_id),
-) -> ExpenseRead:
-    """Update an existing expense."""
+) -> ExpenseWriteResult:
+    """Update an existing expense.
+
+    With ``If-Match`` or ``version`` the update only applies if nobody has
+    changed the expense since; otherwise it fails with 412. The check is the
+    ``WHERE version = ...`` of the update itself, so it holds no lock.
+    """
     expense = db.query(Expense).filter(Expense.id == expense_id).first()
     if not expense or expense.user_id != current_user_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Expense with ID {expense_id} not found",
         )
-    
+    _check_version(expense, if_match, expense_update.version)
+
     # Update only provided fields
     update_data = expense_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(expense, field, value)
-    
-    db.commit()
+    update_data.pop("version", None)
+    rescored = not update_data.keys().isdisjoint({"amount", "category", "currency"})
+    amount = update_data.pop("amount", None) or expense.amount
+    try:
+        amount_minor = to_positive_minor(amount, update_data.get("currency") or expense.currency)
+    except BelowMinorUnit as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    if "category" in update_data:
+        category_id = categories.resolve_one(db, current_user_id, update_data["category"])
+    try:
+        if rescored:
+            anomaly.forget(db, expense)
+            budgets.forget(db, expense)
+        if "tags" in update_data:
+            tags.set_tags(expense, update_data.pop("tags") or [])
+        for field, value in update_data.items():
+            setattr(expense, field, value)
+        if "category" in update_data:
+            expense.category_id = category_id
+        expense.amount_minor = amount_minor
+        if rescored:
+            anomaly.observe(db, expense)
+            budget = budgets.observe(db, expense)
+            expense.fingerprint = dedupe.fingerprint_of(expense)
+        else:
+            budget = budgets.status_of(db, expense)
+        expense.version = expense.version + 1
+        db.commit()
+    except StaleDataError:
+        # Another writer committed between our read and our UPDATE, which an
+        # autoflush inside the bookkeeping above can hit before the commit.
+        db.rollback()
+        raise _stale()
     db.refresh(expense)
-    return ExpenseRead.model_validate(expense)
+    response.headers["ETag"] = _etag(expense.version)
+    return ExpenseWriteResult(**ExpenseRead.model_validate(expense).model_dump(), budget=budget)
 
 
 @router.delete(
@@ -118,19 +877,129 @@ def update_expense(
 )
 def delete_expense(
     expense_id: int,
+    if_match: str | None = IF_MATCH,
     db: Session = Depends(get_db),
     current_user_id: int = Depends(get_current_user_id),
 ) -> None:
-    """Delete an expense by its ID."""
+    """Delete an expense by its ID, optionally only at the version in ``If-Match``."""
     expense = db.query(Expense).filter(Expense.id == expense_id).first()
     if not expense or expense.user_id != current_user_id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Expense with ID {expense_id} not found",
         )
-    
+    _check_version(expense, if_match)
+
+    anomaly.forget(db, expense)
+    budgets.forget(db, expense)
     db.delete(expense)
-    db.commit()
+    try:
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        raise _stale()
+    return None
+
+
+def _owned_expense(db: Session, expense_id: int, user_id: int) -> Expense:
+    expense = db.get(Expense, expense_id)
+    if not expense or expense.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Expense with ID {expense_id} not found",
+        )
+    return expense
+
+
+@router.post(
+    "/{expense_id}/receipts",
+    response_model=ReceiptRead,
+    status_code=status.HTTP_201_CREATED,
+    summary="Attach a receipt image or PDF",
+    openapi_extra=_MULTIPART_FILE,
+)
+async def upload_receipt(
+    expense_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> ReceiptRead:
+    """Stream the multipart ``file`` field into the receipt store and link it."""
+    expense = await run_in_threadpool(_owned_expense, db, expense_id, current_user_id)
+    try:
+        receipt = await receipts.receive(request.headers.get("content-type"), request.stream())
+    except receipts.ReceiptTooLarge as exc:
+        # The name of Starlette's 413 constant differs between versions.
+        raise HTTPException(status_code=413, detail=str(exc))
+    except receipts.UnsupportedReceipt as exc:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(exc))
+    except receipts.ReceiptRejected as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    receipt = await run_in_threadpool(receipts.attach, db, expense, receipt)
+    return ReceiptRead.model_validate(receipt)
+
+
+@router.get(
+    "/{expense_id}/receipts",
+    response_model=List[ReceiptRead],
+    summary="List an expense's receipts",
+)
+def list_receipts(
+    expense_id: int,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> List[ReceiptRead]:
+    """Receipts stay listed after their expense is archived."""
+    return [
+        ReceiptRead.model_validate(receipt)
+        for receipt in receipts.receipts_for(db, current_user_id, expense_id)
+    ]
+
+
+@router.get(
+    "/{expense_id}/receipts/{sha256}",
+    response_class=FileResponse,
+    summary="Download a receipt",
+)
+def download_receipt(
+    expense_id: int,
+    sha256: str = SHA256,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> FileResponse:
+    """Serve the stored file, honouring ``Range`` and ``If-Range`` requests."""
+    receipt = receipts.find(db, current_user_id, expense_id, sha256)
+    path = receipts.blob_path(sha256)
+    if receipt is None or not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="receipt not found")
+    return FileResponse(
+        path,
+        media_type=receipt.content_type,
+        filename=receipt.filename,
+        content_disposition_type="inline",
+        headers={
+            # Content-addressed: the digest is a strong validator and never goes stale.
+            "ETag": f'"{sha256}"',
+            "Cache-Control": "private, max-age=31536000, immutable",
+            "X-Content-Type-Options": "nosniff",
+        },
+    )
+
+
+@router.delete(
+    "/{expense_id}/receipts/{sha256}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Detach a receipt",
+)
+def delete_receipt(
+    expense_id: int,
+    sha256: str = SHA256,
+    db: Session = Depends(get_db),
+    current_user_id: int = Depends(get_current_user_id),
+) -> None:
+    """Unlink the receipt; the file is removed once nothing links to it."""
+    if not receipts.detach(db, current_user_id, expense_id, sha256):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="receipt not found")
     return None
 
 
@@ -143,6 +1012,9 @@ def get_user_expenses(
     user_id: int,
     skip: int = 0,
     limit: int = 100,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    tag: List[str] | None = Query(default=None, description="Only expenses with every tag"),
     db: Session = Depends(get_db),
     current_user_id: int = Depends(get_current_user_id),
 ) -> List[ExpenseRead]:
@@ -152,11 +1024,4 @@ def get_user_expenses(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="cannot access another user's expenses",
         )
-    expenses = (
-        db.query(Expense)
-        .filter(Expense.user_id == current_user_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
-    return [ExpenseRead.model_validate(expense) for expense in expenses]
+    return _expense_page(db, current_user_id, start, end, skip, limit, tag)
@@ -0,0 +1,38 @@
+"""Rebuild the DuckDB analytics snapshot used by ``/expenses/reports``.
+
+Run from the ``expenses`` directory, once from cron or as a long-lived loop::
+
+    python -m app.cli.analytics
+    python -m app.cli.analytics --every 900
+"""
+import argparse
+import time
+
+from app.core.config import get_settings
+from app.services import analytics
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.analytics")
+    parser.add_argument(
+        "--every",
+        type=int,
+        nargs="?",
+        const=0,
+        default=None,
+        help="keep refreshing every N seconds (default EXPENSES_ANALYTICS_REFRESH_SECONDS)",
+    )
+    args = parser.parse_args(argv)
+    interval = args.every or get_settings().analytics_refresh_seconds
+
+    while True:
+        started = time.monotonic()
+        refreshed_at = analytics.refresh_snapshot()
+        print(f"snapshot refreshed at {refreshed_at.isoformat()}")
+        if args.every is None:
+            return
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Rebuild per-category amount statistics and anomaly scores.
+
+Run from the ``expenses`` directory after a bulk import or a change of
+``EXPENSES_ANOMALY_THRESHOLD``::
+
+    python -m app.cli.anomaly
+    python -m app.cli.anomaly --user-id 42 --user-id 43
+"""
+import argparse
+
+from sqlalchemy.orm import Session
+
+from app.db.sharding import fan_out
+from app.services.anomaly import rescore
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.anomaly")
+    parser.add_argument(
+        "--user-id",
+        dest="user_ids",
+        type=int,
+        action="append",
+        help="only rescore these users (repeatable; defaults to everyone)",
+    )
+    args = parser.parse_args(argv)
+
+    def run(db: Session) -> int:
+        return rescore(db, args.user_ids)
+
+    for index, scored in enumerate(fan_out(run)):
+        print(f"shard {index}: {scored} expenses rescored")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Move old expenses into Parquet cold storage.
+
+Run from the ``expenses`` directory, e.g. nightly::
+
+    python -m app.cli.archive                      # older than EXPENSES_ARCHIVE_AFTER_DAYS
+    python -m app.cli.archive --before 2024-01-01
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.sharding import fan_out
+from app.services import archive
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.archive")
+    parser.add_argument(
+        "--before",
+        type=datetime.fromisoformat,
+        default=None,
+        help="archive expenses created before this ISO date (UTC)",
+    )
+    args = parser.parse_args(argv)
+
+    cutoff = args.before or (
+        datetime.now(timezone.utc) - timedelta(days=get_settings().archive_after_days)
+    )
+
+    def run(db: Session) -> list[str]:
+        return [
+            f"user {period.user_id} {period.year}: {period.row_count} rows -> {period.path}"
+            for period in archive.archive_before(db, cutoff)
+        ]
+
+    for index, lines in enumerate(fan_out(run)):
+        for line in lines:
+            print(f"shard {index}: {line}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Find (and optionally remove) near-duplicate expenses on every shard.
+
+Run from the ``expenses`` directory::
+
+    python -m app.cli.dedupe --backfill   # fingerprint rows written before the column existed
+    python -m app.cli.dedupe              # report duplicate groups
+    python -m app.cli.dedupe --delete     # keep the oldest expense of each group
+
+Groups come from one pass over the ``(user_id, created_at)`` index and use
+the rule create and import apply: same amount, currency and category, at
+most ``EXPENSES_DEDUPE_WINDOW_SECONDS`` apart. The job scales with the table
+rather than with the number of expense pairs.
+"""
+import argparse
+
+from sqlalchemy.orm import Session
+
+from app.db.models import Expense
+from app.db.sharding import fan_out
+from app.services import anomaly, budgets, dedupe
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.dedupe")
+    parser.add_argument("--backfill", action="store_true", help="fill missing fingerprints first")
+    parser.add_argument("--delete", action="store_true", help="delete all but the oldest duplicate")
+    args = parser.parse_args(argv)
+
+    def run(db: Session) -> list[str]:
+        lines = []
+        if args.backfill:
+            lines.append(f"{dedupe.backfill(db)} fingerprints backfilled")
+        groups = list(dedupe.find_duplicates(db))
+        for keep, *extra in groups:
+            lines.append(f"expense {keep} repeated by {', '.join(map(str, extra))}")
+            if not args.delete:
+                continue
+            for expense in db.query(Expense).filter(Expense.id.in_(extra)):
+                anomaly.forget(db, expense)
+                budgets.forget(db, expense)
+                db.delete(expense)
+            db.commit()
+        lines.append(f"{len(groups)} duplicate groups" + (" removed" if args.delete else ""))
+        return lines
+
+    for index, lines in enumerate(fan_out(run)):
+        for line in lines:
+            print(f"shard {index}: {line}")
+
+
+if __name__ == "__main__":
+    main()
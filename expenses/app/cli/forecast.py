@@ -0,0 +1,34 @@
+"""Recompute month-end spend forecasts for every user on every shard.
+
+Run from the ``expenses`` directory, e.g. nightly::
+
+    python -m app.cli.forecast
+"""
+import argparse
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from app.db.sharding import fan_out
+from app.services.forecast import run_forecasts
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.forecast")
+    parser.add_argument(
+        "--today",
+        type=date.fromisoformat,
+        default=None,
+        help="forecast as of this date instead of today (YYYY-MM-DD)",
+    )
+    args = parser.parse_args(argv)
+
+    def run(db: Session) -> int:
+        return run_forecasts(db, args.today)
+
+    for index, written in enumerate(fan_out(run)):
+        print(f"shard {index}: {written} forecasts written")
+
+
+if __name__ == "__main__":
+    main()
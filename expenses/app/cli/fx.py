@@ -0,0 +1,36 @@
+"""Load exchange rates into ``fx_rates`` on the primary database.
+
+Run from the ``expenses`` directory::
+
+    python -m app.cli.fx load rates.csv
+
+The CSV needs a ``date,currency,rate`` header, where ``rate`` is the value of
+one unit of ``currency`` in ``EXPENSES_FX_BASE_CURRENCY`` on ``date``
+(YYYY-MM-DD). Rows already present are overwritten.
+"""
+import argparse
+
+from app.db.session import SessionLocal
+from app.services import fx
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.fx")
+    commands = parser.add_subparsers(dest="command", required=True)
+    load = commands.add_parser("load", help="upsert rates from a CSV file")
+    load.add_argument("path")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        with open(args.path, newline="") as source:
+            loaded = fx.load_csv(db, source)
+    except ValueError as exc:
+        raise SystemExit(f"{args.path}: {exc}")
+    finally:
+        db.close()
+    print(f"{loaded} rates loaded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Maintain the monthly partitions of the ``expenses`` table.
+
+Run from the ``expenses`` directory, e.g. from a daily cron job::
+
+    python -m app.cli.partitions ensure --months-ahead 3
+    python -m app.cli.partitions drop-before 2024-01
+"""
+import argparse
+from datetime import date
+
+from app.core.config import get_settings
+from app.db import partitions
+from app.db.session import shard_engines
+
+
+def _month(value: str) -> date:
+    year, month = value.split("-")
+    return date(int(year), int(month), 1)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.partitions")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ensure = commands.add_parser("ensure", help="pre-create upcoming monthly partitions")
+    ensure.add_argument("--months-ahead", type=int, default=None)
+    ensure.add_argument("--since", type=_month, default=None, help="first month, YYYY-MM")
+
+    drop = commands.add_parser("drop-before", help="drop whole months older than YYYY-MM")
+    drop.add_argument("month", type=_month)
+
+    commands.add_parser("list", help="list monthly partitions")
+
+    args = parser.parse_args(argv)
+    months_ahead = args.months_ahead if args.command == "ensure" else None
+    if months_ahead is None:
+        months_ahead = get_settings().partition_months_ahead
+    for index, engine in enumerate(shard_engines):
+        with engine.begin() as conn:
+            if not partitions.is_supported(conn):
+                print(f"shard {index}: partitioning requires PostgreSQL; skipped")
+                continue
+            if args.command == "ensure":
+                names = partitions.ensure_partitions(conn, months_ahead, start=args.since)
+            elif args.command == "drop-before":
+                names = partitions.drop_partitions_before(conn, args.month)
+            else:
+                names = [name for name, _ in partitions.list_partitions(conn)]
+        for name in names:
+            print(f"shard {index}: {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Remove receipt files that no expense links to any more.
+
+Run from the ``expenses`` directory, e.g. daily::
+
+    python -m app.cli.receipts prune
+    python -m app.cli.receipts prune --grace-hours 1 --dry-run
+
+Links are collected from every shard first, so a file shared by users on
+different shards is kept while any of them still uses it.
+"""
+import argparse
+
+from app.db.sharding import fan_out
+from app.services import receipts
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.receipts")
+    commands = parser.add_subparsers(dest="command", required=True)
+    prune = commands.add_parser("prune", help="delete unlinked receipt files")
+    prune.add_argument(
+        "--grace-hours",
+        type=float,
+        default=24.0,
+        help="keep files written or re-uploaded within this many hours",
+    )
+    prune.add_argument("--dry-run", action="store_true", help="only report what would go")
+    args = parser.parse_args(argv)
+
+    linked = set().union(*fan_out(receipts.linked_digests))
+    files, size = receipts.prune(linked, args.grace_hours * 3600, args.dry_run)
+    verb = "would remove" if args.dry_run else "removed"
+    print(f"{verb} {files} files, {size} bytes; {len(linked)} files still linked")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Create the expenses that recurring templates have come due for.
+
+Run from the ``expenses`` directory, e.g. hourly::
+
+    python -m app.cli.recurring
+    python -m app.cli.recurring --now 2026-01-01T00:00:00+00:00 --batch-size 5000
+
+Safe to re-run or to run on overlapping schedules: an occurrence is never
+created twice.
+"""
+import argparse
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app.db.sharding import fan_out
+from app.services import recurring
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.recurring")
+    parser.add_argument(
+        "--now",
+        type=datetime.fromisoformat,
+        default=None,
+        help="materialize occurrences due by this ISO timestamp instead of now",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=recurring.BATCH_SIZE,
+        help="templates claimed and committed per batch",
+    )
+    args = parser.parse_args(argv)
+
+    def run(db: Session) -> tuple[int, int]:
+        return recurring.materialize(db, args.now, batch_size=args.batch_size)
+
+    for index, (templates, created) in enumerate(fan_out(run)):
+        print(f"shard {index}: {templates} templates due, {created} expenses created")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""Inspect expense shards and move users between them.
+
+Run from the ``expenses`` directory::
+
+    python -m app.cli.shards stats
+    python -m app.cli.shards reshard --to URL [URL ...] [--from URL ...]
+        [--batch-size 1000] [--delete-source] [--dry-run]
+
+``reshard`` computes every user's shard under the new URL list and copies
+the users whose shard changes in keyset-paginated batches. Copies are
+idempotent, so an interrupted run can simply be restarted. Once
+``EXPENSES_SHARD_URLS`` has been switched to the new list, rerun with
+``--from <old urls> --delete-source`` to remove the copied rows from their
+old shard.
+"""
+import argparse
+
+from sqlalchemy import create_engine, delete, func, select, text, tuple_, union
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.schema import Table
+
+from app.core.config import get_settings
+from app.db.models import (
+    ArchivedPeriod,
+    Budget,
+    Category,
+    CategoryAmountStats,
+    Expense,
+    ExpenseForecast,
+    ExpenseMonthTotal,
+    ExpenseReceipt,
+    ExpenseTag,
+    RecurringExpense,
+)
+from app.db.sharding import fan_out, shard_index
+from app.db.session import shard_engines
+
+# Per-user tables that follow a user to their new shard.
+USER_TABLES: list[Table] = [
+    Category.__table__,
+    Expense.__table__,
+    ArchivedPeriod.__table__,
+    ExpenseForecast.__table__,
+    CategoryAmountStats.__table__,
+    ExpenseTag.__table__,
+    ExpenseReceipt.__table__,
+    RecurringExpense.__table__,
+    Budget.__table__,
+    ExpenseMonthTotal.__table__,
+]
+
+
+def _shard_stats(db: Session) -> tuple[int, int]:
+    users, rows = db.query(
+        func.count(func.distinct(Expense.user_id)), func.count(Expense.id)
+    ).one()
+    return users, rows
+
+
+def _insert_ignoring_existing(conn: Connection, table: Table):
+    dialect = {"postgresql": postgresql, "sqlite": sqlite}.get(conn.dialect.name)
+    if dialect is None:
+        raise SystemExit(f"resharding is not supported on {conn.dialect.name}")
+    return dialect.insert(table).on_conflict_do_nothing()
+
+
+def _copy_user_table(
+    source: Connection,
+    target: Connection,
+    table: Table,
+    user_id: int,
+    batch_size: int,
+) -> int:
+    key = list(table.primary_key.columns)
+    statement = _insert_ignoring_existing(target, table)
+    last = None
+    copied = 0
+    while True:
+        query = select(table).where(table.c.user_id == user_id)
+        if last is not None:
+            query = query.where(tuple_(*key) > tuple_(*last))
+        rows = source.execute(query.order_by(*key).limit(batch_size)).mappings().all()
+        if not rows:
+            return copied
+        # Only globally unique ids can clash; per-user keys include user_id.
+        if [column.name for column in key] == ["id"]:
+            ids = [row["id"] for row in rows]
+            clash = target.execute(
+                select(table.c.id)
+                .where(table.c.id.in_(ids), table.c.user_id != user_id)
+                .limit(1)
+            ).scalar()
+            if clash is not None:
+                raise SystemExit(
+                    f"{table.name}.id {clash} already belongs to another user on the "
+                    "target shard; give shards disjoint id sequences before resharding"
+                )
+        target.execute(statement, [dict(row) for row in rows])
+        target.commit()
+        copied += len(rows)
+        last = [rows[-1][column.name] for column in key]
+
+
+def _advance_sequence(target: Connection, table: Table) -> None:
+    """Move a PostgreSQL serial past the copied ids so new inserts don't collide."""
+    if target.dialect.name != "postgresql" or "id" not in table.c:
+        return
+    sequence = target.execute(
+        text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": table.name}
+    ).scalar()
+    if sequence:
+        target.execute(
+            text(
+                f"SELECT setval('{sequence}', GREATEST("
+                f"(SELECT coalesce(max(id), 1) FROM {table.name}), "
+                f"(SELECT last_value FROM {sequence})))"
+            )
+        )
+    target.commit()
+
+
+def _user_rows(conn: Connection, table: Table, user_id: int) -> int:
+    return conn.execute(
+        select(func.count()).select_from(table).where(table.c.user_id == user_id)
+    ).scalar_one()
+
+
+def _user_ids():
+    """Every user with rows in any of USER_TABLES, not only users with hot expenses."""
+    owners = union(*(select(table.c.user_id) for table in USER_TABLES)).subquery()
+    return select(owners.c.user_id).order_by(owners.c.user_id)
+
+
+def reshard(
+    target_urls: list[str],
+    source_urls: list[str] | None,
+    batch_size: int,
+    delete_source: bool,
+    dry_run: bool,
+) -> None:
+    configured = get_settings().shard_db_urls
+    engines: dict[str, Engine] = dict(zip(configured, shard_engines))
+    source_urls = source_urls or configured
+    for url in [*source_urls, *target_urls]:
+        if url not in engines:
+            engines[url] = create_engine(url)
+
+    for source_index, source_url in enumerate(source_urls):
+        with engines[source_url].connect() as source:
+            user_ids = source.execute(_user_ids()).scalars().all()
+            for user_id in user_ids:
+                target_url = target_urls[shard_index(user_id, len(target_urls))]
+                if target_url == source_url:
+                    continue
+                target_index = target_urls.index(target_url)
+                print(f"user {user_id}: shard {source_index} -> new shard {target_index}")
+                if dry_run:
+                    continue
+                with engines[target_url].connect() as target:
+                    for table in USER_TABLES:
+                        copied = _copy_user_table(source, target, table, user_id, batch_size)
+                        _advance_sequence(target, table)
+                        print(f"  {table.name}: {copied} rows synced")
+                    if not delete_source:
+                        continue
+                    for table in USER_TABLES:
+                        if _user_rows(source, table, user_id) != _user_rows(target, table, user_id):
+                            raise SystemExit(
+                                f"user {user_id}: {table.name} row counts differ; "
+                                "not deleting from the source shard"
+                            )
+                    for table in reversed(USER_TABLES):
+                        source.execute(delete(table).where(table.c.user_id == user_id))
+                    source.commit()
+                    print("  source rows deleted")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.shards")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("stats", help="count users and expenses on every shard in parallel")
+
+    move = commands.add_parser("reshard", help="copy users to their shard under a new URL list")
+    move.add_argument("--to", nargs="+", required=True, metavar="URL")
+    move.add_argument(
+        "--from", dest="source", nargs="+", metavar="URL",
+        help="shard URLs to move users away from (defaults to EXPENSES_SHARD_URLS)",
+    )
+    move.add_argument("--batch-size", type=int, default=1000)
+    move.add_argument("--delete-source", action="store_true")
+    move.add_argument("--dry-run", action="store_true")
+
+    args = parser.parse_args(argv)
+    if args.command == "stats":
+        for index, (users, rows) in enumerate(fan_out(_shard_stats)):
+            print(f"shard {index}: {users} users, {rows} expenses")
+    else:
+        reshard(args.to, args.source, args.batch_size, args.delete_source, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Run queued background jobs; see app.services.jobs.
+
+Run from the ``expenses`` directory as a long-lived process next to the
+API, or from cron with ``--once``::
+
+    python -m app.cli.worker
+    python -m app.cli.worker --once --batch-size 100
+
+One thread per shard claims batches of due jobs and sleeps for
+``--poll-seconds`` whenever its queue is empty. SIGINT or SIGTERM stops
+the worker after the batch in progress. Several workers may run against
+PostgreSQL at once. On SQLite, run only one.
+"""
+import argparse
+from datetime import timedelta
+import os
+import signal
+import socket
+import threading
+
+from sqlalchemy.orm import Session
+
+from app.db.sharding import fan_out
+from app.services import jobs
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli.worker")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=jobs.BATCH_SIZE,
+        help="jobs claimed per batch and shard",
+    )
+    parser.add_argument(
+        "--poll-seconds",
+        type=float,
+        default=1.0,
+        help="how long an idle shard waits before looking for jobs again",
+    )
+    parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=jobs.LEASE.total_seconds(),
+        help="after this long a running job counts as abandoned and is claimed again",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="exit as soon as no job is due instead of polling",
+    )
+    args = parser.parse_args(argv)
+    lease = timedelta(seconds=args.lease_seconds)
+    name = f"{socket.gethostname()}:{os.getpid()}"
+
+    stop = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stop.set())
+
+    def run(db: Session) -> tuple[int, int]:
+        worker = f"{name}:{threading.get_ident()}"
+        succeeded = failed = 0
+        while not stop.is_set():
+            done, broken = jobs.work(db, worker, args.batch_size, lease)
+            succeeded += done
+            failed += broken
+            if done + broken == 0:
+                if args.once:
+                    break
+                stop.wait(args.poll_seconds)
+        return succeeded, failed
+
+    for index, (succeeded, failed) in enumerate(fan_out(run)):
+        print(f"shard {index}: {succeeded} jobs done, {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -29,6 +29,85 @@ class Settings(BaseSettings):
         default="HS256",
         validation_alias=AliasChoices("AUTH_JWT_ALGORITHM", "EXPENSES_JWT_ALGORITHM"),
     )
+    partition_months_ahead: int = Field(
+        default=3,
+        ge=0,
+        validation_alias=AliasChoices("EXPENSES_PARTITION_MONTHS_AHEAD"),
+    )
+    shard_urls: SecretStr | None = Field(
+        default=None,
+        validation_alias=AliasChoices("EXPENSES_SHARD_URLS"),
+        description="Comma-separated database URLs; expenses are routed by user id.",
+    )
+    archive_uri: str | None = Field(
+        default=None,
+        validation_alias=AliasChoices("EXPENSES_ARCHIVE_URI"),
+        description="Local path or s3://, gs:// URI for archived Parquet files.",
+    )
+    archive_after_days: int = Field(
+        default=365,
+        ge=1,
+        validation_alias=AliasChoices("EXPENSES_ARCHIVE_AFTER_DAYS"),
+    )
+    analytics_path: str = Field(
+        default="analytics.duckdb",
+        validation_alias=AliasChoices("EXPENSES_ANALYTICS_PATH"),
+    )
+    analytics_source_urls: SecretStr | None = Field(
+        default=None,
+        validation_alias=AliasChoices("EXPENSES_ANALYTICS_SOURCE_URLS"),
+        description="Comma-separated read replicas to snapshot instead of the shards.",
+    )
+    analytics_refresh_seconds: int = Field(
+        default=900,
+        ge=1,
+        validation_alias=AliasChoices("EXPENSES_ANALYTICS_REFRESH_SECONDS"),
+    )
+    anomaly_threshold: float = Field(
+        default=3.0,
+        gt=0,
+        validation_alias=AliasChoices("EXPENSES_ANOMALY_THRESHOLD"),
+        description="Flag expenses whose log-amount z-score exceeds this value.",
+    )
+    anomaly_min_history: int = Field(
+        default=5,
+        ge=2,
+        validation_alias=AliasChoices("EXPENSES_ANOMALY_MIN_HISTORY"),
+    )
+    dedupe_window_seconds: int = Field(
+        default=300,
+        ge=1,
+        validation_alias=AliasChoices("EXPENSES_DEDUPE_WINDOW_SECONDS"),
+        description="Same amount, currency and category within this window is a duplicate.",
+    )
+    fx_base_currency: str = Field(
+        default="USD",
+        min_length=3,
+        max_length=3,
+        validation_alias=AliasChoices("EXPENSES_FX_BASE_CURRENCY"),
+        description="Currency the rates in fx_rates are quoted in.",
+    )
+    fx_cache_seconds: int = Field(
+        default=3600,
+        ge=1,
+        validation_alias=AliasChoices("EXPENSES_FX_CACHE_SECONDS"),
+    )
+    approx_sample_rows: int = Field(
+        default=10_000,
+        ge=100,
+        validation_alias=AliasChoices("EXPENSES_APPROX_SAMPLE_ROWS"),
+        description="Rows sampled by approx=true summaries and statistics.",
+    )
+    receipts_path: str = Field(
+        default="receipts",
+        validation_alias=AliasChoices("EXPENSES_RECEIPTS_PATH"),
+        description="Local directory of the content-addressed receipt store.",
+    )
+    receipt_max_bytes: int = Field(
+        default=20 * 1024 * 1024,
+        ge=1,
+        validation_alias=AliasChoices("EXPENSES_RECEIPT_MAX_BYTES"),
+    )
 
     model_config = SettingsConfigDict(
         env_prefix="",
@@ -40,6 +119,20 @@ class Settings(BaseSettings):
     def db_url(self) -> str:
         return self.database_url.get_secret_value()
 
+    @property
+    def shard_db_urls(self) -> list[str]:
+        if self.shard_urls is None:
+            return [self.db_url]
+        urls = [url.strip() for url in self.shard_urls.get_secret_value().split(",")]
+        return [url for url in urls if url] or [self.db_url]
+
+    @property
+    def analytics_source_db_urls(self) -> list[str]:
+        if self.analytics_source_urls is None:
+            return []
+        urls = self.analytics_source_urls.get_secret_value().split(",")
+        return [url.strip() for url in urls if url.strip()]
+
     @property
     def jwt_secret(self) -> str:
         return self.jwt_secret_key.get_secret_value()
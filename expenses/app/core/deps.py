@@ -1,15 +1,28 @@
 from collections.abc import Generator
 
+from fastapi import Depends
 from sqlalchemy.orm import Session
 
+from app.core.auth import get_current_user_id
 from app.db.session import SessionLocal
+from app.db.sharding import session_for_user
 
 
-def get_db() -> Generator[Session, None, None]:
-    """FastAPI dependency that yields a database session per-request."""
-    db = SessionLocal()
+def get_db(
+    current_user_id: int = Depends(get_current_user_id),
+) -> Generator[Session, None, None]:
+    """FastAPI dependency that yields a session on the caller's shard per-request."""
+    db = session_for_user(current_user_id)
     try:
         yield db
     finally:
         db.close()
 
+
+def get_primary_db() -> Generator[Session, None, None]:
+    """Session on the primary database, for data shared between users."""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
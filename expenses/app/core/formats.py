@@ -0,0 +1,121 @@
+"""Response formats chosen by the ``Accept`` header.
+
+JSON is the default. ``Accept: application/msgpack`` turns every response
+built by :class:`NegotiatedResponse`, the app's default response class,
+into MessagePack with the same structure. The list and export endpoints
+also offer Arrow IPC streams (``application/vnd.apache.arrow.stream``) and
+build those themselves; see app.services.columnar.
+
+Response classes never see the request, so :class:`FormatMiddleware`
+negotiates once per request and leaves the result in a context variable.
+Errors stay JSON whatever was asked for.
+"""
+from collections.abc import Sequence
+from contextvars import ContextVar
+from typing import Any
+
+import msgpack
+import pyarrow as pa
+from fastapi.responses import JSONResponse, Response
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+_ALIASES = {"application/x-msgpack": MSGPACK, "application/vnd.msgpack": MSGPACK}
+
+_negotiated: ContextVar[str] = ContextVar("response_format", default=JSON)
+
+
+def preferred(accept: str | None, offered: Sequence[str]) -> str:
+    """The offered media type that ``accept`` ranks highest, or the first one offered.
+
+    Exact matches beat ``type/*``, which beats ``*/*``. Among equals the
+    earlier offer wins. Nothing acceptable also gets the first offer rather
+    than a 406.
+    """
+    weights: dict[str, float] = {}
+    for item in (accept or "").split(","):
+        media, *params = item.strip().lower().split(";")
+        weight = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        media = media.strip()
+        if media:
+            weights[_ALIASES.get(media, media)] = weight
+
+    best, best_rank = offered[0], (0.0,)
+    for position, media in enumerate(offered):
+        patterns = (media, f"{media.split('/')[0]}/*", "*/*")
+        for specificity, pattern in zip((2, 1, 0), patterns):
+            # The most specific range that matches decides, even with q=0.
+            if pattern in weights:
+                rank = (weights[pattern], specificity, -position)
+                if rank[0] > 0 and rank > best_rank:
+                    best, best_rank = media, rank
+                break
+    return best
+
+
+def negotiated() -> str:
+    """The format this request's responses are rendered in."""
+    return _negotiated.get()
+
+
+class NegotiatedResponse(JSONResponse):
+    """JSON, or MessagePack when the request asked for it."""
+
+    def __init__(
+        self,
+        content: Any,
+        status_code: int = 200,
+        headers: dict[str, str] | None = None,
+        media_type: str | None = None,
+        background=None,
+    ) -> None:
+        super().__init__(content, status_code, headers, media_type or negotiated(), background)
+        self.headers.add_vary_header("Accept")
+
+    def render(self, content: Any) -> bytes:
+        if self.media_type == MSGPACK:
+            return msgpack.packb(content)
+        return super().render(content)
+
+
+class ArrowResponse(Response):
+    """A table as one Arrow IPC stream."""
+
+    media_type = ARROW_STREAM
+
+    def __init__(self, content: pa.Table, status_code: int = 200, headers=None) -> None:
+        super().__init__(content, status_code, headers)
+        self.headers.add_vary_header("Accept")
+
+    def render(self, content: pa.Table) -> bytes:
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, content.schema) as writer:
+            writer.write_table(content)
+        return sink.getvalue().to_pybytes()
+
+
+class FormatMiddleware:
+    """Negotiate JSON or MessagePack for the rest of the request."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _negotiated.set(preferred(Headers(scope=scope).get("accept"), (JSON, MSGPACK)))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _negotiated.reset(token)
@@ -1,8 +1,20 @@
 from . import models  # noqa: F401 - ensure model registration
+from . import currency, partitions, search
 from .base import Base
-from .session import engine
+from .models import Expense
+from .session import engine, shard_engines
+from app.core.config import get_settings
 
 
 def init_db() -> None:
-    Base.metadata.create_all(bind=engine)
-
+    settings = get_settings()
+    for shard_engine in dict.fromkeys([engine, *shard_engines]):
+        with shard_engine.begin() as conn:
+            if partitions.is_supported(conn):
+                partitions.create_parent(conn, Expense.__table__)
+                partitions.ensure_partitions(conn, settings.partition_months_ahead)
+        Base.metadata.create_all(bind=shard_engine)
+        with shard_engine.begin() as conn:
+            search.install(conn)
+    with engine.begin() as conn:
+        currency.seed(conn)
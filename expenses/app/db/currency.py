@@ -0,0 +1,157 @@
+"""Conversion between decimal amounts and integer minor units.
+
+Expenses store ``amount_minor`` (cents for USD, yen for JPY, fils for BHD),
+so sums and groupings in the database are exact integer arithmetic. The
+number of minor digits per currency comes from ``currency_exponents`` on the
+primary database, is cached for the life of the process and defaults to
+:data:`DEFAULT_EXPONENT` for currencies it does not list.
+"""
+from decimal import ROUND_HALF_EVEN, Decimal
+import threading
+
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+
+from app.db.models.currency import CurrencyExponent
+
+DEFAULT_EXPONENT = 2
+# ISO 4217 currencies whose minor unit is not hundredths.
+ISO_EXPONENTS = {
+    "BHD": 3, "BIF": 0, "CLF": 4, "CLP": 0, "DJF": 0, "GNF": 0, "IQD": 3,
+    "ISK": 0, "JOD": 3, "JPY": 0, "KMF": 0, "KRW": 0, "KWD": 3, "LYD": 3,
+    "OMR": 3, "PYG": 0, "RWF": 0, "TND": 3, "UGX": 0, "UYI": 0, "UYW": 4,
+    "VND": 0, "VUV": 0, "XAF": 0, "XOF": 0, "XPF": 0,
+}
+
+class BelowMinorUnit(ValueError):
+    """A positive amount that rounds to zero in its currency's minor unit."""
+
+
+_exponents: dict[str, int] | None = None
+_lock = threading.Lock()
+
+
+def seed(conn: Connection) -> None:
+    """Insert :data:`ISO_EXPONENTS` into an empty ``currency_exponents`` table."""
+    table = CurrencyExponent.__table__
+    if conn.execute(select(table.c.currency).limit(1)).first() is None:
+        conn.execute(
+            table.insert(),
+            [{"currency": code, "exponent": value} for code, value in ISO_EXPONENTS.items()],
+        )
+
+
+def _load() -> dict[str, int]:
+    from app.db.session import engine
+
+    with engine.connect() as conn:
+        rows = conn.execute(select(CurrencyExponent.currency, CurrencyExponent.exponent)).all()
+    return {code.upper(): value for code, value in rows}
+
+
+def exponent(currency: str) -> int:
+    global _exponents
+    if _exponents is None:
+        with _lock:
+            if _exponents is None:
+                _exponents = _load()
+    return _exponents.get(currency.upper(), DEFAULT_EXPONENT)
+
+
+def invalidate() -> None:
+    global _exponents
+    with _lock:
+        _exponents = None
+
+
+def _quantize(amount: float | Decimal, digits: int) -> int:
+    minor = Decimal(str(amount)).scaleb(digits)
+    return int(minor.quantize(Decimal(1), rounding=ROUND_HALF_EVEN))
+
+
+def to_minor(amount: float | Decimal, currency: str) -> int:
+    """Round ``amount`` half-to-even to the currency's minor unit."""
+    return _quantize(amount, exponent(currency))
+
+
+def to_positive_minor(amount: float | Decimal, currency: str) -> int:
+    """:func:`to_minor`, raising :class:`BelowMinorUnit` unless the result is positive."""
+    minor = to_minor(amount, currency)
+    if minor <= 0:
+        raise BelowMinorUnit(f"amount {amount} rounds to zero in {currency.upper()}")
+    return minor
+
+
+def to_major(minor: int, currency: str) -> float:
+    return minor / 10 ** exponent(currency)
+
+
+def scales(currencies) -> np.ndarray:
+    """``10 ** exponent`` for every currency in ``currencies``, as float64."""
+    codes = np.asarray(currencies, dtype=object)
+    result = np.empty(len(codes))
+    for code in set(codes.tolist()):
+        result[codes == code] = 10.0 ** exponent(code)
+    return result
+
+
+# The float/integer pair of columns only coexists between the expand and
+# contract migrations, so the backfills below use a lightweight table.
+_expenses = sa.table(
+    "expenses",
+    sa.column("id", sa.Integer),
+    sa.column("amount", sa.Float),
+    sa.column("amount_minor", sa.BigInteger),
+    sa.column("currency", sa.String),
+)
+
+
+def _backfill(conn: Connection, source: str, target: str, convert, batch_size: int) -> int:
+    known = {
+        code.upper(): value
+        for code, value in conn.execute(
+            select(CurrencyExponent.currency, CurrencyExponent.exponent)
+        )
+    }
+    filled, last = 0, 0
+    while True:
+        rows = conn.execute(
+            select(_expenses.c.id, _expenses.c[source], _expenses.c.currency)
+            .where(
+                _expenses.c.id > last,
+                _expenses.c[target].is_(None),
+                _expenses.c[source].is_not(None),
+            )
+            .order_by(_expenses.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return filled
+        conn.execute(
+            _expenses.update()
+            .where(_expenses.c.id == sa.bindparam("row_id"))
+            .values({target: sa.bindparam("value")}),
+            [
+                {
+                    "row_id": row_id,
+                    "value": convert(value, known.get((code or "").upper(), DEFAULT_EXPONENT)),
+                }
+                for row_id, value, code in rows
+            ],
+        )
+        filled += len(rows)
+        last = rows[-1].id
+
+
+def backfill_minor(conn: Connection, batch_size: int = 10_000) -> int:
+    """Fill ``amount_minor`` from the legacy float ``amount``, in keyset batches."""
+    return _backfill(conn, "amount", "amount_minor", _quantize, batch_size)
+
+
+def backfill_major(conn: Connection, batch_size: int = 10_000) -> int:
+    """Fill the legacy float ``amount`` from ``amount_minor`` (for downgrades)."""
+    return _backfill(
+        conn, "amount_minor", "amount", lambda minor, digits: minor / 10**digits, batch_size
+    )
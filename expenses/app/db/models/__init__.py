@@ -1,2 +1,15 @@
+from .archive import ArchivedPeriod
+from .budget import Budget
+from .category import Category
+from .category_stats import CategoryAmountStats
+from .currency import CurrencyExponent
 from .expense import Expense
-
+from .forecast import ExpenseForecast
+from .fx import FxRate
+from .group import ExpenseGroup, GroupMember
+from .group_expense import GroupExpense, GroupExpenseSplit
+from .job import Job
+from .month_total import ExpenseMonthTotal
+from .receipt import ExpenseReceipt
+from .recurring import RecurringExpense
+from .tag import ExpenseTag
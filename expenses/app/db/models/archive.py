@@ -0,0 +1,23 @@
+from sqlalchemy import Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class ArchivedPeriod(Base):
+    """One Parquet file of a user's expenses for a calendar year in cold storage."""
+
+    __tablename__ = "expense_archive_periods"
+
+    user_id = Column(Integer, primary_key=True)
+    year = Column(Integer, primary_key=True)
+    path = Column(String(length=512), nullable=False)
+    row_count = Column(Integer, nullable=False)
+    first_created_at = Column(DateTime(timezone=True), nullable=False)
+    last_created_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
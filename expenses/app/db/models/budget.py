@@ -0,0 +1,18 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class Budget(Base):
+    """Monthly spending limit for one category in one currency."""
+
+    __tablename__ = "budgets"
+
+    user_id = Column(Integer, primary_key=True)
+    category_id = Column(Integer, primary_key=True)
+    currency = Column(String(length=3), primary_key=True)
+    limit_minor = Column(BigInteger, nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, UniqueConstraint
+
+from app.db.base import Base
+
+
+class Category(Base):
+    """Per-user category dictionary; ``id`` counts up from 1 for every user."""
+
+    __tablename__ = "categories"
+    __table_args__ = (UniqueConstraint("user_id", "name", name="uq_categories_user_id_name"),)
+
+    user_id = Column(Integer, primary_key=True)
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String(length=120), nullable=False)
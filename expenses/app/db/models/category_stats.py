@@ -0,0 +1,20 @@
+from sqlalchemy import Column, DateTime, Float, Integer, String
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class CategoryAmountStats(Base):
+    """Running count, mean and M2 (Welford) of log amounts per user and category."""
+
+    __tablename__ = "expense_category_stats"
+
+    user_id = Column(Integer, primary_key=True)
+    category_id = Column(Integer, primary_key=True)
+    currency = Column(String(length=3), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    mean = Column(Float, nullable=False, default=0.0)
+    m2 = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), onupdate=func.now()
+    )
@@ -0,0 +1,12 @@
+from sqlalchemy import Column, SmallInteger, String
+
+from app.db.base import Base
+
+
+class CurrencyExponent(Base):
+    """Number of minor-unit digits of a currency (2 for USD, 0 for JPY, 3 for BHD)."""
+
+    __tablename__ = "currency_exponents"
+
+    currency = Column(String(length=3), primary_key=True)
+    exponent = Column(SmallInteger, nullable=False)
@@ -1,16 +1,86 @@
-from sqlalchemy import Column, DateTime, Float, Integer, String
-from sqlalchemy.sql import func
+from sqlalchemy import (
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    String,
+    Text,
+    select,
+)
+from sqlalchemy.orm import column_property, foreign, relationship
+from sqlalchemy.sql import false, func
 
+from app.db import currency
 from app.db.base import Base
+from app.db.models.category import Category
+from app.db.models.receipt import ExpenseReceipt
+from app.db.models.tag import ExpenseTag
 
 
 class Expense(Base):
     __tablename__ = "expenses"
+    __table_args__ = (
+        Index("ix_expenses_user_id_created_at", "user_id", "created_at"),
+        Index("ix_expenses_user_id_fingerprint", "user_id", "fingerprint"),
+        # One expense per template occurrence, however often the materializer runs.
+        Index("uq_expenses_recurring_id_created_at", "recurring_id", "created_at", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, index=True, nullable=False)
-    category = Column(String(length=120), nullable=False)
-    amount = Column(Float, nullable=False)
+    # Key into the user's category dictionary; see app.services.categories.
+    category_id = Column(Integer, nullable=False)
+    # Integer minor units (cents); see app.db.currency.
+    amount_minor = Column(BigInteger, nullable=False)
     currency = Column(String(length=3), nullable=False, default="USD")
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Searchable free text; see app.db.search.
+    merchant = Column(String(length=120), nullable=True)
+    note = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    anomaly_score = Column(Float, nullable=True)
+    is_anomaly = Column(Boolean, nullable=False, default=False, server_default=false())
+    # Near-duplicate key, see app.services.dedupe.
+    fingerprint = Column(BigInteger, nullable=True)
+    # Template this expense was materialized from, see app.services.recurring.
+    recurring_id = Column(Integer, nullable=True)
+    # Optimistic concurrency: the ORM updates and deletes with ``WHERE version
+    # = <loaded>``; writers set the next value themselves, see update_expense.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    __mapper_args__ = {"version_id_col": version, "version_id_generator": False}
 
+    # Name looked up by primary key when expenses are loaded. Writers resolve
+    # names to ``category_id`` and may set the name on new objects as well.
+    category = column_property(
+        select(Category.name)
+        .where(Category.user_id == user_id, Category.id == category_id)
+        .correlate_except(Category)
+        .scalar_subquery()
+    )
+    tag_rows = relationship(
+        ExpenseTag,
+        primaryjoin=lambda: Expense.id == foreign(ExpenseTag.expense_id),
+        order_by=ExpenseTag.tag,
+        cascade="all, delete-orphan",
+        lazy="selectin",
+    )
+    # Loaded only when needed, e.g. to delete the links with the expense.
+    receipts = relationship(
+        ExpenseReceipt,
+        primaryjoin=lambda: Expense.id == foreign(ExpenseReceipt.expense_id),
+        order_by=ExpenseReceipt.created_at,
+        cascade="all, delete-orphan",
+    )
+
+    @property
+    def amount(self) -> float | None:
+        """Decimal amount in ``currency``, as exposed by the API."""
+        if self.amount_minor is None:
+            return None
+        return currency.to_major(self.amount_minor, self.currency or "USD")
+
+    @property
+    def tags(self) -> list[str]:
+        return [row.tag for row in self.tag_rows]
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Date, DateTime, Float, Integer, String
+
+from app.db.base import Base
+
+
+class ExpenseForecast(Base):
+    """Projected month-end spend per user and currency, written by the batch job."""
+
+    __tablename__ = "expense_forecasts"
+
+    user_id = Column(Integer, primary_key=True)
+    month = Column(Date, primary_key=True)
+    currency = Column(String(length=3), primary_key=True)
+    month_to_date = Column(Float, nullable=False)
+    projected_total = Column(Float, nullable=False)
+    daily_level = Column(Float, nullable=False)
+    computed_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Date, Float, String
+
+from app.db.base import Base
+
+
+class FxRate(Base):
+    """Value of one unit of ``currency`` in the base currency on ``day``.
+
+    Reference data shared by all users; it lives on the primary database.
+    """
+
+    __tablename__ = "fx_rates"
+
+    currency = Column(String(length=3), primary_key=True)
+    day = Column(Date, primary_key=True)
+    rate = Column(Float, nullable=False)
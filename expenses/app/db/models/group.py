@@ -0,0 +1,35 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class ExpenseGroup(Base):
+    """Friends or a team sharing costs in one currency.
+
+    Members may live on different shards, so groups and everything in them
+    are kept on the primary database.
+    """
+
+    __tablename__ = "expense_groups"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(length=120), nullable=False)
+    currency = Column(String(length=3), nullable=False)
+    created_by = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+
+class GroupMember(Base):
+    """Membership with the member's running net balance in the group.
+
+    ``balance_minor`` is what the group owes the member (negative: what the
+    member owes), updated with every shared expense and payment.
+    """
+
+    __tablename__ = "expense_group_members"
+
+    group_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, primary_key=True, index=True)
+    balance_minor = Column(BigInteger, nullable=False, default=0)
+    joined_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,42 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String
+from sqlalchemy.orm import foreign, relationship
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class GroupExpenseSplit(Base):
+    """One member's share of a group expense."""
+
+    __tablename__ = "expense_group_splits"
+
+    group_expense_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    share_minor = Column(BigInteger, nullable=False)
+
+
+class GroupExpense(Base):
+    """A cost paid by one member and split between members.
+
+    A ``payment`` settles a debt: the payer's whole amount is the
+    recipient's share.
+    """
+
+    __tablename__ = "expense_group_expenses"
+    __table_args__ = (Index("ix_expense_group_expenses_group_id_id", "group_id", "id"),)
+
+    id = Column(Integer, primary_key=True)
+    group_id = Column(Integer, nullable=False)
+    paid_by = Column(Integer, nullable=False)
+    amount_minor = Column(BigInteger, nullable=False)
+    description = Column(String(length=200), nullable=True)
+    kind = Column(String(length=16), nullable=False, default="expense")
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    splits = relationship(
+        GroupExpenseSplit,
+        primaryjoin=lambda: GroupExpense.id == foreign(GroupExpenseSplit.group_expense_id),
+        order_by=GroupExpenseSplit.user_id,
+        cascade="all, delete-orphan",
+        lazy="selectin",
+    )
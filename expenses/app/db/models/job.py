@@ -0,0 +1,43 @@
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, String, Text, text
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class Job(Base):
+    """Background work queued by a request and run by ``python -m app.cli.worker``.
+
+    Jobs live on the shard whose data they touch, so they are inserted in
+    the same transaction as the write that needs them; see app.services.jobs.
+    """
+
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers claim by status, then the most urgent and oldest first.
+        Index("ix_jobs_status_priority_run_at", "status", "priority", "run_at"),
+        # One queued job per kind and payload; enqueueing it again is a no-op.
+        Index(
+            "uq_jobs_queued_key",
+            "key",
+            unique=True,
+            postgresql_where=text("status = 'queued'"),
+            sqlite_where=text("status = 'queued'"),
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(length=64), nullable=False)
+    key = Column(String(length=255), nullable=False)
+    payload = Column(JSON, nullable=False)
+    # Higher runs first.
+    priority = Column(Integer, nullable=False, default=0)
+    # queued -> running -> deleted when done, or back to queued until
+    # ``max_attempts`` is used up, then failed.
+    status = Column(String(length=16), nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    locked_by = Column(String(length=120), nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,17 @@
+from sqlalchemy import BigInteger, Column, Date, Integer, String
+
+from app.db.base import Base
+
+
+class ExpenseMonthTotal(Base):
+    """Spend per user, category, currency and calendar month (UTC), kept current on every write."""
+
+    __tablename__ = "expense_month_totals"
+
+    user_id = Column(Integer, primary_key=True)
+    category_id = Column(Integer, primary_key=True)
+    currency = Column(String(length=3), primary_key=True)
+    # First day of the month.
+    month = Column(Date, primary_key=True)
+    total_minor = Column(BigInteger, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,23 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+
+class ExpenseReceipt(Base):
+    """Links an expense to a receipt file in the content-addressed store.
+
+    The file itself lives on disk under its SHA-256 digest and is shared by
+    every link with the same digest; see app.services.receipts. Rows outlive
+    archiving, so archived expenses keep their receipts.
+    """
+
+    __tablename__ = "expense_receipts"
+
+    expense_id = Column(Integer, primary_key=True)
+    sha256 = Column(String(length=64), primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    filename = Column(String(length=255), nullable=False)
+    content_type = Column(String(length=64), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
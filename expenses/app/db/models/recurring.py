@@ -0,0 +1,48 @@
+from sqlalchemy import BigInteger, Column, Date, DateTime, Index, Integer, String, Text, select
+from sqlalchemy.orm import column_property
+from sqlalchemy.sql import func
+
+from app.db import currency
+from app.db.base import Base
+from app.db.models.category import Category
+
+
+class RecurringExpense(Base):
+    """A template that becomes an expense every ``interval_months`` months.
+
+    ``next_run_at`` is the next occurrence not yet materialized, or ``NULL``
+    once ``ends_on`` has passed; see app.services.recurring.
+    """
+
+    __tablename__ = "recurring_expenses"
+    __table_args__ = (
+        Index("ix_recurring_expenses_next_run_at_id", "next_run_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, index=True, nullable=False)
+    category_id = Column(Integer, nullable=False)
+    amount_minor = Column(BigInteger, nullable=False)
+    currency = Column(String(length=3), nullable=False, default="USD")
+    merchant = Column(String(length=120), nullable=True)
+    note = Column(Text, nullable=True)
+    interval_months = Column(Integer, nullable=False, default=1)
+    # Clamped to the last day of shorter months.
+    day_of_month = Column(Integer, nullable=False)
+    starts_on = Column(Date, nullable=False)
+    ends_on = Column(Date, nullable=True)
+    next_run_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+    category = column_property(
+        select(Category.name)
+        .where(Category.user_id == user_id, Category.id == category_id)
+        .correlate_except(Category)
+        .scalar_subquery()
+    )
+
+    @property
+    def amount(self) -> float | None:
+        if self.amount_minor is None:
+            return None
+        return currency.to_major(self.amount_minor, self.currency or "USD")
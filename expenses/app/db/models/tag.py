@@ -0,0 +1,22 @@
+from sqlalchemy import Column, DateTime, Index, Integer, String
+
+from app.db.base import Base
+
+
+class ExpenseTag(Base):
+    """One tag on one expense; doubles as the inverted index from tag to expenses.
+
+    ``user_id`` and ``created_at`` are copied from the expense so tag filters
+    and the tag cloud are answered from ``ix_expense_tags_user_id_tag_created_at``
+    alone. Rows outlive archiving, so archived expenses stay tagged.
+    """
+
+    __tablename__ = "expense_tags"
+    __table_args__ = (
+        Index("ix_expense_tags_user_id_tag_created_at", "user_id", "tag", "created_at"),
+    )
+
+    expense_id = Column(Integer, primary_key=True)
+    tag = Column(String(length=64), primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,171 @@
+"""Monthly range partitioning of the ``expenses`` table on PostgreSQL.
+
+The parent table is partitioned by ``created_at`` with one partition per
+calendar month plus a default partition that catches rows outside the
+prepared range. Other dialects keep a plain table and every helper here is
+a no-op for them.
+"""
+from datetime import date, datetime, timezone
+
+from sqlalchemy import MetaData, PrimaryKeyConstraint, Table, inspect, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+PARENT_TABLE = "expenses"
+DEFAULT_PARTITION = "expenses_default"
+
+
+def is_supported(conn: Connection) -> bool:
+    return conn.dialect.name == "postgresql"
+
+
+def month_start(value: date | datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def partitioned_parent(table: Table) -> Table:
+    """Copy ``table`` with the primary key widened to include the partition key.
+
+    PostgreSQL requires every unique constraint on a partitioned table to
+    contain the partitioning columns, so the parent gets ``(id, created_at)``
+    while the ORM keeps treating ``id`` alone as the identity.
+    """
+    parent = table.to_metadata(MetaData())
+    parent.c.id.autoincrement = True
+    parent.c.created_at.primary_key = True
+    parent.append_constraint(PrimaryKeyConstraint(parent.c.id, parent.c.created_at))
+    parent.dialect_kwargs["postgresql_partition_by"] = "RANGE (created_at)"
+    return parent
+
+
+def is_partitioned(conn: Connection) -> bool:
+    return bool(
+        conn.execute(
+            text(
+                "SELECT 1 FROM pg_partitioned_table p "
+                "JOIN pg_class c ON c.oid = p.partrelid "
+                "WHERE c.relname = :name AND pg_table_is_visible(c.oid)"
+            ),
+            {"name": PARENT_TABLE},
+        ).scalar()
+    )
+
+
+def create_parent(conn: Connection, table: Table) -> bool:
+    """Create the partitioned parent and its default partition if missing."""
+    if inspect(conn).has_table(PARENT_TABLE):
+        return False
+    parent = partitioned_parent(table)
+    conn.execute(CreateTable(parent))
+    for index in parent.indexes:
+        conn.execute(CreateIndex(index))
+    conn.execute(
+        text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {PARENT_TABLE} DEFAULT")
+    )
+    return True
+
+
+def list_partitions(conn: Connection) -> list[tuple[str, date]]:
+    """Return ``(name, month)`` for every monthly partition, oldest first."""
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :name AND pg_table_is_visible(p.oid)"
+        ),
+        {"name": PARENT_TABLE},
+    ).scalars()
+    partitions = []
+    prefix = f"{PARENT_TABLE}_y"
+    for name in rows:
+        if not name.startswith(prefix):
+            continue
+        year, month = name[len(prefix):].split("m")
+        partitions.append((name, date(int(year), int(month), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def create_partition(conn: Connection, month: date) -> bool:
+    """Create the partition for ``month``; returns False if it already exists.
+
+    Rows that previously landed in the default partition for that month are
+    moved into the new partition, since PostgreSQL refuses to attach a range
+    that the default partition already holds rows for.
+    """
+    month = month_start(month)
+    name = partition_name(month)
+    if inspect(conn).has_table(name):
+        return False
+    bounds = {"lower": month, "upper": add_months(month, 1)}
+    ddl = (
+        f"CREATE TABLE {name} PARTITION OF {PARENT_TABLE} "
+        f"FOR VALUES FROM ('{bounds['lower'].isoformat()}') "
+        f"TO ('{bounds['upper'].isoformat()}')"
+    )
+    in_range = "created_at >= :lower AND created_at < :upper"
+    stray = conn.execute(
+        text(f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range} LIMIT 1"), bounds
+    ).scalar()
+    if not stray:
+        conn.execute(text(ddl))
+        return True
+
+    conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {DEFAULT_PARTITION}"))
+    conn.execute(text(ddl))
+    conn.execute(
+        text(f"INSERT INTO {name} SELECT * FROM {DEFAULT_PARTITION} WHERE {in_range}"),
+        bounds,
+    )
+    conn.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE {in_range}"), bounds)
+    conn.execute(
+        text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT")
+    )
+    return True
+
+
+def ensure_partitions(
+    conn: Connection,
+    months_ahead: int,
+    start: date | None = None,
+) -> list[str]:
+    """Pre-create monthly partitions from ``start`` until ``months_ahead`` from now.
+
+    ``start`` defaults to the current month. Returns the names of the
+    partitions that were created.
+    """
+    current = month_start(datetime.now(timezone.utc))
+    month = month_start(start) if start else current
+    last = add_months(current, months_ahead)
+    created = []
+    while month <= last:
+        if create_partition(conn, month):
+            created.append(partition_name(month))
+        month = add_months(month, 1)
+    return created
+
+
+def drop_partitions_before(conn: Connection, cutoff: date) -> list[str]:
+    """Detach and drop every monthly partition that ends on or before ``cutoff``.
+
+    This removes whole months as a catalog operation instead of a bulk
+    ``DELETE`` followed by vacuum.
+    """
+    cutoff = month_start(cutoff)
+    dropped = []
+    for name, month in list_partitions(conn):
+        if add_months(month, 1) > cutoff:
+            break
+        conn.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+        conn.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+    return dropped
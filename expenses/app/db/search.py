@@ -0,0 +1,109 @@
+"""Full-text search indexes over expense merchants and notes.
+
+PostgreSQL gets a GIN expression index over :data:`DOCUMENT` (merchant
+weighted above note) and, when ``pg_trgm`` can be installed, a trigram GIN
+index on ``merchant`` for typo-tolerant matches. With ``btree_gin`` both
+indexes lead with ``user_id``, so a search is answered for one user from
+the index alone. SQLite gets an FTS5 table, ``expenses_fts``, that indexes
+``expenses`` as external content and is kept in sync by triggers. Other
+dialects have no search indexes.
+
+SQLite drops triggers when a migration rebuilds ``expenses`` through
+``batch_alter_table``, so such migrations must call :func:`install` again.
+"""
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+# Must match the query text exactly for PostgreSQL to use the expression index.
+DOCUMENT = (
+    "(setweight(to_tsvector('english'::regconfig, coalesce(merchant, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(note, '')), 'B'))"
+)
+FTS_TABLE = "expenses_fts"
+_PG_INDEXES = ("ix_expenses_search_document", "ix_expenses_merchant_trgm")
+_SQLITE_TRIGGERS = {
+    "expenses_fts_insert": """
+        CREATE TRIGGER IF NOT EXISTS expenses_fts_insert AFTER INSERT ON expenses BEGIN
+            INSERT INTO expenses_fts (rowid, merchant, note, user_id)
+            VALUES (new.id, new.merchant, new.note, new.user_id);
+        END
+    """,
+    "expenses_fts_delete": """
+        CREATE TRIGGER IF NOT EXISTS expenses_fts_delete AFTER DELETE ON expenses BEGIN
+            INSERT INTO expenses_fts (expenses_fts, rowid, merchant, note, user_id)
+            VALUES ('delete', old.id, old.merchant, old.note, old.user_id);
+        END
+    """,
+    "expenses_fts_update": """
+        CREATE TRIGGER IF NOT EXISTS expenses_fts_update
+        AFTER UPDATE OF merchant, note, user_id ON expenses BEGIN
+            INSERT INTO expenses_fts (expenses_fts, rowid, merchant, note, user_id)
+            VALUES ('delete', old.id, old.merchant, old.note, old.user_id);
+            INSERT INTO expenses_fts (rowid, merchant, note, user_id)
+            VALUES (new.id, new.merchant, new.note, new.user_id);
+        END
+    """,
+}
+
+
+def _pg_extensions(conn: Connection, names: tuple[str, ...]) -> set[str]:
+    """Install whichever of ``names`` the server offers; return the installed ones."""
+    available = set(
+        conn.execute(
+            text("SELECT name FROM pg_available_extensions WHERE name = ANY(:names)"),
+            {"names": list(names)},
+        ).scalars()
+    )
+    for name in sorted(available):
+        conn.execute(text(f"CREATE EXTENSION IF NOT EXISTS {name}"))
+    return available
+
+
+def has_trigram(conn: Connection) -> bool:
+    """Whether ``pg_trgm`` is installed, i.e. fuzzy merchant matching is available."""
+    return conn.dialect.name == "postgresql" and bool(
+        conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).scalar()
+    )
+
+
+def install(conn: Connection) -> None:
+    """Create the search indexes (and fill them) if they are missing."""
+    if conn.dialect.name == "postgresql":
+        extensions = _pg_extensions(conn, ("btree_gin", "pg_trgm"))
+        owner = "user_id, " if "btree_gin" in extensions else ""
+        conn.execute(
+            text(
+                "CREATE INDEX IF NOT EXISTS ix_expenses_search_document "
+                f"ON expenses USING gin ({owner}{DOCUMENT})"
+            )
+        )
+        if "pg_trgm" in extensions:
+            conn.execute(
+                text(
+                    "CREATE INDEX IF NOT EXISTS ix_expenses_merchant_trgm "
+                    f"ON expenses USING gin ({owner}merchant gin_trgm_ops)"
+                )
+            )
+    elif conn.dialect.name == "sqlite":
+        created = not inspect(conn).has_table(FTS_TABLE)
+        conn.execute(
+            text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                "merchant, note, user_id UNINDEXED, "
+                "content='expenses', content_rowid='id', tokenize='porter unicode61')"
+            )
+        )
+        for statement in _SQLITE_TRIGGERS.values():
+            conn.execute(text(statement))
+        if created:
+            conn.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def uninstall(conn: Connection) -> None:
+    if conn.dialect.name == "postgresql":
+        for index in _PG_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+    elif conn.dialect.name == "sqlite":
+        for trigger in _SQLITE_TRIGGERS:
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {FTS_TABLE}"))
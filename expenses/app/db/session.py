@@ -5,3 +5,13 @@ from app.core.config import get_settings
 settings = get_settings()
 engine = create_engine(settings.db_url)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+# One engine per shard; a shard that points at the primary reuses its engine.
+shard_engines = [
+    engine if url == settings.db_url else create_engine(url)
+    for url in settings.shard_db_urls
+]
+ShardSessions = [
+    sessionmaker(bind=shard_engine, autocommit=False, autoflush=False)
+    for shard_engine in shard_engines
+]
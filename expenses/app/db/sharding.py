@@ -0,0 +1,53 @@
+"""Route per-user data to one of several databases by a hash of the user id.
+
+Every expense query is scoped to a single user, so a request only ever
+touches the shard that owns its caller. Cross-shard work (admin scans,
+batch jobs) goes through :func:`fan_out`.
+"""
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import hashlib
+from typing import TypeVar
+
+from sqlalchemy.orm import Session
+
+from app.db.session import ShardSessions
+
+T = TypeVar("T")
+
+
+def shard_index(user_id: int, shard_count: int | None = None) -> int:
+    """Return ``hash(user_id) % shard_count`` using a process-stable hash."""
+    count = len(ShardSessions) if shard_count is None else shard_count
+    digest = hashlib.blake2b(str(user_id).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+
+def session_for_user(user_id: int) -> Session:
+    return ShardSessions[shard_index(user_id)]()
+
+
+@contextmanager
+def shard_session(index: int) -> Iterator[Session]:
+    db = ShardSessions[index]()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def fan_out(
+    fn: Callable[[Session], T],
+    max_workers: int | None = None,
+) -> list[T]:
+    """Run ``fn`` against every shard in parallel and return results in shard order."""
+
+    def run(index: int) -> T:
+        with shard_session(index) as db:
+            return fn(db)
+
+    if len(ShardSessions) == 1:
+        return [run(0)]
+    with ThreadPoolExecutor(max_workers=max_workers or len(ShardSessions)) as pool:
+        return list(pool.map(run, range(len(ShardSessions))))
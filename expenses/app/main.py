@@ -1,16 +1,28 @@
 from fastapi import FastAPI
 
+from app.api import groups, reports
 from app.api.routes import router
+from app.core.compression import CompressionMiddleware
+from app.core.formats import FormatMiddleware, NegotiatedResponse
 from app.db import init_db
 
 
 def create_app() -> FastAPI:
-    application = FastAPI(title="Expenses Service", version="0.1.0")
+    application = FastAPI(
+        title="Expenses Service",
+        version="0.1.0",
+        default_response_class=NegotiatedResponse,
+    )
+
+    application.add_middleware(FormatMiddleware)
+    application.add_middleware(CompressionMiddleware)
 
     @application.on_event("startup")
     def on_startup() -> None:
         init_db()
 
+    application.include_router(groups.router)
+    application.include_router(reports.router)
     application.include_router(router)
     return application
 
@@ -1,4 +1,22 @@
-from .exp import ExpenseBase, ExpenseCreate, ExpenseRead, ExpenseUpdate
-
-__all__ = ["ExpenseBase", "ExpenseCreate", "ExpenseRead", "ExpenseUpdate"]
+from .exp import (
+    ExpenseBase,
+    ExpenseCreate,
+    ExpenseImport,
+    ExpenseRead,
+    ExpenseSearchHit,
+    ExpenseUpdate,
+    ExpenseWriteResult,
+)
+from .summary import CategoryTotal, ExpenseSummary
 
+__all__ = [
+    "ExpenseBase",
+    "ExpenseCreate",
+    "ExpenseImport",
+    "ExpenseRead",
+    "ExpenseSearchHit",
+    "ExpenseUpdate",
+    "ExpenseWriteResult",
+    "CategoryTotal",
+    "ExpenseSummary",
+]
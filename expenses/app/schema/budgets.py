@@ -0,0 +1,26 @@
+from datetime import date
+
+from pydantic import BaseModel, Field, model_validator
+
+from app.db.currency import to_positive_minor
+
+
+class BudgetSet(BaseModel):
+    category: str = Field(max_length=120, description="Expense category")
+    currency: str = Field(default="USD", max_length=3, description="Only expenses in this currency count")
+    limit: float = Field(gt=0, description="Monthly spending limit")
+
+    @model_validator(mode="after")
+    def _limit_has_minor_units(self) -> "BudgetSet":
+        to_positive_minor(self.limit, self.currency)
+        return self
+
+
+class BudgetStatus(BaseModel):
+    category: str
+    currency: str = Field(description="Currency code (ISO 4217)")
+    month: date = Field(description="First day of the (UTC) month")
+    limit: float
+    spent: float = Field(description="Month-to-date spend in this category and currency")
+    remaining: float = Field(description="Negative once the budget is exceeded")
+    over_budget: bool
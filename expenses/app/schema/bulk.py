@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class ExpenseBulkChange(BaseModel):
+    id: int
+    amount: float | None = Field(default=None, gt=0, description="Expense amount")
+    currency: str | None = Field(default=None, max_length=3, description="Currency code")
+    category: str | None = Field(default=None, max_length=120, description="Expense category")
+    merchant: str | None = Field(default=None, max_length=120, description="Merchant")
+    note: str | None = Field(default=None, max_length=2000, description="Free-text note")
+    version: int | None = Field(
+        default=None, description="Fail the whole batch unless the expense is at this version"
+    )
+
+
+class ExpenseBulkDelete(BaseModel):
+    ids: list[int] | None = Field(default=None, max_length=10000, description="Expenses to delete")
+    start: datetime | None = Field(default=None, description="Only expenses created at or after")
+    end: datetime | None = Field(default=None, description="Only expenses created before")
+    category: str | None = Field(default=None, max_length=120)
+    merchant: str | None = Field(default=None, max_length=120)
+
+
+class BulkResult(BaseModel):
+    affected: int = Field(description="Expenses updated or deleted")
@@ -1,29 +1,78 @@
 from datetime import datetime
-from pydantic import BaseModel, Field
+from typing import Annotated
+
+from pydantic import BaseModel, Field, model_validator
+
+from app.db.currency import to_positive_minor
+
+from .budgets import BudgetStatus
+
+Tag = Annotated[str, Field(min_length=1, max_length=64)]
 
 
 class ExpenseBase(BaseModel):
     amount: float = Field(gt=0, description="Expense amount must be positive")
     currency: str = Field(default="USD", max_length=3, description="Currency code (ISO 4217)")
     category: str = Field(default="other", max_length=120, description="Expense category")
+    tags: list[Tag] = Field(
+        default_factory=list, max_length=20, description="Free-form tags, matched case-insensitively"
+    )
+    merchant: str | None = Field(default=None, max_length=120, description="Where the money went")
+    note: str | None = Field(default=None, max_length=2000, description="Free-text note")
 
 
 class ExpenseCreate(ExpenseBase):
-    pass
+    @model_validator(mode="after")
+    def _amount_has_minor_units(self) -> "ExpenseCreate":
+        to_positive_minor(self.amount, self.currency)
+        return self
+
+
+class ExpenseImport(ExpenseCreate):
+    created_at: datetime | None = Field(
+        default=None, description="When the expense happened; defaults to now"
+    )
 
 
 class ExpenseUpdate(BaseModel):
     amount: float | None = Field(default=None, gt=0, description="Expense amount")
     currency: str | None = Field(default=None, max_length=3, description="Currency code")
     category: str | None = Field(default=None, max_length=120, description="Expense category")
+    tags: list[Tag] | None = Field(default=None, max_length=20, description="Replaces all tags")
+    merchant: str | None = Field(default=None, max_length=120, description="Merchant")
+    note: str | None = Field(default=None, max_length=2000, description="Free-text note")
+    version: int | None = Field(
+        default=None,
+        description="Only update if the expense is still at this version; same as If-Match",
+    )
 
 
 class ExpenseRead(ExpenseBase):
     id: int
     user_id: int
     created_at: datetime
+    anomaly_score: float | None = Field(
+        default=None,
+        description="Z-score of the log amount against the user's history in this category",
+    )
+    is_anomaly: bool = False
+    recurring_id: int | None = Field(
+        default=None, description="Recurring template this expense was created from"
+    )
+    version: int = Field(default=1, description="Bumped by every update; also sent as the ETag")
 
     model_config = {
         "from_attributes": True
     }
 
+
+class ExpenseWriteResult(ExpenseRead):
+    budget: BudgetStatus | None = Field(
+        default=None,
+        description="Month-to-date status of the budget this expense counts against, if any",
+    )
+
+
+class ExpenseSearchHit(ExpenseRead):
+    rank: float = Field(description="Relevance; higher is better")
+
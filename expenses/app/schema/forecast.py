@@ -0,0 +1,19 @@
+from datetime import date, datetime
+
+from pydantic import BaseModel, Field
+
+
+class CurrencyForecast(BaseModel):
+    currency: str = Field(description="Currency code (ISO 4217)")
+    month_to_date: float
+    projected_total: float = Field(description="Projected spend at the end of the month")
+    computed_at: datetime
+
+    model_config = {
+        "from_attributes": True
+    }
+
+
+class ExpenseForecastRead(BaseModel):
+    month: date
+    forecasts: list[CurrencyForecast]
@@ -0,0 +1,74 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class GroupCreate(BaseModel):
+    name: str = Field(min_length=1, max_length=120)
+    currency: str = Field(default="USD", max_length=3, description="Currency of every shared expense")
+    members: list[int] = Field(
+        default_factory=list, max_length=1000, description="User ids to add besides the creator"
+    )
+
+
+class GroupMemberAdd(BaseModel):
+    user_id: int
+
+
+class MemberBalance(BaseModel):
+    user_id: int
+    balance: float = Field(description="Owed to the member if positive, owed by the member if negative")
+
+
+class GroupRead(BaseModel):
+    id: int
+    name: str
+    currency: str
+    created_by: int
+    created_at: datetime
+    members: list[MemberBalance]
+
+
+class GroupExpenseCreate(BaseModel):
+    amount: float = Field(gt=0)
+    description: str | None = Field(default=None, max_length=200)
+    paid_by: int | None = Field(default=None, description="Member who paid; defaults to the caller")
+    shares: dict[int, float] | None = Field(
+        default=None, description="Exact share per member id; must add up to the amount"
+    )
+    split_between: list[int] | None = Field(
+        default=None, description="Split equally between these members; defaults to everyone"
+    )
+
+
+class Share(BaseModel):
+    user_id: int
+    amount: float
+
+
+class GroupExpenseRead(BaseModel):
+    id: int
+    group_id: int
+    paid_by: int
+    amount: float
+    description: str | None = None
+    kind: str = Field(description="expense or payment")
+    created_at: datetime
+    shares: list[Share]
+
+
+class PaymentCreate(BaseModel):
+    to_user_id: int
+    amount: float = Field(gt=0)
+
+
+class Transfer(BaseModel):
+    from_user_id: int
+    to_user_id: int
+    amount: float
+
+
+class Settlement(BaseModel):
+    group_id: int
+    currency: str
+    transfers: list[Transfer] = Field(description="Payments that bring every balance to zero")
@@ -0,0 +1,16 @@
+from pydantic import BaseModel, Field
+
+from app.schema.exp import ExpenseRead
+
+
+class DuplicateExpense(BaseModel):
+    index: int = Field(description="Position of the skipped item in the request")
+    duplicate_of: int | None = Field(default=None, description="ID of the stored expense it repeats")
+    duplicate_of_index: int | None = Field(
+        default=None, description="Position of an earlier item in the same request it repeats"
+    )
+
+
+class ImportResult(BaseModel):
+    created: list[ExpenseRead]
+    duplicates: list[DuplicateExpense]
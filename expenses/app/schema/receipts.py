@@ -0,0 +1,16 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class ReceiptRead(BaseModel):
+    expense_id: int
+    sha256: str = Field(description="Hex SHA-256 of the file; also its download key and ETag")
+    filename: str
+    content_type: str
+    size: int = Field(description="File size in bytes")
+    created_at: datetime
+
+    model_config = {
+        "from_attributes": True
+    }
@@ -0,0 +1,50 @@
+from datetime import date, datetime
+
+from pydantic import BaseModel, Field, model_validator
+
+from app.db.currency import to_positive_minor
+
+
+class RecurringExpenseCreate(BaseModel):
+    amount: float = Field(gt=0, description="Amount of every occurrence")
+    currency: str = Field(default="USD", max_length=3, description="Currency code (ISO 4217)")
+    category: str = Field(default="other", max_length=120, description="Expense category")
+    merchant: str | None = Field(default=None, max_length=120, description="Where the money goes")
+    note: str | None = Field(default=None, max_length=2000, description="Free-text note")
+    interval_months: int = Field(default=1, ge=1, le=120, description="1 = monthly, 12 = yearly")
+    day_of_month: int | None = Field(
+        default=None,
+        ge=1,
+        le=31,
+        description="Defaults to the day of starts_on; clamped to the end of shorter months",
+    )
+    starts_on: date = Field(description="No occurrence falls before this date")
+    ends_on: date | None = Field(default=None, description="Last date an occurrence may fall on")
+
+    @model_validator(mode="after")
+    def _amount_has_minor_units(self) -> "RecurringExpenseCreate":
+        to_positive_minor(self.amount, self.currency)
+        return self
+
+
+class RecurringExpenseRead(BaseModel):
+    id: int
+    user_id: int
+    amount: float
+    currency: str
+    category: str
+    merchant: str | None = None
+    note: str | None = None
+    interval_months: int
+    day_of_month: int
+    starts_on: date
+    ends_on: date | None = None
+    next_run_at: datetime | None = Field(
+        default=None, description="Next occurrence to be created; null once the template has ended"
+    )
+    created_at: datetime
+
+    model_config = {
+        "from_attributes": True
+    }
+
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class SnapshotReport(BaseModel):
+    snapshot_at: datetime = Field(description="When the analytics snapshot was refreshed")
+
+
+class YearTotal(BaseModel):
+    year: int
+    currency: str
+    count: int
+    total: float
+    change_pct: float | None = Field(
+        default=None, description="Change against the previous year in the same currency"
+    )
+
+
+class YearOverYearReport(SnapshotReport):
+    years: list[YearTotal]
+
+
+class CategoryYearTotals(BaseModel):
+    category: str
+    currency: str
+    totals: list[float] = Field(description="One total per entry in `years`")
+
+
+class CategoryPivotReport(SnapshotReport):
+    years: list[int]
+    categories: list[CategoryYearTotals]
+
+
+class CategoryPercentiles(BaseModel):
+    category: str
+    currency: str
+    count: int
+    values: dict[str, float] = Field(description="Amount at each requested quantile")
+
+
+class PercentileReport(SnapshotReport):
+    quantiles: list[float]
+    categories: list[CategoryPercentiles]
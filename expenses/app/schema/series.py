@@ -0,0 +1,20 @@
+from datetime import date, datetime
+
+from pydantic import BaseModel, Field
+
+
+class SeriesLine(BaseModel):
+    currency: str = Field(description="Currency code (ISO 4217)")
+    count: list[int] = Field(description="Expenses per bucket, parallel to buckets")
+    total: list[float] = Field(description="Amount spent per bucket, parallel to buckets")
+    cumulative: list[float] | None = Field(
+        default=None, description="Running total up to and including each bucket"
+    )
+
+
+class ExpenseSeries(BaseModel):
+    interval: str
+    start: datetime
+    end: datetime
+    buckets: list[date] = Field(description="First UTC day of every bucket")
+    series: list[SeriesLine] = Field(description="One line per currency spent in the range")
@@ -0,0 +1,44 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+from app.schema.summary import Interval
+
+
+class AmountHistogram(BaseModel):
+    edges: list[float] = Field(description="Log-spaced bin edges, one more than `counts`")
+    counts: list[int]
+
+
+class CategoryStatistics(BaseModel):
+    category: str
+    currency: str = Field(description="Currency code (ISO 4217)")
+    count: int
+    total: float
+    mean: float
+    median: float
+    p90: float
+    p99: float
+    std: float = Field(description="Sample standard deviation")
+    min: float = Field(description="Smallest amount; of the sample when approximate")
+    max: float = Field(description="Largest amount; of the sample when approximate")
+    first_at: datetime
+    last_at: datetime
+    histogram: AmountHistogram
+    intervals: dict[str, Interval] | None = Field(
+        default=None,
+        description="95% confidence intervals of the estimated fields, by field name; "
+        "only in approximate results",
+    )
+
+
+class ExpenseStatistics(BaseModel):
+    start: datetime | None = None
+    end: datetime | None = None
+    categories: list[CategoryStatistics]
+    approximate: bool = Field(
+        default=False, description="Figures were estimated from a random sample"
+    )
+    sample_size: int | None = Field(
+        default=None, description="Rows in the sample behind an approximate result"
+    )
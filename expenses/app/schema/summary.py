@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+
+class Interval(BaseModel):
+    low: float
+    high: float
+
+
+class CategoryTotal(BaseModel):
+    category: str
+    currency: str = Field(description="Currency code (ISO 4217)")
+    count: int
+    total: float
+    intervals: dict[str, Interval] | None = Field(
+        default=None,
+        description="95% confidence intervals of the estimated fields, by field name; "
+        "only in approximate results",
+    )
+
+
+class ExpenseSummary(BaseModel):
+    start: datetime | None = None
+    end: datetime | None = None
+    currency: str | None = Field(
+        default=None, description="Reporting currency all totals were converted into"
+    )
+    count: int
+    categories: list[CategoryTotal]
+    approximate: bool = Field(
+        default=False, description="Per-category figures were estimated from a random sample"
+    )
+    sample_size: int | None = Field(
+        default=None, description="Rows in the sample behind an approximate result"
+    )
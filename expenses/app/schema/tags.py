@@ -0,0 +1,14 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class TagCount(BaseModel):
+    tag: str
+    count: int
+
+
+class TagCloud(BaseModel):
+    start: datetime | None = None
+    end: datetime | None = None
+    tags: list[TagCount]
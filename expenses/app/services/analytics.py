@@ -0,0 +1,215 @@
+"""Columnar DuckDB snapshot of all expenses for heavy reports.
+
+:func:`refresh_snapshot` copies every shard (or the configured read
+replicas) plus the Parquet archive into a fresh DuckDB file and swaps it in
+atomically. Report queries only ever read that file, so multi-year scans
+never reach the OLTP databases, and each result carries the snapshot's
+``refreshed_at`` so clients can judge freshness. Point
+``EXPENSES_ANALYTICS_SOURCE_URLS`` at replicas to keep the refresh itself
+off the primaries as well.
+"""
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import os
+
+import duckdb
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+from app.db.session import shard_engines
+from app.services import archive
+
+_LOAD_BATCH = 50_000
+_CREATE_TABLE = """
+CREATE TABLE expenses (
+    id BIGINT,
+    user_id BIGINT,
+    category VARCHAR,
+    amount DOUBLE,
+    currency VARCHAR,
+    created_at TIMESTAMP,
+    merchant VARCHAR,
+    note VARCHAR
+)
+"""
+
+
+class SnapshotUnavailable(RuntimeError):
+    """Raised when no analytics snapshot has been built yet."""
+
+
+def _snapshot_path() -> str:
+    return os.path.abspath(get_settings().analytics_path)
+
+
+def _source_engines() -> list[Engine]:
+    urls = get_settings().analytics_source_db_urls
+    if not urls:
+        return shard_engines
+    return [create_engine(url) for url in urls]
+
+
+def _load_database(conn: duckdb.DuckDBPyConnection, engine: Engine) -> None:
+    with engine.connect() as source:
+        result = source.execution_options(stream_results=True, yield_per=_LOAD_BATCH).execute(
+            archive.hot_select()
+        )
+        for rows in result.partitions():
+            batch = archive.to_arrow(rows)
+            conn.register("batch", batch)
+            conn.execute("INSERT INTO expenses SELECT * FROM batch")
+            conn.unregister("batch")
+
+
+def _load_archive(conn: duckdb.DuckDBPyConnection) -> None:
+    if not get_settings().archive_uri:
+        return
+    filesystem, base = archive.archive_filesystem()
+    if filesystem.get_file_info(base).type == pafs.FileType.NotFound:
+        return
+    dataset = ds.dataset(
+        base,
+        filesystem=filesystem,
+        format="parquet",
+        schema=archive.ARCHIVE_SCHEMA,
+        exclude_invalid_files=True,
+    )
+    conn.register("archived", dataset)
+    # Skip rows an interrupted archive run left in both places.
+    conn.execute(
+        "INSERT INTO expenses SELECT * FROM archived a WHERE NOT EXISTS "
+        "(SELECT 1 FROM expenses e WHERE e.id = a.id AND e.user_id = a.user_id)"
+    )
+    conn.unregister("archived")
+
+
+def refresh_snapshot() -> datetime:
+    """Rebuild the snapshot next to the current one and atomically replace it."""
+    path = _snapshot_path()
+    staging = f"{path}.{os.getpid()}.tmp"
+    if os.path.exists(staging):
+        os.remove(staging)
+    refreshed_at = datetime.now(timezone.utc)
+
+    conn = duckdb.connect(staging)
+    try:
+        conn.execute(_CREATE_TABLE)
+        for engine in _source_engines():
+            _load_database(conn, engine)
+        _load_archive(conn)
+        conn.execute(
+            "CREATE TABLE snapshot_meta AS SELECT ?::TIMESTAMP AS refreshed_at, "
+            "(SELECT count(*) FROM expenses) AS row_count",
+            [refreshed_at.replace(tzinfo=None)],
+        )
+        conn.execute("CHECKPOINT")
+    finally:
+        conn.close()
+    os.replace(staging, path)
+    return refreshed_at
+
+
+@contextmanager
+def snapshot() -> Iterator[tuple[duckdb.DuckDBPyConnection, datetime]]:
+    """Open the current snapshot read-only and yield it with its refresh time."""
+    path = _snapshot_path()
+    if not os.path.exists(path):
+        raise SnapshotUnavailable("analytics snapshot has not been built yet")
+    conn = duckdb.connect(path, read_only=True)
+    try:
+        (refreshed_at,) = conn.execute("SELECT refreshed_at FROM snapshot_meta").fetchone()
+        yield conn, refreshed_at.replace(tzinfo=timezone.utc)
+    finally:
+        conn.close()
+
+
+def year_over_year(user_id: int) -> tuple[datetime, list[tuple]]:
+    """``(year, currency, count, total, change_pct)`` rows, oldest year first."""
+    with snapshot() as (conn, refreshed_at):
+        rows = conn.execute(
+            """
+            SELECT year, currency, count, total,
+                   round(100 * (total / lag(total) OVER w - 1), 2) AS change_pct
+            FROM (
+                SELECT year(created_at) AS year, currency,
+                       count(*) AS count, round(sum(amount), 2) AS total
+                FROM expenses
+                WHERE user_id = ?
+                GROUP BY ALL
+            )
+            WINDOW w AS (PARTITION BY currency ORDER BY year)
+            ORDER BY year, currency
+            """,
+            [user_id],
+        ).fetchall()
+    return refreshed_at, rows
+
+
+def category_pivot(
+    user_id: int,
+    first_year: int,
+    last_year: int,
+) -> tuple[datetime, list[int], list[tuple]]:
+    """Category x year totals; each row is ``(category, currency, [total per year])``."""
+    years = list(range(first_year, last_year + 1))
+    with snapshot() as (conn, refreshed_at):
+        rows = conn.execute(
+            """
+            SELECT category, currency,
+                   list(coalesce(total, 0) ORDER BY year) AS totals
+            FROM (
+                SELECT c.category, c.currency, y.year, t.total
+                FROM (
+                    SELECT DISTINCT category, currency FROM expenses
+                    WHERE user_id = ? AND year(created_at) BETWEEN ? AND ?
+                ) c
+                CROSS JOIN range(?, ? + 1) y(year)
+                LEFT JOIN (
+                    SELECT category, currency, year(created_at) AS year,
+                           round(sum(amount), 2) AS total
+                    FROM expenses
+                    WHERE user_id = ? AND year(created_at) BETWEEN ? AND ?
+                    GROUP BY ALL
+                ) t USING (category, currency, year)
+            )
+            GROUP BY category, currency
+            ORDER BY category, currency
+            """,
+            [user_id, first_year, last_year, first_year, last_year,
+             user_id, first_year, last_year],
+        ).fetchall()
+    return refreshed_at, years, rows
+
+
+def percentiles(
+    user_id: int,
+    quantiles: list[float],
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> tuple[datetime, list[tuple]]:
+    """``(category, currency, count, [value per quantile])`` rows."""
+    bounds = ""
+    params: list = [quantiles, user_id]
+    if start is not None:
+        bounds += " AND created_at >= ?"
+        params.append(archive.as_utc(start).replace(tzinfo=None))
+    if end is not None:
+        bounds += " AND created_at < ?"
+        params.append(archive.as_utc(end).replace(tzinfo=None))
+    with snapshot() as (conn, refreshed_at):
+        rows = conn.execute(
+            f"""
+            SELECT category, currency, count(*) AS count,
+                   quantile_cont(amount, ?::DOUBLE[]) AS values
+            FROM expenses
+            WHERE user_id = ?{bounds}
+            GROUP BY ALL
+            ORDER BY category, currency
+            """,
+            params,
+        ).fetchall()
+    return refreshed_at, rows
@@ -0,0 +1,267 @@
+"""Write-time anomaly scoring from running per-category statistics.
+
+Every (user, category id, currency) keeps the count, mean and M2 of its log
+amounts in ``expense_category_stats``. A new expense is scored against
+those three numbers and then folded in with Welford's update, so a write
+costs one keyed row lock instead of a history scan. Amounts are compared on
+a log scale, where "ten times the usual" is the same distance whatever the
+usual amount is. Occurrences of recurring templates are expected by
+construction: they are never scored and stay out of the statistics, so
+editing or deleting one leaves the history of real expenses alone.
+:func:`rescore` rebuilds the statistics and every stored
+score in one vectorized pass, for backfills and threshold changes.
+"""
+from datetime import datetime, timezone
+import math
+
+import numpy as np
+from sqlalchemy import bindparam, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.currency import scales
+from app.db.models import CategoryAmountStats, Expense
+
+# Floor for the log-amount standard deviation, so a category that has always
+# cost exactly the same does not flag a few cents of difference.
+MIN_STD = 0.25
+_USER_BATCH = 500
+_WRITE_BATCH = 5000
+
+
+def _in_history(expense: Expense) -> bool:
+    return expense.recurring_id is None
+
+
+def _stats_for(db: Session, expense: Expense) -> CategoryAmountStats | None:
+    return db.get(
+        CategoryAmountStats,
+        (expense.user_id, expense.category_id, expense.currency),
+        with_for_update=True,
+    )
+
+
+def score(stats: CategoryAmountStats | None, amount: float) -> float | None:
+    """Z-score of ``log(amount)``, or ``None`` while the history is too short.
+
+    Non-positive amounts have no logarithm and are never scored.
+    """
+    if amount <= 0 or stats is None or stats.count < get_settings().anomaly_min_history:
+        return None
+    std = max(math.sqrt(stats.m2 / (stats.count - 1)), MIN_STD)
+    return (math.log(amount) - stats.mean) / std
+
+
+def _new_stats(db: Session, expense: Expense) -> CategoryAmountStats:
+    stats = CategoryAmountStats(
+        user_id=expense.user_id,
+        category_id=expense.category_id,
+        currency=expense.currency,
+        count=0,
+        mean=0.0,
+        m2=0.0,
+    )
+    db.add(stats)
+    # Make the row visible to the next lookup in this session (bulk imports).
+    db.flush()
+    return stats
+
+
+def _observe(stats: CategoryAmountStats, expense: Expense) -> None:
+    z = score(stats, expense.amount)
+    expense.anomaly_score = None if z is None else round(z, 4)
+    expense.is_anomaly = z is not None and z > get_settings().anomaly_threshold
+    if expense.amount <= 0:
+        return
+
+    value = math.log(expense.amount)
+    stats.count += 1
+    delta = value - stats.mean
+    stats.mean += delta / stats.count
+    stats.m2 += delta * (value - stats.mean)
+
+
+def _forget(stats: CategoryAmountStats | None, expense: Expense) -> None:
+    if stats is None or stats.count == 0 or expense.amount <= 0:
+        return
+    if stats.count == 1:
+        stats.count, stats.mean, stats.m2 = 0, 0.0, 0.0
+        return
+    value = math.log(expense.amount)
+    previous = stats.mean
+    stats.count -= 1
+    stats.mean = (previous * (stats.count + 1) - value) / stats.count
+    stats.m2 = max(stats.m2 - (value - previous) * (value - stats.mean), 0.0)
+
+
+def observe(db: Session, expense: Expense) -> None:
+    """Score ``expense`` against its category history, then add it to that history.
+
+    Only unusually *large* amounts are flagged. The caller commits.
+    """
+    if not _in_history(expense):
+        expense.anomaly_score, expense.is_anomaly = None, False
+        return
+    _observe(_stats_for(db, expense) or _new_stats(db, expense), expense)
+
+
+def forget(db: Session, expense: Expense) -> None:
+    """Remove ``expense`` from its category history (on delete or before an edit)."""
+    if not _in_history(expense):
+        return
+    _forget(_stats_for(db, expense), expense)
+
+
+def _key(expense: Expense) -> tuple[int, int, str]:
+    return expense.user_id, expense.category_id, expense.currency
+
+
+def replay(db: Session, forgotten: list[Expense], observed: list[Expense] = ()) -> None:
+    """:func:`forget` then :func:`observe` many expenses, locking their statistics in one read."""
+    for expense in observed:
+        if not _in_history(expense):
+            expense.anomaly_score, expense.is_anomaly = None, False
+    forgotten = [expense for expense in forgotten if _in_history(expense)]
+    observed = [expense for expense in observed if _in_history(expense)]
+    keys = {_key(expense) for expense in [*forgotten, *observed]}
+    if not keys:
+        return
+    stats = {
+        _key(row): row
+        for row in db.scalars(
+            select(CategoryAmountStats)
+            .where(
+                tuple_(
+                    CategoryAmountStats.user_id,
+                    CategoryAmountStats.category_id,
+                    CategoryAmountStats.currency,
+                ).in_(keys)
+            )
+            .with_for_update()
+        )
+    }
+    for expense in forgotten:
+        _forget(stats.get(_key(expense)), expense)
+    for expense in observed:
+        key = _key(expense)
+        if key not in stats:
+            stats[key] = _new_stats(db, expense)
+        _observe(stats[key], expense)
+
+
+def _upsert_stats(db: Session):
+    dialect = {"postgresql": postgresql, "sqlite": sqlite}[db.get_bind().dialect.name]
+    statement = dialect.insert(CategoryAmountStats)
+    return statement.on_conflict_do_update(
+        index_elements=["user_id", "category_id", "currency"],
+        set_={name: statement.excluded[name] for name in ("count", "mean", "m2", "updated_at")},
+    )
+
+
+def _rescore_users(db: Session, user_ids: list[int]) -> int:
+    rows = db.execute(
+        select(
+            Expense.id,
+            Expense.user_id,
+            Expense.category_id,
+            Expense.currency,
+            Expense.amount_minor,
+        )
+        .where(
+            Expense.user_id.in_(user_ids),
+            Expense.recurring_id.is_(None),
+            Expense.amount_minor > 0,
+        )
+        .order_by(Expense.created_at, Expense.id)
+    ).all()
+    if not rows:
+        return 0
+    ids, owners, category_ids, currencies, amounts = zip(*rows)
+    ids = np.fromiter(ids, dtype=np.int64, count=len(rows))
+    owners = np.fromiter(owners, dtype=np.int64, count=len(rows))
+    category_ids = np.fromiter(category_ids, dtype=np.int64, count=len(rows))
+    keys = np.rec.fromarrays([owners, category_ids, np.array(currencies)])
+    groups, codes = np.unique(keys, return_inverse=True)
+    codes = codes.ravel()
+
+    # Stable sort keeps creation order inside each group.
+    order = np.argsort(codes, kind="stable")
+    code = codes[order]
+    amounts = np.fromiter(amounts, dtype=np.float64, count=len(rows)) / scales(currencies)
+    values = np.log(amounts)[order]
+    starts = np.flatnonzero(np.r_[True, code[1:] != code[:-1]])
+    sizes = np.diff(np.r_[starts, len(code)])
+    seen = np.arange(len(code)) - np.repeat(starts, sizes)
+
+    # Exclusive running sums per group, shifted by each group's first value
+    # so the sum of squares does not lose precision.
+    shifted = values - np.repeat(values[starts], sizes)
+    prior_sum = np.cumsum(shifted) - shifted
+    prior_sq = np.cumsum(shifted**2) - shifted**2
+    prior_sum -= np.repeat(prior_sum[starts], sizes)
+    prior_sq -= np.repeat(prior_sq[starts], sizes)
+
+    settings = get_settings()
+    scored = seen >= settings.anomaly_min_history
+    n = np.maximum(seen, 2)
+    prior_mean = prior_sum / n
+    variance = np.maximum(prior_sq - n * prior_mean**2, 0) / (n - 1)
+    z = (shifted - prior_mean) / np.maximum(np.sqrt(variance), MIN_STD)
+
+    # Core executemany: ORM bulk updates by primary key cannot carry the
+    # version check, and a re-score is not an edit that should bump it.
+    expenses = Expense.__table__
+    write = (
+        update(expenses)
+        .where(expenses.c.id == bindparam("row_id"))
+        .values(anomaly_score=bindparam("score"), is_anomaly=bindparam("flag"))
+    )
+    updates = [
+        {
+            "row_id": int(expense_id),
+            "score": round(float(value), 4) if ok else None,
+            "flag": bool(ok and value > settings.anomaly_threshold),
+        }
+        for expense_id, value, ok in zip(ids[order], z, scored)
+    ]
+    for offset in range(0, len(updates), _WRITE_BATCH):
+        db.execute(write, updates[offset:offset + _WRITE_BATCH])
+
+    count = np.bincount(code, minlength=len(groups))
+    mean = np.bincount(code, weights=values, minlength=len(groups)) / count
+    m2 = np.bincount(code, weights=(values - mean[code]) ** 2, minlength=len(groups))
+    now = datetime.now(timezone.utc)
+    db.execute(
+        _upsert_stats(db),
+        [
+            {
+                "user_id": int(group.f0),
+                "category_id": int(group.f1),
+                "currency": str(group.f2),
+                "count": int(count[index]),
+                "mean": float(mean[index]),
+                "m2": float(m2[index]),
+                "updated_at": now,
+            }
+            for index, group in enumerate(groups)
+        ],
+    )
+    db.commit()
+    return len(rows)
+
+
+def rescore(db: Session, user_ids: list[int] | None = None) -> int:
+    """Rebuild statistics and anomaly scores from the expenses stored on ``db``.
+
+    Each expense is scored against the expenses created before it, exactly as
+    :func:`observe` would have; returns the number of expenses scored.
+    """
+    if user_ids is None:
+        user_ids = db.execute(
+            select(Expense.user_id).distinct().order_by(Expense.user_id)
+        ).scalars().all()
+    return sum(
+        _rescore_users(db, list(user_ids[offset:offset + _USER_BATCH]))
+        for offset in range(0, len(user_ids), _USER_BATCH)
+    )
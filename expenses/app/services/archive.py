@@ -0,0 +1,212 @@
+"""Cold storage for old expenses as per-user, per-year Parquet files.
+
+Rows older than a cutoff are moved out of ``expenses`` into
+``<EXPENSES_ARCHIVE_URI>/user_id=<id>/year=<yyyy>.parquet`` on any
+filesystem pyarrow understands (local paths, ``s3://``, ``gs://``). Every
+file is tracked by an :class:`ArchivedPeriod` row, so reads only open
+Parquet when the requested range reaches back into an archived period.
+"""
+from datetime import datetime, timezone
+import posixpath
+import uuid
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+from sqlalchemy import Select, delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.currency import scales
+from app.db.models import ArchivedPeriod, Category, Expense
+
+ARCHIVE_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("user_id", pa.int64()),
+        ("category", pa.string()),
+        ("amount", pa.float64()),
+        ("currency", pa.string()),
+        ("created_at", pa.timestamp("us", tz="UTC")),
+        # Added later; files written before read these as nulls.
+        ("merchant", pa.string()),
+        ("note", pa.string()),
+    ]
+)
+_DELETE_CHUNK = 1000
+
+
+def as_utc(value: datetime) -> datetime:
+    """Treat naive datetimes (SQLite) as UTC so they compare with archived ones."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def hot_select() -> Select:
+    """Select ``expenses`` rows for :func:`to_arrow`, with category names, in schema order."""
+    return select(
+        Expense.id,
+        Expense.user_id,
+        Category.name,
+        Expense.amount_minor,
+        Expense.currency,
+        Expense.created_at,
+        Expense.merchant,
+        Expense.note,
+    ).join(
+        Category,
+        (Category.user_id == Expense.user_id) & (Category.id == Expense.category_id),
+    )
+
+
+def to_arrow(rows: list) -> pa.Table:
+    """Build an :data:`ARCHIVE_SCHEMA` table column by column from :func:`hot_select` rows.
+
+    Integer minor units become decimal ``amount`` values, so archived files
+    and snapshots keep their original layout.
+    """
+    columns = list(zip(*rows)) or [[] for _ in ARCHIVE_SCHEMA]
+    if rows:
+        columns[3] = np.array(columns[3], dtype=np.float64) / scales(columns[4])
+    return pa.Table.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, ARCHIVE_SCHEMA)],
+        schema=ARCHIVE_SCHEMA,
+    )
+
+
+def archive_filesystem() -> tuple[pafs.FileSystem, str]:
+    uri = get_settings().archive_uri
+    if not uri:
+        raise RuntimeError("EXPENSES_ARCHIVE_URI is not set")
+    if "://" not in uri:
+        uri = posixpath.abspath(uri)
+    return pafs.FileSystem.from_uri(uri)
+
+
+def _file_path(base: str, user_id: int, year: int) -> str:
+    return posixpath.join(base, f"user_id={user_id}", f"year={year:04d}.parquet")
+
+
+def archive_horizon(db: Session, user_id: int) -> datetime | None:
+    """Newest ``created_at`` that has been moved to cold storage for the user."""
+    horizon = (
+        db.query(func.max(ArchivedPeriod.last_created_at))
+        .filter(ArchivedPeriod.user_id == user_id)
+        .scalar()
+    )
+    return as_utc(horizon) if horizon is not None else None
+
+
+def reaches_archive(db: Session, user_id: int, start: datetime | None) -> bool:
+    horizon = archive_horizon(db, user_id)
+    return horizon is not None and (start is None or as_utc(start) <= horizon)
+
+
+def read_archived(
+    db: Session,
+    user_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> pa.Table:
+    """Archived expenses of ``user_id`` in ``[start, end)``, sorted by creation time."""
+    periods = db.query(ArchivedPeriod).filter(ArchivedPeriod.user_id == user_id)
+    if start is not None:
+        periods = periods.filter(ArchivedPeriod.year >= as_utc(start).year)
+    if end is not None:
+        periods = periods.filter(ArchivedPeriod.year <= as_utc(end).year)
+    paths = [period.path for period in periods.order_by(ArchivedPeriod.year)]
+    if not paths:
+        return ARCHIVE_SCHEMA.empty_table()
+
+    filesystem, _ = archive_filesystem()
+    table = pa.concat_tables(
+        [pq.read_table(path, filesystem=filesystem, schema=ARCHIVE_SCHEMA) for path in paths]
+    )
+    created_at = table["created_at"]
+    if start is not None:
+        table = table.filter(pc.greater_equal(created_at, pa.scalar(as_utc(start), created_at.type)))
+        created_at = table["created_at"]
+    if end is not None:
+        table = table.filter(pc.less(created_at, pa.scalar(as_utc(end), created_at.type)))
+    return table.sort_by([("created_at", "ascending"), ("id", "ascending")])
+
+
+def _archive_user_year(
+    db: Session,
+    filesystem: pafs.FileSystem,
+    base: str,
+    user_id: int,
+    year: int,
+    cutoff: datetime,
+) -> ArchivedPeriod:
+    year_start = datetime(year, 1, 1, tzinfo=timezone.utc)
+    year_end = min(datetime(year + 1, 1, 1, tzinfo=timezone.utc), cutoff)
+    rows = db.execute(
+        hot_select()
+        .where(
+            Expense.user_id == user_id,
+            Expense.created_at >= year_start,
+            Expense.created_at < year_end,
+        )
+        .order_by(Expense.created_at, Expense.id)
+    ).all()
+    fresh = to_arrow(rows)
+
+    path = _file_path(base, user_id, year)
+    period = db.get(ArchivedPeriod, (user_id, year))
+    combined = fresh
+    if filesystem.get_file_info(path).type == pafs.FileType.File:
+        existing = pq.read_table(path, filesystem=filesystem, schema=ARCHIVE_SCHEMA)
+        # A previous run may have written the file but not deleted the rows.
+        existing = existing.filter(pc.invert(pc.is_in(existing["id"], fresh["id"])))
+        combined = pa.concat_tables([existing, fresh])
+    combined = combined.sort_by([("created_at", "ascending"), ("id", "ascending")])
+
+    filesystem.create_dir(posixpath.dirname(path), recursive=True)
+    staging = f"{path}.{uuid.uuid4().hex}.tmp"
+    pq.write_table(combined, staging, filesystem=filesystem, compression="zstd")
+    filesystem.move(staging, path)
+
+    bounds = pc.min_max(combined["created_at"]).as_py()
+    if period is None:
+        period = ArchivedPeriod(user_id=user_id, year=year)
+        db.add(period)
+    period.path = path
+    period.row_count = combined.num_rows
+    period.first_created_at = bounds["min"]
+    period.last_created_at = bounds["max"]
+
+    ids = fresh["id"].to_pylist()
+    for offset in range(0, len(ids), _DELETE_CHUNK):
+        db.execute(
+            delete(Expense)
+            .where(Expense.id.in_(ids[offset:offset + _DELETE_CHUNK]))
+            .execution_options(synchronize_session=False)
+        )
+    db.commit()
+    return period
+
+
+def archive_before(db: Session, cutoff: datetime) -> list[ArchivedPeriod]:
+    """Move every expense created before ``cutoff`` into cold storage.
+
+    The Parquet file is written before the hot rows are deleted and existing
+    files are merged by id, so an interrupted run can be repeated safely.
+    """
+    cutoff = as_utc(cutoff)
+    filesystem, base = archive_filesystem()
+    year = func.extract("year", Expense.created_at)
+    groups = (
+        db.query(Expense.user_id, year)
+        .filter(Expense.created_at < cutoff)
+        .distinct()
+        .order_by(Expense.user_id, year)
+        .all()
+    )
+    return [
+        _archive_user_year(db, filesystem, base, user_id, int(group_year), cutoff)
+        for user_id, group_year in groups
+    ]
@@ -0,0 +1,203 @@
+"""Monthly category budgets, checked against month-to-date counters.
+
+Each expense write adds its amount to, or takes it from, one
+``expense_month_totals`` row keyed by (user, category id, currency, UTC
+month). This happens through an atomic upsert inside the writer's
+transaction, which returns the new total. Checking the budget on a write is
+therefore one keyed lookup next to that upsert, never a ``SUM`` over the
+month. Budgets are per currency: a USD budget only counts USD expenses.
+"""
+from collections.abc import Iterable
+from datetime import date, datetime, timezone
+
+from sqlalchemy import and_, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db.currency import to_major
+from app.db.models import Budget, Category, Expense, ExpenseMonthTotal
+from app.schema.budgets import BudgetStatus
+from app.services.archive import as_utc
+
+_REBUILD = {
+    "postgresql": "date_trunc('month', created_at AT TIME ZONE 'UTC')::date",
+    "sqlite": "date(created_at, 'start of month')",
+}
+
+
+def month_of(created_at: datetime) -> date:
+    value = as_utc(created_at)
+    return date(value.year, value.month, 1)
+
+
+def _upsert(db: Session):
+    """Add ``total_minor`` and ``count`` to a counter row, creating it at zero."""
+    dialect = {"postgresql": postgresql, "sqlite": sqlite}[db.get_bind().dialect.name]
+    statement = dialect.insert(ExpenseMonthTotal)
+    return statement.on_conflict_do_update(
+        index_elements=["user_id", "category_id", "currency", "month"],
+        set_={
+            "total_minor": ExpenseMonthTotal.total_minor + statement.excluded.total_minor,
+            "count": ExpenseMonthTotal.count + statement.excluded.count,
+        },
+    )
+
+
+def _add(db: Session, expense: Expense, sign: int) -> int:
+    return db.execute(
+        _upsert(db)
+        .values(
+            user_id=expense.user_id,
+            category_id=expense.category_id,
+            currency=expense.currency,
+            month=month_of(expense.created_at),
+            total_minor=sign * expense.amount_minor,
+            count=sign,
+        )
+        .returning(ExpenseMonthTotal.total_minor)
+    ).scalar_one()
+
+
+def _status(budget: Budget, category: str, month: date, spent_minor: int) -> BudgetStatus:
+    return BudgetStatus(
+        category=category,
+        currency=budget.currency,
+        month=month,
+        limit=to_major(budget.limit_minor, budget.currency),
+        spent=to_major(spent_minor, budget.currency),
+        remaining=to_major(budget.limit_minor - spent_minor, budget.currency),
+        over_budget=spent_minor > budget.limit_minor,
+    )
+
+
+def _budget_for(db: Session, expense: Expense) -> Budget | None:
+    return db.get(Budget, (expense.user_id, expense.category_id, expense.currency))
+
+
+def observe(db: Session, expense: Expense) -> BudgetStatus | None:
+    """Count ``expense`` towards its month and return its budget's status, if it has one.
+
+    ``created_at`` must be set. The caller commits.
+    """
+    spent = _add(db, expense, 1)
+    budget = _budget_for(db, expense)
+    if budget is None:
+        return None
+    return _status(budget, expense.category, month_of(expense.created_at), spent)
+
+
+def forget(db: Session, expense: Expense) -> None:
+    """Take ``expense`` out of its month (on delete or before an edit)."""
+    _add(db, expense, -1)
+
+
+def status_of(db: Session, expense: Expense) -> BudgetStatus | None:
+    """Status of the budget ``expense`` counts against, without counting it again."""
+    budget = _budget_for(db, expense)
+    if budget is None:
+        return None
+    month = month_of(expense.created_at)
+    total = db.get(
+        ExpenseMonthTotal, (expense.user_id, expense.category_id, expense.currency, month)
+    )
+    return _status(budget, expense.category, month, total.total_minor if total else 0)
+
+
+def add_rows(db: Session, rows: Iterable[dict], sign: int = 1) -> None:
+    """Count bulk-written expense rows, one upsert per (user, category, currency, month).
+
+    ``sign=-1`` takes the rows back out, for bulk deletes and edits.
+    """
+    totals: dict[tuple, list[int]] = {}
+    for row in rows:
+        key = (row["user_id"], row["category_id"], row["currency"], month_of(row["created_at"]))
+        total = totals.setdefault(key, [0, 0])
+        total[0] += sign * row["amount_minor"]
+        total[1] += sign
+    if totals:
+        db.execute(
+            _upsert(db),
+            [
+                {
+                    "user_id": user_id,
+                    "category_id": category_id,
+                    "currency": currency,
+                    "month": month,
+                    "total_minor": total_minor,
+                    "count": count,
+                }
+                for (user_id, category_id, currency, month), (total_minor, count) in totals.items()
+            ],
+        )
+
+
+def statuses(db: Session, user_id: int, month: date) -> list[BudgetStatus]:
+    """Every budget of ``user_id`` with its spend in ``month``."""
+    rows = db.execute(
+        select(Budget, Category.name, ExpenseMonthTotal.total_minor)
+        .join(Category, and_(Category.user_id == Budget.user_id, Category.id == Budget.category_id))
+        .outerjoin(
+            ExpenseMonthTotal,
+            and_(
+                ExpenseMonthTotal.user_id == Budget.user_id,
+                ExpenseMonthTotal.category_id == Budget.category_id,
+                ExpenseMonthTotal.currency == Budget.currency,
+                ExpenseMonthTotal.month == month,
+            ),
+        )
+        .where(Budget.user_id == user_id)
+        .order_by(Category.name, Budget.currency)
+    ).all()
+    return [_status(budget, name, month, spent or 0) for budget, name, spent in rows]
+
+
+def set_budget(
+    db: Session,
+    user_id: int,
+    category_id: int,
+    category: str,
+    currency: str,
+    limit_minor: int,
+) -> BudgetStatus:
+    """Create or change a budget and return its status for the current month."""
+    budget = db.get(Budget, (user_id, category_id, currency))
+    if budget is None:
+        budget = Budget(user_id=user_id, category_id=category_id, currency=currency)
+        db.add(budget)
+    budget.limit_minor = limit_minor
+    db.commit()
+    month = month_of(datetime.now(timezone.utc))
+    total = db.get(ExpenseMonthTotal, (user_id, category_id, currency, month))
+    return _status(budget, category, month, total.total_minor if total else 0)
+
+
+def remove(db: Session, user_id: int, category: str, currency: str) -> bool:
+    """Delete the budget; month counters stay, since expenses still need them."""
+    budget = db.scalars(
+        select(Budget)
+        .join(Category, and_(Category.user_id == Budget.user_id, Category.id == Budget.category_id))
+        .where(Budget.user_id == user_id, Category.name == category, Budget.currency == currency)
+    ).one_or_none()
+    if budget is None:
+        return False
+    db.delete(budget)
+    db.commit()
+    return True
+
+
+def rebuild(conn: Connection) -> None:
+    """Recount every month from ``expenses`` (for migrations and repairs).
+
+    Archived expenses are no longer in the table, so their months end up
+    without counters; budgets only look at the current month.
+    """
+    conn.execute(ExpenseMonthTotal.__table__.delete())
+    conn.execute(
+        text(
+            "INSERT INTO expense_month_totals "
+            "(user_id, category_id, currency, month, total_minor, count) "
+            f"SELECT user_id, category_id, currency, {_REBUILD[conn.dialect.name]}, "
+            "sum(amount_minor), count(*) FROM expenses GROUP BY 1, 2, 3, 4"
+        )
+    )
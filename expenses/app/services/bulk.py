@@ -0,0 +1,188 @@
+"""Bulk edits and deletes of a user's expenses, each in one transaction.
+
+A bulk update reads every targeted row in one ``SELECT ... FOR UPDATE``.
+It then writes them back with one executemany ``UPDATE`` per distinct set
+of changed fields (usually just one), bumping ``version`` like a single
+edit would. A bulk delete is one ``DELETE ... RETURNING``, after the tag
+and receipt links are removed by the same filter. Budget counters,
+category statistics and fingerprints are adjusted from the rows read or
+returned, never by re-reading expenses one at a time.
+
+Only expenses still in the database are affected; archived ones are not.
+"""
+from datetime import datetime
+
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.orm import Session
+
+from app.db.currency import to_major, to_positive_minor
+from app.db.models import Category, Expense, ExpenseReceipt, ExpenseTag
+from app.services import anomaly, budgets, categories, dedupe
+
+_RESCORED = {"amount", "category", "currency"}
+
+
+class ExpensesMissing(LookupError):
+    """Some ids do not name expenses of the caller."""
+
+
+class VersionConflict(ValueError):
+    """An expense is no longer at the version the client sent."""
+
+
+def _snapshot(row, **changes) -> Expense:
+    """A transient expense for the anomaly and fingerprint helpers; never added to the session."""
+    values = {
+        "user_id": row.user_id,
+        "category_id": row.category_id,
+        "category": row.category,
+        "amount_minor": row.amount_minor,
+        "currency": row.currency,
+        "created_at": row.created_at,
+        "recurring_id": row.recurring_id,
+    }
+    values.update(changes)
+    return Expense(**values)
+
+
+def update_many(db: Session, user_id: int, changes: list[dict]) -> int:
+    """Apply ``changes`` (``id`` plus the fields to set) atomically; the caller commits.
+
+    Raises :class:`ExpensesMissing`, :class:`VersionConflict` or
+    :class:`~app.db.currency.BelowMinorUnit` before anything is written.
+    :class:`VersionConflict` is also raised after the writes if an expense
+    changed between the read and the ``UPDATE``; the caller rolls back.
+    """
+    by_id = {change["id"]: change for change in changes}
+    rows = db.execute(
+        select(
+            Expense.id,
+            Expense.user_id,
+            Expense.category_id,
+            Expense.category,
+            Expense.amount_minor,
+            Expense.currency,
+            Expense.created_at,
+            Expense.recurring_id,
+            Expense.version,
+        )
+        .where(Expense.user_id == user_id, Expense.id.in_(by_id))
+        .with_for_update(of=Expense)
+    ).all()
+    missing = by_id.keys() - {row.id for row in rows}
+    if missing:
+        raise ExpensesMissing(f"expenses not found: {', '.join(map(str, sorted(missing)))}")
+    stale = sorted(
+        row.id
+        for row in rows
+        if by_id[row.id].get("version") is not None and by_id[row.id]["version"] != row.version
+    )
+    if stale:
+        raise VersionConflict(f"expenses changed by another request: {', '.join(map(str, stale))}")
+
+    names = {change["category"] for change in changes if change.get("category") is not None}
+    category_ids = categories.resolve(db, user_id, names) if names else {}
+    before, after, rescored, writes = [], [], [], []
+    for row in rows:
+        change = by_id[row.id]
+        currency = change.get("currency") or row.currency
+        amount = change.get("amount") or to_major(row.amount_minor, row.currency)
+        values = {
+            "category_id": category_ids.get(change.get("category"), row.category_id),
+            "amount_minor": to_positive_minor(amount, currency),
+            "currency": currency,
+        }
+        values.update({key: change[key] for key in ("merchant", "note") if key in change})
+        if not _RESCORED.isdisjoint(change):
+            before.append(row._asdict())
+            after.append({**row._asdict(), **values})
+            new = _snapshot(row, category=change.get("category") or row.category, **values)
+            rescored.append((_snapshot(row), new, values))
+        writes.append((row.id, row.version, values))
+
+    anomaly.replay(db, [old for old, _, _ in rescored], [new for _, new, _ in rescored])
+    for _, new, values in rescored:
+        values.update(
+            anomaly_score=new.anomaly_score,
+            is_anomaly=new.is_anomaly,
+            fingerprint=dedupe.fingerprint_of(new),
+        )
+    budgets.add_rows(db, before, sign=-1)
+    budgets.add_rows(db, after)
+
+    statements: dict[tuple[str, ...], list[dict]] = {}
+    for row_id, version, values in writes:
+        statements.setdefault(tuple(sorted(values)), []).append(
+            {
+                "row_id": row_id,
+                "old_version": version,
+                **{f"new_{key}": value for key, value in values.items()},
+            }
+        )
+
+    # SQLite ignores FOR UPDATE, so another write may have committed since the
+    # version check above; repeating the check in the UPDATE catches it. Where
+    # the driver cannot count executemany rows (psycopg2) the row locks held
+    # since the read already rule that out.
+    expenses = Expense.__table__
+    updated = 0
+    for fields, params in statements.items():
+        updated += db.execute(
+            update(expenses)
+            .where(expenses.c.id == bindparam("row_id"))
+            .where(expenses.c.version == bindparam("old_version"))
+            .values({field: bindparam(f"new_{field}") for field in fields})
+            .values(version=expenses.c.version + 1),
+            params,
+        ).rowcount
+    if db.get_bind().dialect.supports_sane_multi_rowcount and updated < len(writes):
+        raise VersionConflict("expenses changed by another request; fetch them again and retry")
+    return len(rows)
+
+
+def delete_matching(
+    db: Session,
+    user_id: int,
+    ids: list[int] | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    category: str | None = None,
+    merchant: str | None = None,
+) -> int:
+    """Delete the user's expenses matching every given filter; the caller commits."""
+    expenses = Expense.__table__
+    conditions = [expenses.c.user_id == user_id]
+    if ids is not None:
+        conditions.append(expenses.c.id.in_(ids))
+    if start is not None:
+        conditions.append(expenses.c.created_at >= start)
+    if end is not None:
+        conditions.append(expenses.c.created_at < end)
+    if category is not None:
+        conditions.append(
+            expenses.c.category_id
+            == select(Category.id)
+            .where(Category.user_id == user_id, Category.name == category)
+            .scalar_subquery()
+        )
+    if merchant is not None:
+        conditions.append(expenses.c.merchant == merchant)
+
+    targets = select(expenses.c.id).where(*conditions)
+    db.execute(delete(ExpenseTag).where(ExpenseTag.expense_id.in_(targets)))
+    db.execute(delete(ExpenseReceipt).where(ExpenseReceipt.expense_id.in_(targets)))
+    deleted = db.execute(
+        delete(expenses)
+        .where(*conditions)
+        .returning(
+            expenses.c.user_id,
+            expenses.c.category_id,
+            expenses.c.currency,
+            expenses.c.created_at,
+            expenses.c.amount_minor,
+            expenses.c.recurring_id,
+        )
+    ).mappings().all()
+    anomaly.replay(db, [Expense(**row) for row in deleted])
+    budgets.add_rows(db, deleted, sign=-1)
+    return len(deleted)
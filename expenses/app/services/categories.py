@@ -0,0 +1,92 @@
+"""Per-user category dictionary with an in-process name/id cache.
+
+Expenses store a small integer ``category_id`` instead of repeating the
+category name on every row, so category groupings compare integers. The API
+keeps speaking names: :func:`resolve` turns names into ids and
+:func:`names` turns ids back into names. Entries are never renamed or
+removed, so both directions are cached for the life of the process. A new
+name is committed on a connection of its own before any expense refers to
+it, which keeps the cache from ever holding an id that was rolled back.
+"""
+from collections.abc import Iterable
+import threading
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.db.models import Category
+
+_INSERT_ATTEMPTS = 5
+
+_ids: dict[tuple[int, str], int] = {}
+_names: dict[tuple[int, int], str] = {}
+_lock = threading.Lock()
+
+
+def _remember(user_id: int, rows: Iterable[tuple[int, str]]) -> None:
+    with _lock:
+        for category_id, name in rows:
+            _ids[(user_id, name)] = category_id
+            _names[(user_id, category_id)] = name
+
+
+def _insert(conn: Connection, user_id: int, name: str) -> None:
+    """Append ``name`` with the user's next id; a concurrent insert wins silently."""
+    dialect = {"postgresql": postgresql, "sqlite": sqlite}[conn.dialect.name]
+    next_id = (
+        select(func.coalesce(func.max(Category.id), 0) + 1)
+        .where(Category.user_id == user_id)
+        .scalar_subquery()
+    )
+    conn.execute(
+        dialect.insert(Category)
+        .values(user_id=user_id, id=next_id, name=name)
+        .on_conflict_do_nothing()
+    )
+
+
+def resolve(db: Session, user_id: int, names: Iterable[str]) -> dict[str, int]:
+    """Ids for ``names``, adding names the user has never used before."""
+    wanted = set(names)
+    with _lock:
+        found = {name: _ids[(user_id, name)] for name in wanted if (user_id, name) in _ids}
+    missing = wanted - found.keys()
+    for _ in range(_INSERT_ATTEMPTS):
+        if not missing:
+            return found
+        rows = db.execute(
+            select(Category.id, Category.name).where(
+                Category.user_id == user_id, Category.name.in_(missing)
+            )
+        ).all()
+        _remember(user_id, rows)
+        found.update({name: category_id for category_id, name in rows})
+        missing -= found.keys()
+        if missing:
+            # Two new names can race for the same next id; the loser retries.
+            with db.get_bind().begin() as conn:
+                for name in sorted(missing):
+                    _insert(conn, user_id, name)
+    if missing:
+        raise RuntimeError(f"could not add categories for user {user_id}")
+    return found
+
+
+def resolve_one(db: Session, user_id: int, name: str) -> int:
+    return resolve(db, user_id, [name])[name]
+
+
+def names(db: Session, user_id: int, ids: Iterable[int]) -> dict[int, str]:
+    """Names for category ``ids`` of ``user_id``; one query on a cache miss."""
+    wanted = set(ids)
+    with _lock:
+        known = {key: _names[(user_id, key)] for key in wanted if (user_id, key) in _names}
+    if len(known) < len(wanted):
+        rows = db.execute(
+            select(Category.id, Category.name).where(Category.user_id == user_id)
+        ).all()
+        _remember(user_id, rows)
+        known.update({category_id: name for category_id, name in rows if category_id in wanted})
+    return known
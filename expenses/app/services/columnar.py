@@ -0,0 +1,102 @@
+"""Expenses as Arrow tables, built column by column from query results.
+
+Selected rows are transposed once with ``zip(*rows)`` and every column
+goes into a single ``pa.array`` call, so no per-row dict or model is ever
+built. Amounts are scaled from minor units with NumPy. Archived rows
+already come from Parquet as Arrow. They only need the columns that
+archives lack filled with the defaults ``ExpenseRead`` uses.
+"""
+from collections.abc import Sequence
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from sqlalchemy.orm import Session
+
+from app.db.currency import scales
+from app.services import tags
+
+TYPES = {
+    "id": pa.int64(),
+    "user_id": pa.int64(),
+    "amount": pa.float64(),
+    "currency": pa.string(),
+    "category": pa.string(),
+    "tags": pa.list_(pa.string()),
+    "merchant": pa.string(),
+    "note": pa.string(),
+    "created_at": pa.timestamp("us", tz="UTC"),
+    "anomaly_score": pa.float64(),
+    "is_anomaly": pa.bool_(),
+    "recurring_id": pa.int64(),
+    "version": pa.int64(),
+    "reporting_amount": pa.float64(),
+    "reporting_currency": pa.string(),
+}
+# What ExpenseRead reports for columns that archived files do not have.
+_ARCHIVED_DEFAULTS = {
+    "anomaly_score": None,
+    "is_anomaly": False,
+    "recurring_id": None,
+    "version": 1,
+}
+ORDER = [("created_at", "ascending"), ("id", "ascending")]
+
+
+def schema(names: Sequence[str]) -> pa.Schema:
+    return pa.schema([(name, TYPES[name]) for name in names])
+
+
+def from_rows(rows: Sequence, names: Sequence[str]) -> pa.Table:
+    """Rows selected by column name as a table of ``names``.
+
+    ``amount`` is computed from the ``amount_minor`` and ``currency``
+    columns; every other name must have been selected under that name.
+    """
+    values = dict(zip(rows[0]._fields, zip(*rows))) if rows else {}
+    arrays = []
+    for name in names:
+        if name == "amount":
+            minor = np.asarray(values.get("amount_minor", ()), dtype=np.float64)
+            arrays.append(pa.array(minor / scales(values.get("currency", ())), type=TYPES[name]))
+        else:
+            arrays.append(pa.array(values.get(name, ()), type=TYPES[name]))
+    return pa.Table.from_arrays(arrays, schema=schema(names))
+
+
+def from_archived(table: pa.Table, names: Sequence[str]) -> pa.Table:
+    """Archived rows as a table of ``names``, filling columns archives lack."""
+    arrays = [
+        table[name].cast(TYPES[name])
+        if name in table.column_names
+        else pa.repeat(pa.scalar(_ARCHIVED_DEFAULTS.get(name), TYPES[name]), table.num_rows)
+        for name in names
+    ]
+    return pa.Table.from_arrays(arrays, schema=schema(names))
+
+
+def until(table: pa.Table, created_at: pa.Scalar, expense_id: pa.Scalar) -> int:
+    """How many rows of ``table``, sorted by :data:`ORDER`, come no later than the given key."""
+    times = table["created_at"].cast(created_at.type)
+    earlier = pc.or_(
+        pc.less(times, created_at),
+        pc.and_(pc.equal(times, created_at), pc.less_equal(table["id"], expense_id)),
+    )
+    return pc.sum(earlier).as_py() or 0
+
+
+def merged(*tables: pa.Table) -> pa.Table:
+    """Tables with one schema as a single table sorted by :data:`ORDER`."""
+    return pa.concat_tables(tables).sort_by(ORDER)
+
+
+def narrow(db: Session, table: pa.Table, fields: Sequence[str]) -> pa.Table:
+    """``table`` reduced to ``fields`` in that order, looking tags up only if asked for."""
+    if "tags" in fields:
+        ids = table["id"].to_pylist()
+        labels = tags.tags_for(db, ids)
+        table = table.append_column(
+            pa.field("tags", TYPES["tags"]),
+            pa.array([labels.get(expense_id, []) for expense_id in ids], type=TYPES["tags"]),
+        )
+    return table.select(list(fields))
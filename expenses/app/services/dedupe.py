@@ -0,0 +1,224 @@
+"""Near-duplicate detection through an indexed expense fingerprint.
+
+A fingerprint is a 64-bit hash of the user, the amount rounded to cents,
+the currency, the normalized category and a fixed time bucket of
+``EXPENSES_DEDUPE_WINDOW_SECONDS``. Two expenses within one window of each
+other fall into the same or adjacent buckets. Checking a new expense
+therefore costs one lookup on ``(user_id, fingerprint)`` for three
+fingerprints, never a self-join. :func:`find_duplicates` applies the same
+rule offline in a single pass over the ``(user_id, created_at)`` index.
+"""
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta
+import hashlib
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.currency import to_major
+from app.db.models import Expense
+from app.services import categories
+from app.services.archive import as_utc
+
+_LOOKUP_CHUNK = 1000
+_BACKFILL_BATCH = 5000
+
+
+def _bucket(created_at: datetime) -> int:
+    return int(as_utc(created_at).timestamp()) // get_settings().dedupe_window_seconds
+
+
+def _hash(user_id: int, amount: float, currency: str, category: str, bucket: int) -> int:
+    parts = (user_id, f"{amount:.2f}", currency.upper(), category.strip().lower(), bucket)
+    digest = hashlib.blake2b("\x1f".join(map(str, parts)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def fingerprint(
+    user_id: int,
+    amount: float,
+    currency: str,
+    category: str,
+    created_at: datetime,
+) -> int:
+    return _hash(user_id, amount, currency, category, _bucket(created_at))
+
+
+def fingerprint_of(expense: Expense, created_at: datetime | None = None) -> int:
+    return fingerprint(
+        expense.user_id,
+        expense.amount,
+        expense.currency,
+        expense.category,
+        created_at or expense.created_at,
+    )
+
+
+def _neighbours(expense: Expense, created_at: datetime) -> list[int]:
+    bucket = _bucket(created_at)
+    return [
+        _hash(expense.user_id, expense.amount, expense.currency, expense.category, bucket + shift)
+        for shift in (-1, 0, 1)
+    ]
+
+
+def _same(a: Expense, b: Expense) -> bool:
+    return (
+        f"{a.amount:.2f}" == f"{b.amount:.2f}"
+        and a.currency.upper() == b.currency.upper()
+        and a.category.strip().lower() == b.category.strip().lower()
+    )
+
+
+def _within_window(a: datetime, b: datetime) -> bool:
+    return abs((as_utc(a) - as_utc(b)).total_seconds()) <= get_settings().dedupe_window_seconds
+
+
+def find_existing(
+    db: Session,
+    user_id: int,
+    candidates: list[tuple[Expense, datetime]],
+) -> list[Expense | None]:
+    """For each ``(expense, created_at)`` return a stored near-duplicate, if any.
+
+    All candidate fingerprints are looked up in chunks through the
+    ``(user_id, fingerprint)`` index; hash hits are then confirmed against
+    the actual fields and the time window.
+    """
+    keys = list({key for expense, at in candidates for key in _neighbours(expense, at)})
+    stored: dict[int, list[Expense]] = {}
+    for offset in range(0, len(keys), _LOOKUP_CHUNK):
+        rows = db.query(Expense).filter(
+            Expense.user_id == user_id,
+            Expense.fingerprint.in_(keys[offset:offset + _LOOKUP_CHUNK]),
+        )
+        for row in rows:
+            stored.setdefault(row.fingerprint, []).append(row)
+
+    matches = []
+    for expense, at in candidates:
+        match = None
+        for key in _neighbours(expense, at):
+            for row in stored.get(key, []):
+                if _same(expense, row) and _within_window(at, row.created_at):
+                    if match is None or row.id < match.id:
+                        match = row
+        matches.append(match)
+    return matches
+
+
+def find_in_batch(candidates: list[tuple[Expense, datetime]]) -> list[int | None]:
+    """For each candidate, the index of an earlier near-duplicate in the same batch."""
+    seen: dict[int, list[int]] = {}
+    matches = []
+    for index, (expense, at) in enumerate(candidates):
+        match = None
+        for key in _neighbours(expense, at):
+            for earlier in seen.get(key, []):
+                other, other_at = candidates[earlier]
+                if match is None and _same(expense, other) and _within_window(at, other_at):
+                    match = earlier
+        matches.append(match)
+        seen.setdefault(fingerprint_of(expense, at), []).append(index)
+    return matches
+
+
+def find_duplicates(db: Session, user_ids: Iterable[int] | None = None) -> Iterator[list[int]]:
+    """Yield groups of expense ids that create would have rejected, oldest first.
+
+    Rows are read once in ``(user_id, created_at)`` index order. A row joins
+    a group when its amount, currency and category match and it is at most
+    one window later than the group's latest row. That is the check create
+    and import make against the neighbouring buckets, so pairs on either
+    side of a bucket boundary are found too. Memory grows with the distinct
+    amounts of one user, not with the table.
+    """
+    window = timedelta(seconds=get_settings().dedupe_window_seconds)
+    query = (
+        select(
+            Expense.id,
+            Expense.user_id,
+            Expense.category_id,
+            Expense.amount_minor,
+            Expense.currency,
+            Expense.created_at,
+        )
+        .where(Expense.fingerprint.is_not(None))
+        .order_by(Expense.user_id, Expense.created_at, Expense.id)
+    )
+    if user_ids is not None:
+        query = query.where(Expense.user_id.in_(list(user_ids)))
+
+    # (amount, currency, category) -> (latest created_at, ids) for the current user.
+    groups: dict[tuple[str, str, str], tuple[datetime, list[int]]] = {}
+    user_id = None
+    for row in db.execute(query.execution_options(yield_per=_LOOKUP_CHUNK)):
+        if row.user_id != user_id:
+            yield from (ids for _, ids in groups.values() if len(ids) > 1)
+            groups.clear()
+            user_id = row.user_id
+        category = categories.names(db, user_id, [row.category_id])[row.category_id]
+        key = (
+            f"{to_major(row.amount_minor, row.currency):.2f}",
+            row.currency.upper(),
+            category.strip().lower(),
+        )
+        at = as_utc(row.created_at)
+        latest = groups.get(key)
+        if latest is not None and at - latest[0] <= window:
+            latest[1].append(row.id)
+            groups[key] = (at, latest[1])
+            continue
+        if latest is not None and len(latest[1]) > 1:
+            yield latest[1]
+        groups[key] = (at, [row.id])
+    yield from (ids for _, ids in groups.values() if len(ids) > 1)
+
+
+def backfill(db: Session) -> int:
+    """Compute fingerprints for rows written before the column existed."""
+    expenses = Expense.__table__
+    # Core executemany, which leaves ``version`` alone; see anomaly.rescore.
+    write = (
+        update(expenses)
+        .where(expenses.c.id == bindparam("row_id"))
+        .values(fingerprint=bindparam("value"))
+    )
+    filled = 0
+    last = 0
+    while True:
+        rows = db.execute(
+            select(
+                Expense.id,
+                Expense.user_id,
+                Expense.amount_minor,
+                Expense.currency,
+                Expense.category,
+                Expense.created_at,
+            )
+            .where(Expense.id > last, Expense.fingerprint.is_(None))
+            .order_by(Expense.id)
+            .limit(_BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            return filled
+        db.execute(
+            write,
+            [
+                {
+                    "row_id": row.id,
+                    "value": fingerprint(
+                        row.user_id,
+                        to_major(row.amount_minor, row.currency),
+                        row.currency,
+                        row.category,
+                        row.created_at,
+                    ),
+                }
+                for row in rows
+            ],
+        )
+        db.commit()
+        filled += len(rows)
+        last = rows[-1].id
@@ -0,0 +1,205 @@
+"""Stream a user's expenses as CSV or an Arrow IPC stream, merging hot rows with archived ones."""
+from collections.abc import Iterator
+import csv
+from datetime import datetime
+import heapq
+import io
+from itertools import islice
+
+import numpy as np
+import pyarrow as pa
+from sqlalchemy import Select, select
+
+from app.db.currency import to_major
+from app.db.models import Category, Expense
+from app.db.sharding import session_for_user
+from app.services import archive, columnar, fx
+
+EXPORT_COLUMNS = ["id", "category", "amount", "currency", "created_at"]
+_FLUSH_ROWS = 500
+_ARROW_ROWS = 10_000
+
+
+def _layout(columns: list[str], currency: str | None) -> list[str]:
+    """Columns to select: ``columns`` plus the sort key and what conversion needs.
+
+    Rows are tuples in :data:`EXPORT_COLUMNS` order, restricted to these.
+    """
+    needed = {*columns, "id", "created_at"}
+    if "amount" in needed or currency is not None:
+        needed |= {"amount", "currency"}
+    return [name for name in EXPORT_COLUMNS if name in needed]
+
+
+def _query(user_id: int, start: datetime | None, end: datetime | None, layout: list[str]) -> Select:
+    """The user's expenses in ``[start, end)``, oldest first; ``amount`` in minor units."""
+    selected = {
+        "id": Expense.id,
+        "category": Category.name.label("category"),
+        "amount": Expense.amount_minor,
+        "currency": Expense.currency,
+        "created_at": Expense.created_at,
+    }
+    query = select(*(selected[name] for name in layout)).where(Expense.user_id == user_id)
+    if "category" in layout:
+        query = query.join(
+            Category,
+            (Category.user_id == Expense.user_id) & (Category.id == Expense.category_id),
+        )
+    if start is not None:
+        query = query.where(Expense.created_at >= start)
+    if end is not None:
+        query = query.where(Expense.created_at < end)
+    return query.order_by(Expense.created_at, Expense.id)
+
+
+def export_csv(
+    user_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    currency: str | None = None,
+    columns: list[str] | None = None,
+) -> Iterator[str]:
+    """Yield CSV text in chunks; hot rows are streamed with a server-side cursor.
+
+    The generator owns its session because it keeps running after the
+    request handler has returned. With ``currency``, every chunk is converted
+    in one vectorized lookup and ``reporting_amount`` is left empty where no
+    rate is known. ``columns`` picks a subset of :data:`EXPORT_COLUMNS`; only
+    what they need is selected, and the category join is skipped without
+    ``category``.
+    """
+    columns = columns or EXPORT_COLUMNS
+    layout = _layout(columns, currency)
+    at = {name: index for index, name in enumerate(layout)}
+    db = session_for_user(user_id)
+    try:
+        result = db.execute(
+            _query(user_id, start, end, layout).execution_options(yield_per=1000)
+        )
+        if "amount" in at:
+            amount, code = at["amount"], at["currency"]
+            hot: Iterator[tuple] = (
+                (*row[:amount], to_major(row[amount], row[code]), *row[amount + 1:])
+                for row in result
+            )
+        else:
+            hot = (tuple(row) for row in result)
+
+        def sort_key(row: tuple) -> tuple[datetime, int]:
+            return archive.as_utc(row[at["created_at"]]), row[at["id"]]
+
+        if archive.reaches_archive(db, user_id, start):
+            cold = archive.read_archived(db, user_id, start, end).select(layout)
+            cold_rows = (
+                tuple(row[name] for name in layout)
+                for batch in cold.to_batches()
+                for row in batch.to_pylist()
+            )
+            rows = heapq.merge(cold_rows, hot, key=sort_key)
+        else:
+            rows = hot
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        header = columns
+        if currency is not None:
+            header = [*columns, "reporting_amount", "reporting_currency"]
+            rates = fx.rate_table()
+        writer.writerow(header)
+        picks = [at[name] for name in columns]
+        created_index = at["created_at"]
+        while chunk := list(islice(rows, _FLUSH_ROWS)):
+            created = [archive.as_utc(row[created_index]) for row in chunk]
+            if currency is None:
+                extra = [[] for _ in chunk]
+            else:
+                converted = rates.convert(
+                    np.array([row[at["amount"]] for row in chunk], dtype=np.float64),
+                    np.array([row[at["currency"]] for row in chunk], dtype=object),
+                    fx.to_days(created),
+                    currency,
+                    strict=False,
+                )
+                extra = [
+                    ["" if np.isnan(value) else round(float(value), 2), currency]
+                    for value in converted
+                ]
+            for row, created_at, tail in zip(chunk, created, extra):
+                values = list(row)
+                values[created_index] = created_at.isoformat()
+                writer.writerow([*(values[index] for index in picks), *tail])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+
+def export_arrow(
+    user_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    currency: str | None = None,
+    columns: list[str] | None = None,
+) -> Iterator[bytes]:
+    """Yield the columns of :func:`export_csv` as an Arrow IPC stream, in chunks.
+
+    Every chunk of hot rows is written as one record batch, built from the
+    result columns. Archived rows that sort before a chunk's last row are
+    merged into that chunk's batch, and any rows left over follow at the end.
+    With ``currency``, ``reporting_amount`` is null where no rate is known.
+    """
+    columns = columns or EXPORT_COLUMNS
+    layout = _layout(columns, currency)
+    names = columns
+    if currency is not None:
+        names = [*columns, "reporting_amount", "reporting_currency"]
+        rates = fx.rate_table()
+    db = session_for_user(user_id)
+    try:
+        result = db.execute(
+            _query(user_id, start, end, layout).execution_options(yield_per=_ARROW_ROWS)
+        )
+        cold = None
+        if archive.reaches_archive(db, user_id, start):
+            cold = columnar.from_archived(archive.read_archived(db, user_id, start, end), layout)
+
+        buffer = io.BytesIO()
+        writer = pa.ipc.new_stream(buffer, columnar.schema(names))
+
+        def write(table: pa.Table) -> bytes:
+            if currency is not None:
+                converted = rates.convert(
+                    table["amount"].to_numpy(),
+                    table["currency"].to_numpy(),
+                    table["created_at"].to_numpy().astype("datetime64[D]"),
+                    currency,
+                    strict=False,
+                )
+                table = table.append_column(
+                    "reporting_amount", pa.array(converted, from_pandas=True)
+                ).append_column(
+                    "reporting_currency", pa.repeat(pa.scalar(currency), table.num_rows)
+                )
+            writer.write_table(table.select(names))
+            chunk = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return chunk
+
+        for rows in result.partitions():
+            hot = columnar.from_rows(rows, layout)
+            if cold is not None:
+                count = columnar.until(cold, hot["created_at"][-1], hot["id"][-1])
+                hot = columnar.merged(cold.slice(0, count), hot)
+                cold = cold.slice(count)
+            yield write(hot)
+        if cold is not None and cold.num_rows:
+            yield write(cold)
+        writer.close()
+        yield buffer.getvalue()
+    finally:
+        db.close()
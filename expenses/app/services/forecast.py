@@ -0,0 +1,135 @@
+"""Batch month-end spend forecasts for every user at once.
+
+Daily totals for the trailing window are aggregated in SQL and scattered
+into a dense ``(user, currency) x day`` matrix. Simple exponential
+smoothing runs over the day axis for all rows simultaneously, and a
+shrunken day-of-week profile turns the smoothed daily level into the spend
+expected for the rest of the month. Results are upserted into
+``expense_forecasts`` so the API answers with a single keyed lookup.
+"""
+from datetime import date, datetime, timedelta, timezone
+import calendar
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db.currency import scales
+from app.db.models import Expense, ExpenseForecast
+
+WINDOW_DAYS = 91
+ALPHA = 0.1
+# Pseudo-weeks of the user's average day mixed into each weekday factor.
+WEEKDAY_SHRINKAGE = 4.0
+_WRITE_BATCH = 5000
+
+
+def _daily_matrix(
+    db: Session,
+    window_start: date,
+    today: date,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return ``(user_ids, currencies, totals[group, day])`` for the window."""
+    day = func.date(Expense.created_at)
+    lower = datetime(window_start.year, window_start.month, window_start.day, tzinfo=timezone.utc)
+    upper = datetime(today.year, today.month, today.day, tzinfo=timezone.utc) + timedelta(days=1)
+    rows = db.execute(
+        select(Expense.user_id, Expense.currency, day, func.sum(Expense.amount_minor))
+        .where(Expense.created_at >= lower, Expense.created_at < upper)
+        .group_by(Expense.user_id, Expense.currency, day)
+    ).all()
+    days = (today - window_start).days + 1
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=object), np.zeros((0, days))
+
+    user_ids, currencies, dates, totals = zip(*rows)
+    user_ids = np.fromiter(user_ids, dtype=np.int64, count=len(rows))
+    currencies = np.array(currencies, dtype=object)
+    offsets = (
+        np.array([str(value) for value in dates], dtype="datetime64[D]")
+        - np.datetime64(window_start, "D")
+    ).astype(np.int64)
+    keys = np.rec.fromarrays([user_ids, currencies.astype(str)])
+    unique, groups = np.unique(keys, return_inverse=True)
+
+    matrix = np.zeros((len(unique), days))
+    totals = np.fromiter(totals, dtype=np.float64, count=len(rows)) / scales(currencies)
+    np.add.at(matrix, (groups, offsets), totals)
+    return unique.f0.astype(np.int64), unique.f1.astype(object), matrix
+
+
+def project(
+    matrix: np.ndarray,
+    window_start: date,
+    today: date,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Vectorized forecast for every row of ``matrix``.
+
+    Returns ``(month_to_date, projected_total, daily_level)`` arrays.
+    """
+    groups, days = matrix.shape
+    level = matrix[:, 0].copy()
+    for column in range(1, days):
+        level += ALPHA * (matrix[:, column] - level)
+
+    weekdays = (np.arange(days) + window_start.weekday()) % 7
+    per_weekday = np.stack([matrix[:, weekdays == dow].mean(axis=1) for dow in range(7)], axis=1)
+    overall = matrix.mean(axis=1, keepdims=True)
+    factors = np.divide(
+        per_weekday + WEEKDAY_SHRINKAGE * overall,
+        (1 + WEEKDAY_SHRINKAGE) * overall,
+        out=np.ones((groups, 7)),
+        where=overall > 0,
+    )
+
+    month_offset = (today.replace(day=1) - window_start).days
+    month_to_date = matrix[:, max(month_offset, 0):].sum(axis=1)
+    last_day = calendar.monthrange(today.year, today.month)[1]
+    remaining = (np.arange(today.day + 1, last_day + 1) - 1 + today.replace(day=1).weekday()) % 7
+    expected = level * factors[:, remaining].sum(axis=1)
+    return month_to_date, month_to_date + expected, level
+
+
+def _upsert(db: Session):
+    dialect = {"postgresql": postgresql, "sqlite": sqlite}[db.get_bind().dialect.name]
+    statement = dialect.insert(ExpenseForecast)
+    return statement.on_conflict_do_update(
+        index_elements=["user_id", "month", "currency"],
+        set_={
+            name: statement.excluded[name]
+            for name in ("month_to_date", "projected_total", "daily_level", "computed_at")
+        },
+    )
+
+
+def run_forecasts(db: Session, today: date | None = None) -> int:
+    """Forecast the current month for every user on ``db``; returns rows written."""
+    now = datetime.now(timezone.utc)
+    today = today or now.date()
+    window_start = today - timedelta(days=WINDOW_DAYS - 1)
+    user_ids, currencies, matrix = _daily_matrix(db, window_start, today)
+    if len(user_ids) == 0:
+        return 0
+    month_to_date, projected, level = project(matrix, window_start, today)
+
+    month = today.replace(day=1)
+    rows = [
+        {
+            "user_id": int(user_id),
+            "month": month,
+            "currency": currency,
+            "month_to_date": round(float(mtd), 2),
+            "projected_total": round(float(total), 2),
+            "daily_level": round(float(daily), 4),
+            "computed_at": now,
+        }
+        for user_id, currency, mtd, total, daily in zip(
+            user_ids, currencies, month_to_date, projected, level
+        )
+    ]
+    statement = _upsert(db)
+    for offset in range(0, len(rows), _WRITE_BATCH):
+        db.execute(statement, rows[offset:offset + _WRITE_BATCH])
+    db.commit()
+    return len(rows)
@@ -0,0 +1,160 @@
+"""Exchange rates: CSV loading, an in-memory cache and vectorized conversion.
+
+``fx_rates`` holds one row per (currency, day) with the value of one unit of
+that currency in ``EXPENSES_FX_BASE_CURRENCY``. Each process keeps the whole
+table in memory as one sorted ``datetime64[D]`` array per currency. An
+amount is converted at the latest rate on or before its day, found by
+``searchsorted`` over every amount of a currency at once, so reports never
+query rates row by row. The cache is reloaded after
+``EXPENSES_FX_CACHE_SECONDS``.
+"""
+import csv
+from datetime import date
+import threading
+import time
+from typing import TextIO
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.models import FxRate
+from app.db.session import SessionLocal
+
+_WRITE_BATCH = 5000
+# Stand-in series for currencies without any rate.
+_NO_DAYS = np.array(["NaT"], dtype="datetime64[D]")
+_NO_RATES = np.array([np.nan])
+
+
+class RateMissing(LookupError):
+    """Raised when an amount predates every known rate of its currency."""
+
+    def __init__(self, currency: str, day: np.datetime64) -> None:
+        super().__init__(f"no exchange rate for {currency} on or before {day}")
+        self.currency = currency
+        self.day = day
+
+
+class RateTable:
+    def __init__(self, base: str, series: dict[str, tuple[np.ndarray, np.ndarray]]) -> None:
+        self.base = base.upper()
+        self.series = series
+
+    def knows(self, currency: str) -> bool:
+        return currency.upper() == self.base or currency.upper() in self.series
+
+    def rates(self, currencies: np.ndarray, days: np.ndarray, strict: bool = True) -> np.ndarray:
+        """Base-currency value of one unit of each currency on each day.
+
+        Unknown rates raise :class:`RateMissing`, or are NaN when not ``strict``.
+        """
+        currencies = np.asarray(currencies, dtype=object)
+        days = np.asarray(days, dtype="datetime64[D]")
+        result = np.ones(len(days))
+        for code in np.unique(currencies):
+            currency = str(code).upper()
+            if currency == self.base:
+                continue
+            mask = currencies == code
+            known_days, known_rates = self.series.get(currency, (_NO_DAYS, _NO_RATES))
+            index = np.searchsorted(known_days, days[mask], side="right") - 1
+            missing = index < 0
+            if missing.any() and strict:
+                raise RateMissing(currency, days[mask][missing].min())
+            result[mask] = np.where(missing, np.nan, known_rates[np.maximum(index, 0)])
+        return result
+
+    def convert(
+        self,
+        amounts: np.ndarray,
+        currencies: np.ndarray,
+        days: np.ndarray,
+        target: str,
+        strict: bool = True,
+    ) -> np.ndarray:
+        """Convert ``amounts`` into ``target`` at each amount's own day."""
+        source = self.rates(currencies, days, strict)
+        target_codes = np.full(len(days), target.upper(), dtype=object)
+        destination = self.rates(target_codes, days, strict)
+        return np.asarray(amounts, dtype=np.float64) * source / destination
+
+
+_cache: tuple[float, RateTable] | None = None
+_lock = threading.Lock()
+
+
+def _load(db: Session) -> RateTable:
+    rows = db.execute(
+        select(FxRate.currency, FxRate.day, FxRate.rate).order_by(FxRate.currency, FxRate.day)
+    ).all()
+    series = {}
+    if rows:
+        currencies, days, rates = zip(*rows)
+        currencies = np.array(currencies, dtype=object)
+        days = np.array(days, dtype="datetime64[D]")
+        rates = np.array(rates, dtype=np.float64)
+        starts = np.flatnonzero(np.r_[True, currencies[1:] != currencies[:-1]])
+        for begin, end in zip(starts, np.r_[starts[1:], len(rows)]):
+            series[currencies[begin].upper()] = (days[begin:end], rates[begin:end])
+    return RateTable(get_settings().fx_base_currency, series)
+
+
+def rate_table() -> RateTable:
+    """The cached rate table, reloaded from the primary database when stale."""
+    global _cache
+    with _lock:
+        if _cache is None or time.monotonic() - _cache[0] > get_settings().fx_cache_seconds:
+            db = SessionLocal()
+            try:
+                _cache = (time.monotonic(), _load(db))
+            finally:
+                db.close()
+        return _cache[1]
+
+
+def invalidate() -> None:
+    global _cache
+    with _lock:
+        _cache = None
+
+
+def to_days(values) -> np.ndarray:
+    """``datetime64[D]`` array from dates, datetimes or ISO strings (SQLite)."""
+    return np.array([str(value)[:10] for value in values], dtype="datetime64[D]")
+
+
+def load_csv(db: Session, source: TextIO) -> int:
+    """Upsert rates from CSV with a ``date,currency,rate`` header; returns rows read."""
+    dialect = {"postgresql": postgresql, "sqlite": sqlite}[db.get_bind().dialect.name]
+    statement = dialect.insert(FxRate)
+    statement = statement.on_conflict_do_update(
+        index_elements=["currency", "day"], set_={"rate": statement.excluded.rate}
+    )
+    batch, loaded = [], 0
+    for line, row in enumerate(csv.DictReader(source), start=2):
+        try:
+            rate = float(row["rate"])
+            if rate <= 0:
+                raise ValueError("rate must be positive")
+            batch.append(
+                {
+                    "currency": row["currency"].strip().upper(),
+                    "day": date.fromisoformat(row["date"].strip()),
+                    "rate": rate,
+                }
+            )
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError(f"line {line}: {exc}") from exc
+        if len(batch) == _WRITE_BATCH:
+            db.execute(statement, batch)
+            loaded += len(batch)
+            batch = []
+    if batch:
+        db.execute(statement, batch)
+        loaded += len(batch)
+    db.commit()
+    invalidate()
+    return loaded
@@ -0,0 +1,206 @@
+"""Shared expenses split between group members, and settling up.
+
+Every member row carries a running net balance: what the group owes the
+member, negative when the member owes the group. Adding a shared expense
+credits the payer with the amount and debits each member with their share,
+as one ``UPDATE ... SET balance_minor = balance_minor + :delta`` per member
+in a single executemany. Deleting it applies the opposite deltas. Balances
+are therefore always current, and reading them never scans the group's
+expense history. Rows are updated in ``user_id`` order so that concurrent
+writers to the same group take their locks in the same order.
+
+Settling up pairs the largest debtor with the largest creditor through two
+heaps, repeatedly, which clears at least one member per transfer and so
+needs at most ``members - 1`` transfers in ``O(n log n)``. Finding the
+fewest possible transfers is NP-hard; the greedy pairing is the usual
+practical answer.
+"""
+import heapq
+from collections import defaultdict
+from collections.abc import Iterable
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app.db.models import ExpenseGroup, GroupExpense, GroupExpenseSplit, GroupMember
+
+PAYMENT = "payment"
+
+
+class GroupError(ValueError):
+    """A group write that cannot be applied, e.g. shares that do not add up."""
+
+
+def equal_shares(amount_minor: int, user_ids: Iterable[int]) -> dict[int, int]:
+    """Split ``amount_minor`` evenly; leftover minor units go to the lowest ids."""
+    members = sorted(set(user_ids))
+    if not members:
+        raise GroupError("an expense must be split between at least one member")
+    base, extra = divmod(amount_minor, len(members))
+    return {user_id: base + (index < extra) for index, user_id in enumerate(members)}
+
+
+def member_ids(db: Session, group_id: int) -> set[int]:
+    return set(db.scalars(select(GroupMember.user_id).where(GroupMember.group_id == group_id)))
+
+
+def is_member(db: Session, group_id: int, user_id: int) -> bool:
+    return db.get(GroupMember, (group_id, user_id)) is not None
+
+
+def create_group(
+    db: Session, name: str, currency: str, created_by: int, members: Iterable[int]
+) -> ExpenseGroup:
+    group = ExpenseGroup(name=name, currency=currency, created_by=created_by)
+    db.add(group)
+    db.flush()
+    db.add_all(
+        GroupMember(group_id=group.id, user_id=user_id, balance_minor=0)
+        for user_id in sorted({created_by, *members})
+    )
+    db.commit()
+    return group
+
+
+def add_member(db: Session, group_id: int, user_id: int) -> GroupMember:
+    member = db.get(GroupMember, (group_id, user_id))
+    if member is None:
+        member = GroupMember(group_id=group_id, user_id=user_id, balance_minor=0)
+        db.add(member)
+        db.commit()
+    return member
+
+
+def balances(db: Session, group_id: int) -> dict[int, int]:
+    """Net balance per member, in minor units."""
+    return dict(
+        db.execute(
+            select(GroupMember.user_id, GroupMember.balance_minor)
+            .where(GroupMember.group_id == group_id)
+            .order_by(GroupMember.user_id)
+        ).all()
+    )
+
+
+_APPLY = (
+    update(GroupMember.__table__)
+    .where(
+        GroupMember.__table__.c.group_id == bindparam("g_id"),
+        GroupMember.__table__.c.user_id == bindparam("u_id"),
+    )
+    .values(balance_minor=GroupMember.__table__.c.balance_minor + bindparam("delta"))
+)
+
+
+def _deltas(expense: GroupExpense, sign: int) -> dict[int, int]:
+    deltas: dict[int, int] = defaultdict(int)
+    deltas[expense.paid_by] += sign * expense.amount_minor
+    for split in expense.splits:
+        deltas[split.user_id] -= sign * split.share_minor
+    return deltas
+
+
+def _apply(db: Session, group_id: int, deltas: dict[int, int]) -> None:
+    params = [
+        {"g_id": group_id, "u_id": user_id, "delta": delta}
+        for user_id, delta in sorted(deltas.items())
+        if delta
+    ]
+    if params:
+        db.execute(_APPLY, params)
+
+
+def add_expense(
+    db: Session,
+    group: ExpenseGroup,
+    paid_by: int,
+    amount_minor: int,
+    shares: dict[int, int],
+    description: str | None = None,
+    kind: str = "expense",
+) -> GroupExpense:
+    """Record a shared expense and move the members' balances; commits.
+
+    ``shares`` maps member ids to what each owes of ``amount_minor`` and must
+    add up to it exactly.
+    """
+    members = member_ids(db, group.id)
+    outsiders = sorted(({paid_by} | set(shares)) - members)
+    if outsiders:
+        raise GroupError(f"not members of the group: {', '.join(map(str, outsiders))}")
+    if any(share < 0 for share in shares.values()):
+        raise GroupError("shares must not be negative")
+    if sum(shares.values()) != amount_minor:
+        raise GroupError("shares must add up to the amount")
+    expense = GroupExpense(
+        group_id=group.id,
+        paid_by=paid_by,
+        amount_minor=amount_minor,
+        description=description,
+        kind=kind,
+        splits=[
+            GroupExpenseSplit(user_id=user_id, share_minor=share)
+            for user_id, share in sorted(shares.items())
+            if share
+        ],
+    )
+    db.add(expense)
+    db.flush()
+    _apply(db, group.id, _deltas(expense, 1))
+    db.commit()
+    return expense
+
+
+def record_payment(
+    db: Session, group: ExpenseGroup, from_user_id: int, to_user_id: int, amount_minor: int
+) -> GroupExpense:
+    """A member paying another back: the payer's whole amount is the recipient's share."""
+    if from_user_id == to_user_id:
+        raise GroupError("a payment needs two different members")
+    return add_expense(
+        db, group, from_user_id, amount_minor, {to_user_id: amount_minor}, kind=PAYMENT
+    )
+
+
+def delete_expense(db: Session, expense: GroupExpense) -> None:
+    """Remove a shared expense or payment and reverse its effect on balances; commits."""
+    _apply(db, expense.group_id, _deltas(expense, -1))
+    db.delete(expense)
+    db.commit()
+
+
+def expenses(
+    db: Session, group_id: int, limit: int, before_id: int | None = None
+) -> list[GroupExpense]:
+    """Newest first, paged by id along ``(group_id, id)``."""
+    query = (
+        select(GroupExpense)
+        .where(GroupExpense.group_id == group_id)
+        .order_by(GroupExpense.id.desc())
+        .limit(limit)
+    )
+    if before_id is not None:
+        query = query.where(GroupExpense.id < before_id)
+    return list(db.scalars(query))
+
+
+def settle(balances: dict[int, int]) -> list[tuple[int, int, int]]:
+    """Transfers ``(from, to, amount_minor)`` that bring every balance to zero.
+
+    Balances must add up to zero, which shared expenses guarantee.
+    """
+    creditors = [(-balance, user_id) for user_id, balance in balances.items() if balance > 0]
+    debtors = [(balance, user_id) for user_id, balance in balances.items() if balance < 0]
+    heapq.heapify(creditors)
+    heapq.heapify(debtors)
+    transfers = []
+    while creditors and debtors:
+        credit, creditor = heapq.heappop(creditors)
+        debt, debtor = heapq.heappop(debtors)
+        amount = min(-credit, -debt)
+        transfers.append((debtor, creditor, amount))
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, creditor))
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, debtor))
+    return transfers
@@ -0,0 +1,78 @@
+"""Bulk import of expenses with near-duplicate screening."""
+from datetime import datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from app.db.currency import to_minor
+from app.db.models import Expense
+from app.schema.exp import ExpenseImport, ExpenseRead
+from app.schema.imports import DuplicateExpense, ImportResult
+from app.services import anomaly, budgets, categories, dedupe, jobs, tags
+from app.services.archive import as_utc
+
+
+def import_expenses(
+    db: Session,
+    user_id: int,
+    items: list[ExpenseImport],
+    allow_duplicates: bool = False,
+) -> ImportResult:
+    """Insert ``items`` in one transaction, skipping near-duplicates.
+
+    An item is skipped when it repeats a stored expense or an earlier item of
+    the same request; the response says which. Anomaly scores are computed in
+    request order. If any item is backdated, a rescore in creation order is
+    queued as well.
+    """
+    now = datetime.now(timezone.utc)
+    category_ids = categories.resolve(db, user_id, {item.category for item in items})
+    candidates = [
+        (
+            Expense(
+                user_id=user_id,
+                amount_minor=to_minor(item.amount, item.currency),
+                currency=item.currency,
+                category_id=category_ids[item.category],
+                category=item.category,
+                merchant=item.merchant,
+                note=item.note,
+            ),
+            as_utc(item.created_at) if item.created_at else now,
+        )
+        for item in items
+    ]
+    if allow_duplicates:
+        stored = earlier = [None] * len(candidates)
+    else:
+        stored = dedupe.find_existing(db, user_id, candidates)
+        earlier = dedupe.find_in_batch(candidates)
+
+    created, duplicates = [], []
+    backdated = False
+    for index, (item, (expense, created_at), original, previous) in enumerate(
+        zip(items, candidates, stored, earlier)
+    ):
+        if original is not None:
+            duplicates.append(DuplicateExpense(index=index, duplicate_of=original.id))
+            continue
+        if previous is not None:
+            duplicates.append(DuplicateExpense(index=index, duplicate_of_index=previous))
+            continue
+        expense.created_at = created_at
+        backdated = backdated or item.created_at is not None
+        expense.fingerprint = dedupe.fingerprint_of(expense)
+        tags.set_tags(expense, item.tags)
+        anomaly.observe(db, expense)
+        budgets.observe(db, expense)
+        db.add(expense)
+        created.append(expense)
+
+    if backdated:
+        jobs.enqueue(db, jobs.RescoreAnomalies(user_id=user_id))
+    db.flush()
+    result = ImportResult(
+        created=[ExpenseRead.model_validate(expense) for expense in created],
+        duplicates=duplicates,
+    )
+    db.commit()
+    return result
@@ -0,0 +1,218 @@
+"""Durable background jobs, kept in the database they work on.
+
+A request that needs follow-up work inserts a ``jobs`` row with
+:func:`enqueue` in its own transaction, so the job exists exactly when
+the write it belongs to was committed. Enqueueing a job that is already
+queued with the same payload is a no-op.
+
+``python -m app.cli.worker`` claims due jobs in batches with a single
+``UPDATE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING``.
+Concurrent workers on PostgreSQL therefore split the queue without
+waiting on each other. SQLite has no row locks. There the same statement
+runs without ``SKIP LOCKED`` and is still atomic, because SQLite admits
+one writer at a time. Run a single worker per SQLite database.
+
+A job that raises is retried after an exponential backoff with jitter,
+until ``max_attempts`` is used up, and is then kept as ``failed`` with its
+last error. A job whose worker died is claimed again once its lease
+expires. Jobs therefore run at least once, and every handler must be
+idempotent. Finished jobs are deleted.
+"""
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+import json
+import random
+from typing import Any, ClassVar
+
+from pydantic import BaseModel
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db.models import Job
+from app.services import anomaly, recurring
+
+BATCH_SIZE = 20
+LEASE = timedelta(minutes=10)
+BACKOFF_BASE = timedelta(seconds=30)
+BACKOFF_MAX = timedelta(hours=1)
+
+
+class JobSpec(BaseModel):
+    """Payload of one kind of job; subclasses are registered in :data:`HANDLERS`."""
+
+    kind: ClassVar[str]
+    priority: ClassVar[int] = 0
+    max_attempts: ClassVar[int] = 5
+
+
+class MaterializeRecurring(JobSpec):
+    """Create the occurrences a new recurring template already has due."""
+
+    kind: ClassVar[str] = "recurring.materialize"
+    priority: ClassVar[int] = 10
+    template_id: int
+
+
+class RescoreAnomalies(JobSpec):
+    """Rebuild a user's category statistics and anomaly scores in creation order."""
+
+    kind: ClassVar[str] = "anomaly.rescore"
+    user_id: int
+
+
+def _materialize_recurring(db: Session, job: MaterializeRecurring) -> None:
+    recurring.materialize(db, ids=[job.template_id])
+
+
+def _rescore_anomalies(db: Session, job: RescoreAnomalies) -> None:
+    anomaly.rescore(db, [job.user_id])
+
+
+HANDLERS: dict[type[JobSpec], Callable[[Session, Any], None]] = {
+    MaterializeRecurring: _materialize_recurring,
+    RescoreAnomalies: _rescore_anomalies,
+}
+_BY_KIND = {spec.kind: (spec, handler) for spec, handler in HANDLERS.items()}
+
+
+def enqueue(db: Session, job: JobSpec, delay: timedelta | None = None) -> None:
+    """Queue ``job`` in ``db``'s current transaction; the caller commits."""
+    payload = job.model_dump(mode="json")
+    dialect = {"postgresql": postgresql, "sqlite": sqlite}[db.get_bind().dialect.name]
+    statement = dialect.insert(Job).values(
+        kind=job.kind,
+        key=f"{job.kind}:{json.dumps(payload, sort_keys=True, separators=(',', ':'))}",
+        payload=payload,
+        priority=job.priority,
+        max_attempts=job.max_attempts,
+        status="queued",
+        attempts=0,
+        run_at=datetime.now(timezone.utc) + (delay or timedelta()),
+    )
+    db.execute(
+        statement.on_conflict_do_nothing(
+            index_elements=["key"], index_where=Job.status == "queued"
+        )
+    )
+
+
+def backoff(attempts: int) -> timedelta:
+    """Delay before retry number ``attempts``: doubling from 30 s up to an hour, with jitter."""
+    delay = min(BACKOFF_BASE * 2 ** (attempts - 1), BACKOFF_MAX)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def claim(
+    db: Session,
+    worker: str,
+    limit: int = BATCH_SIZE,
+    now: datetime | None = None,
+    lease: timedelta = LEASE,
+) -> list:
+    """Mark up to ``limit`` due jobs as running by ``worker`` and return them, most urgent first.
+
+    Jobs still marked running by a worker whose lease ran out count as due.
+    The caller commits.
+    """
+    now = now or datetime.now(timezone.utc)
+    jobs = Job.__table__
+    due = (
+        select(jobs.c.id)
+        .where(
+            or_(
+                and_(jobs.c.status == "queued", jobs.c.run_at <= now),
+                and_(jobs.c.status == "running", jobs.c.locked_at < now - lease),
+            )
+        )
+        .order_by(jobs.c.priority.desc(), jobs.c.run_at, jobs.c.id)
+        .limit(limit)
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        due = due.with_for_update(skip_locked=True)
+    claimed = db.execute(
+        update(jobs)
+        .where(jobs.c.id.in_(due.scalar_subquery()))
+        .values(
+            status="running",
+            locked_by=worker,
+            locked_at=now,
+            attempts=jobs.c.attempts + 1,
+        )
+        .returning(
+            jobs.c.id,
+            jobs.c.kind,
+            jobs.c.key,
+            jobs.c.payload,
+            jobs.c.priority,
+            jobs.c.run_at,
+            jobs.c.attempts,
+            jobs.c.max_attempts,
+        )
+    ).all()
+    return sorted(claimed, key=lambda job: (-job.priority, job.run_at, job.id))
+
+
+def _finish(db: Session, job, worker: str) -> None:
+    jobs = Job.__table__
+    db.execute(delete(jobs).where(jobs.c.id == job.id, jobs.c.locked_by == worker))
+
+
+def _fail(db: Session, job, worker: str, error: str) -> None:
+    """Queue ``job`` again after a backoff, or mark it failed on its last attempt."""
+    jobs = Job.__table__
+    mine = and_(jobs.c.id == job.id, jobs.c.locked_by == worker)
+    if job.attempts >= job.max_attempts:
+        db.execute(update(jobs).where(mine).values(status="failed", last_error=error))
+        return
+    requeued = db.scalar(
+        select(jobs.c.id).where(jobs.c.key == job.key, jobs.c.status == "queued")
+    )
+    if requeued is not None:
+        # The same work was queued again meanwhile; that job covers this one.
+        db.execute(delete(jobs).where(mine))
+        return
+    db.execute(
+        update(jobs)
+        .where(mine)
+        .values(
+            status="queued",
+            run_at=datetime.now(timezone.utc) + backoff(job.attempts),
+            locked_by=None,
+            locked_at=None,
+            last_error=error,
+        )
+    )
+
+
+def run(db: Session, job) -> None:
+    """Run one claimed job's handler; raises whatever the handler raises."""
+    spec, handler = _BY_KIND.get(job.kind, (None, None))
+    if spec is None:
+        raise LookupError(f"no handler for job kind {job.kind!r}")
+    handler(db, spec.model_validate(job.payload))
+
+
+def work(
+    db: Session, worker: str, limit: int = BATCH_SIZE, lease: timedelta = LEASE
+) -> tuple[int, int]:
+    """Claim one batch and run it; returns ``(succeeded, failed)``.
+
+    Each job runs in its own transaction together with its removal from the
+    queue, so one failing job does not undo the others.
+    """
+    claimed = claim(db, worker, limit, lease=lease)
+    db.commit()
+    succeeded = failed = 0
+    for job in claimed:
+        try:
+            run(db, job)
+            _finish(db, job, worker)
+            db.commit()
+            succeeded += 1
+        except Exception as exc:
+            db.rollback()
+            _fail(db, job, worker, f"{type(exc).__name__}: {exc}")
+            db.commit()
+            failed += 1
+    return succeeded, failed
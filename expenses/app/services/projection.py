@@ -0,0 +1,74 @@
+"""Sparse fieldsets: ``?fields=id,amount,category`` on expense reads.
+
+Each requested field maps to the columns it needs, so the ``SELECT`` list
+shrinks together with the payload. ``amount`` reads ``amount_minor`` and
+``currency``. ``category`` adds the category lookup only when it is asked
+for. ``tags`` costs one indexed lookup per page, and only when requested.
+Rows come back as plain dicts, without building ORM objects or validating
+full ``ExpenseRead`` models.
+"""
+from collections.abc import Iterable
+
+from sqlalchemy.orm import Session
+
+from app.db.currency import to_major
+from app.db.models import Expense
+from app.schema.exp import ExpenseRead
+from app.services import tags
+
+FIELDS = tuple(ExpenseRead.model_fields)
+
+
+class UnknownField(ValueError):
+    """A requested field that the resource does not have."""
+
+
+def parse(value: str | None, allowed: Iterable[str] = FIELDS) -> list[str] | None:
+    """Requested fields in request order, or ``None`` for all of them."""
+    if value is None:
+        return None
+    allowed = list(allowed)
+    fields = list(dict.fromkeys(name.strip() for name in value.split(",") if name.strip()))
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise UnknownField(
+            f"unknown fields: {', '.join(unknown)}; choose from {', '.join(allowed)}"
+        )
+    if not fields:
+        raise UnknownField("fields must name at least one field")
+    return fields
+
+
+def columns(fields: list[str], *always: str) -> list:
+    """Columns to select for ``fields``; ``id`` and ``always`` are selected regardless."""
+    wanted = dict.fromkeys(["id", *always, *fields])
+    selected = []
+    for name in wanted:
+        if name == "tags":
+            continue
+        if name == "amount":
+            selected += [Expense.amount_minor, Expense.currency]
+        else:
+            selected.append(getattr(Expense, name))
+    # ``amount`` already brings ``currency``; select each column once.
+    return list({column.key: column for column in selected}.values())
+
+
+def rows(db: Session, result: Iterable, fields: list[str]) -> list[dict]:
+    """Project selected rows onto ``fields``, converting amounts and attaching tags."""
+    plain = [name for name in fields if name not in ("amount", "tags")]
+    items = []
+    ids = []
+    for row in result:
+        values = row._mapping
+        item = {name: values[name] for name in plain}
+        if "amount" in fields:
+            item["amount"] = to_major(values["amount_minor"], values["currency"])
+        items.append(item)
+        ids.append(values["id"])
+    if "tags" in fields:
+        labels = tags.tags_for(db, ids)
+        for item, expense_id in zip(items, ids):
+            item["tags"] = labels.get(expense_id, [])
+    # Keep the order the client asked for.
+    return [{name: item[name] for name in fields} for item in items]
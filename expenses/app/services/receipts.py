@@ -0,0 +1,275 @@
+"""Receipt files in a content-addressed store on local disk.
+
+Each distinct file is written once, to
+``<EXPENSES_RECEIPTS_PATH>/ab/cd/<sha256>``, however many expenses or users
+attach the same bytes. An :class:`ExpenseReceipt` row links an expense to
+the digest of each file it carries. Uploads are parsed straight off the
+request stream and hashed as they are written, so a receipt is never held
+in memory or spooled to disk twice. Downloads are served from the stored
+file, which lets the server answer ``Range`` requests and hand the file to
+``sendfile`` where it can. Files that no shard links to any more are
+removed by ``python -m app.cli.receipts prune``.
+"""
+import asyncio
+from collections.abc import AsyncIterable, Callable
+from datetime import datetime, timezone
+import hashlib
+import os
+from pathlib import Path
+import tempfile
+import time
+
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.models import Expense, ExpenseReceipt
+
+FIELD = b"file"
+_INCOMING = ".incoming"
+_SNIFF_BYTES = 12
+_MAX_HEADER_BYTES = 8192
+
+
+class ReceiptRejected(ValueError):
+    """The upload is not something this service stores as a receipt."""
+
+
+class ReceiptTooLarge(ReceiptRejected):
+    pass
+
+
+class UnsupportedReceipt(ReceiptRejected):
+    pass
+
+
+def root() -> Path:
+    return Path(get_settings().receipts_path)
+
+
+def blob_path(digest: str) -> Path:
+    return root() / digest[:2] / digest[2:4] / digest
+
+
+def sniff(head: bytes) -> str | None:
+    """Media type from the leading bytes; what the client claims is never trusted."""
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:8] == b"ftyp" and head[8:12] in (b"heic", b"heix", b"mif1"):
+        return "image/heic"
+    return None
+
+
+class _Upload:
+    """Multipart parser callbacks that write the ``file`` part into the store."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.field = bytearray()
+        self.value = bytearray()
+        self.headers: dict[bytes, bytes] = {}
+        self.writing = False
+        self.done = False
+        self.file: tempfile._TemporaryFileWrapper | None = None
+        self.filename = "receipt"
+        self.content_type: str | None = None
+        self.head = b""
+        self.size = 0
+        self.hash = hashlib.sha256()
+
+    def callbacks(self) -> dict[str, Callable]:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self) -> None:
+        self.headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self.field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self.value += data[start:end]
+        if len(self.field) + len(self.value) > _MAX_HEADER_BYTES:
+            raise ReceiptRejected("multipart part header is too large")
+
+    def on_header_end(self) -> None:
+        self.headers[bytes(self.field).lower()] = bytes(self.value)
+        self.field.clear()
+        self.value.clear()
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self.headers.get(b"content-disposition"))
+        # Only the first part named "file" is stored; other fields are skipped unread.
+        self.writing = options.get(b"name") == FIELD and not self.done
+        if not self.writing:
+            return
+        name = options.get(b"filename", b"").decode("utf-8", "replace")
+        self.filename = os.path.basename(name.replace("\\", "/")).strip()[:255] or "receipt"
+        incoming = root() / _INCOMING
+        incoming.mkdir(parents=True, exist_ok=True)
+        self.file = tempfile.NamedTemporaryFile(dir=incoming, delete=False)
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self.writing:
+            return
+        chunk = data[start:end]
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise ReceiptTooLarge(f"receipts are limited to {self.max_bytes} bytes")
+        if self.content_type is None:
+            self.head = (self.head + chunk)[:_SNIFF_BYTES]
+            if len(self.head) == _SNIFF_BYTES:
+                self._sniff()
+        self.hash.update(chunk)
+        self.file.write(chunk)
+
+    def on_part_end(self) -> None:
+        if self.writing:
+            if self.content_type is None:
+                self._sniff()
+            self.writing = False
+            self.done = True
+
+    def _sniff(self) -> None:
+        self.content_type = sniff(self.head)
+        if self.content_type is None:
+            raise UnsupportedReceipt("receipts must be JPEG, PNG, WebP, HEIC or PDF files")
+
+    def store(self) -> ExpenseReceipt:
+        """Move the finished file to its digest path, unless it is stored already."""
+        if self.writing:
+            raise ReceiptRejected("the upload ended inside the file part")
+        if not self.done:
+            raise ReceiptRejected(f"the upload has no {FIELD.decode()!r} file part")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        digest = self.hash.hexdigest()
+        target = blob_path(digest)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            # Already stored; a fresh mtime keeps prune() from taking it away.
+            os.utime(target)
+        except FileNotFoundError:
+            os.replace(self.file.name, target)
+        else:
+            os.unlink(self.file.name)
+        self.file = None
+        return ExpenseReceipt(
+            sha256=digest,
+            filename=self.filename,
+            content_type=self.content_type,
+            size=self.size,
+        )
+
+    def discard(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            Path(self.file.name).unlink(missing_ok=True)
+
+
+async def receive(content_type: str | None, body: AsyncIterable[bytes]) -> ExpenseReceipt:
+    """Stream the ``file`` part of a multipart body into the store.
+
+    Returns an unsaved link carrying the file's digest, size and sniffed
+    media type, for :func:`attach`.
+    """
+    mime, options = parse_options_header(content_type)
+    boundary = options.get(b"boundary")
+    if mime != b"multipart/form-data" or not boundary:
+        raise ReceiptRejected("expected a multipart/form-data upload")
+    upload = _Upload(get_settings().receipt_max_bytes)
+    parser = MultipartParser(boundary, upload.callbacks())
+    try:
+        async for chunk in body:
+            parser.write(chunk)
+        parser.finalize()
+        return await asyncio.to_thread(upload.store)
+    except MultipartParseError as exc:
+        raise ReceiptRejected("malformed multipart upload") from exc
+    finally:
+        upload.discard()
+
+
+def attach(db: Session, expense: Expense, receipt: ExpenseReceipt) -> ExpenseReceipt:
+    """Link a received file to ``expense``; the same file twice keeps the first link."""
+    existing = db.get(ExpenseReceipt, (expense.id, receipt.sha256))
+    if existing is not None:
+        return existing
+    receipt.expense_id = expense.id
+    receipt.user_id = expense.user_id
+    receipt.created_at = datetime.now(timezone.utc)
+    db.add(receipt)
+    db.commit()
+    return receipt
+
+
+def receipts_for(db: Session, user_id: int, expense_id: int) -> list[ExpenseReceipt]:
+    return list(
+        db.scalars(
+            select(ExpenseReceipt)
+            .where(ExpenseReceipt.user_id == user_id, ExpenseReceipt.expense_id == expense_id)
+            .order_by(ExpenseReceipt.created_at, ExpenseReceipt.sha256)
+        )
+    )
+
+
+def find(db: Session, user_id: int, expense_id: int, digest: str) -> ExpenseReceipt | None:
+    receipt = db.get(ExpenseReceipt, (expense_id, digest))
+    if receipt is None or receipt.user_id != user_id:
+        return None
+    return receipt
+
+
+def detach(db: Session, user_id: int, expense_id: int, digest: str) -> bool:
+    """Remove one link; the file stays until :func:`prune` finds it unused."""
+    deleted = db.execute(
+        delete(ExpenseReceipt).where(
+            ExpenseReceipt.user_id == user_id,
+            ExpenseReceipt.expense_id == expense_id,
+            ExpenseReceipt.sha256 == digest,
+        )
+    ).rowcount
+    db.commit()
+    return deleted > 0
+
+
+def linked_digests(db: Session) -> set[str]:
+    return set(db.scalars(select(ExpenseReceipt.sha256).distinct()))
+
+
+def prune(linked: set[str], grace_seconds: float, dry_run: bool = False) -> tuple[int, int]:
+    """Delete stored files not in ``linked``; returns ``(files, bytes)`` removed.
+
+    Files touched within ``grace_seconds`` are kept, which covers uploads
+    whose link has not been committed yet, as well as abandoned partial
+    uploads that are still being written.
+    """
+    cutoff = time.time() - grace_seconds
+    unused = [path for path in root().glob("??/??/*") if path.name not in linked]
+    unused += (root() / _INCOMING).glob("*")
+    files = size = 0
+    for path in unused:
+        stat = path.stat()
+        if stat.st_mtime >= cutoff:
+            continue
+        files += 1
+        size += stat.st_size
+        if not dry_run:
+            path.unlink(missing_ok=True)
+    return files, size
@@ -0,0 +1,165 @@
+"""Materialize recurring expense templates into expenses in bulk.
+
+Each template stores its next occurrence in ``next_run_at``. A run pages
+through due templates in ``(next_run_at, id)`` index order. For each batch
+it computes every missed occurrence in Python, inserts all of them with a
+single multi-row ``INSERT``, moves ``next_run_at`` forward with a bulk
+``UPDATE`` by primary key, and commits. The work per batch is a handful of
+statements, however many templates it holds.
+
+Re-running is harmless. Occurrences are keyed by ``(recurring_id,
+created_at)``, and the insert skips keys that already exist, so a run that
+died between its insert and its commit leaves nothing to repeat. On
+PostgreSQL due templates are claimed with ``FOR UPDATE SKIP LOCKED``, so
+overlapping runs share the work instead of waiting on each other.
+Materialized expenses are fingerprinted for duplicate detection and count
+towards budgets, but are neither anomaly-scored nor part of the category
+statistics, since they are expected by construction.
+"""
+import calendar
+from datetime import date, datetime, timezone
+
+from sqlalchemy import and_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.db.currency import to_major
+from app.db.models import Category, Expense, RecurringExpense
+from app.db.partitions import add_months, month_start
+from app.services import budgets
+from app.services.archive import as_utc
+from app.services.dedupe import fingerprint
+
+BATCH_SIZE = 1000
+
+
+def _on_day(month: date, day: int) -> datetime:
+    last = calendar.monthrange(month.year, month.month)[1]
+    return datetime(month.year, month.month, min(day, last), tzinfo=timezone.utc)
+
+
+def first_run(starts_on: date, day_of_month: int, ends_on: date | None = None) -> datetime | None:
+    """The first occurrence on or after ``starts_on``, or ``None`` if it is past ``ends_on``."""
+    run = _on_day(month_start(starts_on), day_of_month)
+    if run.date() < starts_on:
+        run = _on_day(add_months(month_start(starts_on), 1), day_of_month)
+    if ends_on is not None and run.date() > ends_on:
+        return None
+    return run
+
+
+def schedule(
+    next_run: datetime,
+    day_of_month: int,
+    interval_months: int,
+    ends_on: date | None,
+    now: datetime,
+) -> tuple[list[datetime], datetime | None]:
+    """Occurrences due by ``now`` from ``next_run`` on, and the one after them."""
+    runs = []
+    while next_run is not None and next_run <= now:
+        runs.append(next_run)
+        next_run = _on_day(add_months(month_start(next_run), interval_months), day_of_month)
+        if ends_on is not None and next_run.date() > ends_on:
+            next_run = None
+    return runs, next_run
+
+
+def _insert_occurrences(db: Session):
+    dialect = {"postgresql": postgresql, "sqlite": sqlite}[db.get_bind().dialect.name]
+    expenses = Expense.__table__
+    # Core rather than ORM bulk insert: no per-row mapper bookkeeping.
+    return (
+        dialect.insert(expenses)
+        .on_conflict_do_nothing(index_elements=["recurring_id", "created_at"])
+        .returning(
+            expenses.c.user_id,
+            expenses.c.category_id,
+            expenses.c.currency,
+            expenses.c.created_at,
+            expenses.c.amount_minor,
+        )
+    )
+
+
+def materialize(
+    db: Session,
+    now: datetime | None = None,
+    ids: list[int] | None = None,
+    batch_size: int = BATCH_SIZE,
+) -> tuple[int, int]:
+    """Create every occurrence due by ``now``; returns ``(templates, expenses created)``.
+
+    ``ids`` limits the run to those templates, e.g. one that was just created.
+    """
+    now = now or datetime.now(timezone.utc)
+    query = (
+        select(
+            RecurringExpense.id,
+            RecurringExpense.user_id,
+            RecurringExpense.category_id,
+            Category.name,
+            RecurringExpense.amount_minor,
+            RecurringExpense.currency,
+            RecurringExpense.merchant,
+            RecurringExpense.note,
+            RecurringExpense.day_of_month,
+            RecurringExpense.interval_months,
+            RecurringExpense.ends_on,
+            RecurringExpense.next_run_at,
+        )
+        .join(
+            Category,
+            and_(
+                Category.user_id == RecurringExpense.user_id,
+                Category.id == RecurringExpense.category_id,
+            ),
+        )
+        .where(RecurringExpense.next_run_at <= now)
+        .order_by(RecurringExpense.next_run_at, RecurringExpense.id)
+        .limit(batch_size)
+        .with_for_update(of=RecurringExpense, skip_locked=True)
+    )
+    if ids is not None:
+        query = query.where(RecurringExpense.id.in_(ids))
+
+    templates = created = 0
+    while True:
+        due = db.execute(query).all()
+        if not due:
+            return templates, created
+        occurrences, advances = [], []
+        for template in due:
+            runs, next_run = schedule(
+                as_utc(template.next_run_at),
+                template.day_of_month,
+                template.interval_months,
+                template.ends_on,
+                now,
+            )
+            amount = to_major(template.amount_minor, template.currency)
+            occurrences += [
+                {
+                    "user_id": template.user_id,
+                    "category_id": template.category_id,
+                    "amount_minor": template.amount_minor,
+                    "currency": template.currency,
+                    "merchant": template.merchant,
+                    "note": template.note,
+                    "created_at": run,
+                    "is_anomaly": False,
+                    "fingerprint": fingerprint(
+                        template.user_id, amount, template.currency, template.name, run
+                    ),
+                    "recurring_id": template.id,
+                }
+                for run in runs
+            ]
+            advances.append({"id": template.id, "next_run_at": next_run})
+        if occurrences:
+            inserted = db.execute(_insert_occurrences(db), occurrences).mappings().all()
+            budgets.add_rows(db, inserted)
+            created += len(inserted)
+        db.execute(update(RecurringExpense), advances)
+        db.commit()
+        templates += len(due)
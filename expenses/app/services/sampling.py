@@ -0,0 +1,134 @@
+"""Uniform random samples of a user's hot expenses for approximate reports.
+
+:func:`draw` first counts the matching rows on the ``(user_id,
+created_at)`` index. When that count is within the sample size, sampling
+gains nothing: it returns ``None`` and callers compute the exact answer.
+Otherwise it samples in one of two ways:
+
+- ``TABLESAMPLE SYSTEM`` on PostgreSQL, when the user owns enough of the
+  table that the sampled pages hold fewer rows than the user has in range.
+  Whole pages are sampled. Expenses inserted together share a page and
+  tend to resemble each other, so the intervals can come out somewhat
+  narrow.
+- Otherwise, and always on SQLite, a reservoir sample. The database keeps
+  the matching ids with the ``size`` smallest random keys in a bounded
+  top-N sort, and only those rows are read in full.
+
+:func:`estimate` scales sample sums up to the known row count. Its 95%
+intervals use the normal approximation for a simple random sample, with
+the finite-population correction.
+"""
+from collections.abc import Sequence
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import func, select, tablesample, text
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import get_settings
+from app.db.models import Expense
+from app.services import tags
+
+Z = 1.959963984540054  # two-sided 95%
+
+
+class Sample:
+    """``rows`` drawn at random from the ``population`` rows that matched.
+
+    Each row is ``(category_id, currency, amount_minor, day, epoch)``.
+    """
+
+    def __init__(self, rows: Sequence, population: int) -> None:
+        self.rows = rows
+        self.population = population
+
+    @property
+    def fraction(self) -> float:
+        return len(self.rows) / self.population
+
+
+def _where(entity, user_id, start, end, tagged) -> list:
+    clauses = [entity.user_id == user_id]
+    if start is not None:
+        clauses.append(entity.created_at >= start)
+    if end is not None:
+        clauses.append(entity.created_at < end)
+    if tagged:
+        clauses.append(entity.id.in_(tags.tagged_ids(user_id, tagged, start, end)))
+    return clauses
+
+
+def _columns(entity) -> tuple:
+    return (
+        entity.category_id,
+        entity.currency,
+        entity.amount_minor,
+        func.date(entity.created_at),
+        func.extract("epoch", entity.created_at),
+    )
+
+
+def _table_rows(db: Session) -> float:
+    """PostgreSQL's estimate of all rows in ``expenses``, summed over its partitions."""
+    return float(
+        db.scalar(
+            text(
+                # A partitioned parent counts its partitions' rows again.
+                "SELECT coalesce(sum(greatest(c.reltuples, 0)), 0) FROM pg_class c "
+                "WHERE c.relkind = 'r' AND (c.oid = 'expenses'::regclass OR c.oid IN "
+                "(SELECT inhrelid FROM pg_inherits WHERE inhparent = 'expenses'::regclass))"
+            )
+        )
+    )
+
+
+def draw(
+    db: Session,
+    user_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    size: int | None = None,
+    tagged: list[str] | None = None,
+) -> Sample | None:
+    """About ``size`` random hot expenses in range, or ``None`` if there are no more than that.
+
+    ``size`` defaults to ``EXPENSES_APPROX_SAMPLE_ROWS``. ``tagged`` limits
+    the rows to expenses carrying every given tag.
+    """
+    size = size or get_settings().approx_sample_rows
+    where = _where(Expense, user_id, start, end, tagged)
+    population = db.scalar(select(func.count()).select_from(Expense).where(*where))
+    if population <= size:
+        return None
+
+    if db.get_bind().dialect.name == "postgresql":
+        table_rows = _table_rows(db)
+        if 0 < table_rows * size / population <= population:
+            sampled = aliased(Expense, tablesample(Expense, func.system(100 * size / population)))
+            rows = db.execute(
+                select(*_columns(sampled)).where(*_where(sampled, user_id, start, end, tagged))
+            ).all()
+            if len(rows) > 1:
+                return Sample(rows, population)
+
+    ids = select(Expense.id).where(*where).order_by(func.random()).limit(size)
+    rows = db.execute(select(*_columns(Expense)).where(Expense.id.in_(ids))).all()
+    return Sample(rows, population)
+
+
+def estimate(
+    population: int,
+    sampled: int,
+    sums: np.ndarray,
+    squares: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Population totals and their 95% half-widths, per group.
+
+    ``sums`` and ``squares`` hold each group's sum of values and of squared
+    values over the ``sampled`` rows. A row outside a group counts as zero
+    for that group.
+    """
+    mean = sums / sampled
+    variance = np.maximum(squares - sampled * mean**2, 0) / max(sampled - 1, 1)
+    half = Z * population * np.sqrt(variance / sampled * max(1 - sampled / population, 0))
+    return population * mean, half
@@ -0,0 +1,95 @@
+"""Ranked full-text search over a user's merchants and notes.
+
+On PostgreSQL the query is matched against the :data:`app.db.search.DOCUMENT`
+expression index with ``websearch_to_tsquery``, so quoted phrases, ``or``
+and ``-word`` work as users expect. Merchants are also matched by trigram
+similarity when ``pg_trgm`` is installed, so ``starbuks`` still finds
+Starbucks. On SQLite every word becomes an FTS5 prefix query ranked by
+``bm25``. Only expenses still in the database are searched, not archived
+ones.
+"""
+import re
+import threading
+
+from sqlalchemy import Float, Select, column, func, literal_column, or_, select, table, text
+from sqlalchemy.orm import Session
+
+from app.db import search as search_index
+from app.db.models import Expense
+
+_WORDS = re.compile(r"\w+", re.UNICODE)
+_FTS = table(search_index.FTS_TABLE, column("rowid"), column("user_id"))
+
+
+class SearchUnsupported(RuntimeError):
+    """The database is neither PostgreSQL nor SQLite, so there is no text index to search."""
+
+
+_trigram: dict[str, bool] = {}
+_lock = threading.Lock()
+
+
+def _uses_trigram(db: Session) -> bool:
+    bind = db.get_bind()
+    key = bind.url.render_as_string(hide_password=True)
+    with _lock:
+        if key not in _trigram:
+            with bind.connect() as conn:
+                _trigram[key] = search_index.has_trigram(conn)
+        return _trigram[key]
+
+
+def _postgresql(db: Session, user_id: int, query: str) -> Select:
+    document = literal_column(search_index.DOCUMENT)
+    tsquery = func.websearch_to_tsquery(literal_column("'english'::regconfig"), query)
+    match = document.op("@@")(tsquery)
+    rank = func.ts_rank_cd(document, tsquery, type_=Float)
+    if _uses_trigram(db):
+        match = or_(match, Expense.merchant.op("%")(query))
+        rank = func.greatest(rank, func.similarity(Expense.merchant, query), type_=Float)
+    return select(Expense, rank.label("rank")).where(Expense.user_id == user_id, match)
+
+
+def _sqlite(user_id: int, query: str) -> Select | None:
+    words = _WORDS.findall(query)
+    if not words:
+        return None
+    # Quoted prefix terms: user input can never be read as FTS5 syntax.
+    pattern = " ".join('"{}"*'.format(word.replace('"', "")) for word in words)
+    rank = -func.bm25(literal_column(search_index.FTS_TABLE), 2.0, 1.0)
+    return (
+        select(Expense, rank.label("rank"))
+        .join(_FTS, _FTS.c.rowid == Expense.id)
+        .where(
+            text(f"{search_index.FTS_TABLE} MATCH :pattern").bindparams(pattern=pattern),
+            _FTS.c.user_id == user_id,
+        )
+    )
+
+
+def search_expenses(
+    db: Session,
+    user_id: int,
+    query: str,
+    skip: int = 0,
+    limit: int = 20,
+) -> list[tuple[Expense, float]]:
+    """One page of ``(expense, rank)`` matches, best first then newest first.
+
+    Raises :class:`SearchUnsupported` on any other database than PostgreSQL
+    or SQLite.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        statement = _postgresql(db, user_id, query)
+    elif dialect == "sqlite":
+        statement = _sqlite(user_id, query)
+    else:
+        raise SearchUnsupported(f"search is not supported on {dialect}")
+    if statement is None:
+        return []
+    statement = statement.order_by(
+        literal_column("rank").desc(), Expense.created_at.desc(), Expense.id.desc()
+    )
+    rows = db.execute(statement.offset(skip).limit(limit)).all()
+    return [(expense, float(rank or 0.0)) for expense, rank in rows]
@@ -0,0 +1,241 @@
+"""Zero-filled spend series per day, week or month, for charts.
+
+Buckets are UTC calendar days, ISO weeks (starting Monday) or months, and
+cover ``[start, end)``. On PostgreSQL a single statement groups the
+expenses by ``date_trunc``, joins them to a ``generate_series`` of every
+bucket so that empty buckets come back as zeros, and computes running
+totals with ``sum() OVER``. Elsewhere expenses are grouped per day in SQL
+and the days are folded into buckets with ``np.bincount``. Archived
+expenses are folded in the same way.
+
+Series are returned as parallel arrays, one value per bucket, which keeps
+a multi-year daily series to a few kilobytes.
+"""
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.db.currency import scales
+from app.db.models import Expense
+from app.db.partitions import add_months, month_start
+from app.schema.series import ExpenseSeries, SeriesLine
+from app.services import archive
+
+MAX_BUCKETS = 5000
+
+_PG_SERIES = text(
+    """
+    WITH totals AS (
+        SELECT currency,
+               date_trunc(:unit, created_at AT TIME ZONE 'UTC') AS bucket,
+               count(*) AS n,
+               sum(amount_minor) AS minor
+        FROM expenses
+        WHERE user_id = :user_id AND created_at >= :start AND created_at < :end
+        GROUP BY 1, 2
+    ),
+    buckets AS (
+        SELECT generate_series(
+            CAST(:first AS timestamp), CAST(:last AS timestamp), CAST(:step AS interval)
+        ) AS bucket
+    )
+    SELECT c.currency,
+           coalesce(t.n, 0),
+           coalesce(t.minor, 0),
+           sum(coalesce(t.minor, 0)) OVER (PARTITION BY c.currency ORDER BY b.bucket)
+    FROM (SELECT DISTINCT currency FROM totals) AS c
+    CROSS JOIN buckets AS b
+    LEFT JOIN totals AS t ON t.currency = c.currency AND t.bucket = b.bucket
+    ORDER BY c.currency, b.bucket
+    """
+)
+
+
+class TooManyBuckets(ValueError):
+    """The range holds more than :data:`MAX_BUCKETS` buckets."""
+
+
+def _first_bucket(day: date, interval: str) -> date:
+    if interval == "week":
+        return day - timedelta(days=day.weekday())
+    if interval == "month":
+        return month_start(day)
+    return day
+
+
+def _next_bucket(bucket: date, interval: str) -> date:
+    if interval == "month":
+        return add_months(bucket, 1)
+    return bucket + timedelta(days=7 if interval == "week" else 1)
+
+
+def bucket_starts(start: datetime, end: datetime, interval: str) -> list[date]:
+    """First day of every bucket that overlaps ``[start, end)``."""
+    start, end = archive.as_utc(start), archive.as_utc(end)
+    buckets, bucket = [], _first_bucket(start.date(), interval)
+    last = (end - timedelta(microseconds=1)).date()
+    while bucket <= last:
+        if len(buckets) == MAX_BUCKETS:
+            raise TooManyBuckets(
+                f"more than {MAX_BUCKETS} {interval} buckets; use a longer interval or a shorter range"
+            )
+        buckets.append(bucket)
+        bucket = _next_bucket(bucket, interval)
+    return buckets
+
+
+def _ordinals(days: np.ndarray, interval: str) -> np.ndarray:
+    """Bucket numbers of ``datetime64[D]`` days, consecutive within an interval."""
+    if interval == "month":
+        return days.astype("datetime64[M]").astype(np.int64)
+    ordinal = days.astype(np.int64)
+    # 1970-01-01 was a Thursday; shifting by three days starts weeks on Monday.
+    return (ordinal + 3) // 7 if interval == "week" else ordinal
+
+
+def _fold(
+    lines: dict[str, list[np.ndarray]],
+    currencies: np.ndarray,
+    days: np.ndarray,
+    counts: np.ndarray,
+    minor: np.ndarray,
+    interval: str,
+    first: date,
+    size: int,
+) -> None:
+    """Add per-day totals into the per-currency ``[counts, minor]`` arrays."""
+    origin = _ordinals(np.array([first], dtype="datetime64[D]"), interval)[0]
+    index = _ordinals(days, interval) - origin
+    for currency in np.unique(currencies):
+        mask = currencies == currency
+        line = lines.setdefault(
+            str(currency), [np.zeros(size, dtype=np.int64), np.zeros(size, dtype=np.int64)]
+        )
+        line[0] += np.bincount(index[mask], weights=counts[mask], minlength=size).astype(np.int64)
+        line[1] += np.rint(
+            np.bincount(index[mask], weights=minor[mask], minlength=size)
+        ).astype(np.int64)
+
+
+def _hot_postgresql(
+    db: Session, user_id: int, start: datetime, end: datetime, interval: str, buckets: list[date]
+) -> tuple[dict[str, list[np.ndarray]], dict[str, np.ndarray]]:
+    rows = db.execute(
+        _PG_SERIES,
+        {
+            "unit": interval,
+            "user_id": user_id,
+            "start": start,
+            "end": end,
+            "first": buckets[0],
+            "last": buckets[-1],
+            "step": f"1 {interval}",
+        },
+    ).all()
+    if not rows:
+        return {}, {}
+    currencies = [row[0] for row in rows[:: len(buckets)]]
+    # One row per currency and bucket, ordered by both: reshape, don't loop.
+    counts, minor, cumulative = (
+        np.array([row[1:] for row in rows], dtype=np.int64).T.reshape(3, len(currencies), -1)
+    )
+    lines = {code: [counts[i], minor[i]] for i, code in enumerate(currencies)}
+    running = {code: cumulative[i] for i, code in enumerate(currencies)}
+    return lines, running
+
+
+def _hot_by_day(
+    db: Session, user_id: int, start: datetime, end: datetime, interval: str, buckets: list[date]
+) -> dict[str, list[np.ndarray]]:
+    day = func.date(Expense.created_at)
+    rows = db.execute(
+        select(Expense.currency, day, func.count(), func.sum(Expense.amount_minor))
+        .where(Expense.user_id == user_id, Expense.created_at >= start, Expense.created_at < end)
+        .group_by(Expense.currency, day)
+    ).all()
+    lines: dict[str, list[np.ndarray]] = {}
+    if rows:
+        currencies, days, counts, minor = zip(*rows)
+        _fold(
+            lines,
+            np.array(currencies, dtype=object),
+            np.array(days, dtype="datetime64[D]"),
+            np.array(counts, dtype=np.float64),
+            np.array(minor, dtype=np.float64),
+            interval,
+            buckets[0],
+            len(buckets),
+        )
+    return lines
+
+
+def _fold_archived(
+    db: Session,
+    lines: dict[str, list[np.ndarray]],
+    user_id: int,
+    start: datetime,
+    end: datetime,
+    interval: str,
+    buckets: list[date],
+) -> bool:
+    cold = archive.read_archived(db, user_id, start, end)
+    if not cold.num_rows:
+        return False
+    cold = cold.append_column("day", pc.cast(cold["created_at"], pa.date32()))
+    grouped = cold.group_by(["currency", "day"]).aggregate([("id", "count"), ("amount", "sum")])
+    currencies = np.array(grouped["currency"].to_pylist(), dtype=object)
+    _fold(
+        lines,
+        currencies,
+        grouped["day"].to_numpy().astype("datetime64[D]"),
+        grouped["id_count"].to_numpy().astype(np.float64),
+        grouped["amount_sum"].to_numpy() * scales(currencies),
+        interval,
+        buckets[0],
+        len(buckets),
+    )
+    return True
+
+
+def series(
+    db: Session,
+    user_id: int,
+    start: datetime,
+    end: datetime,
+    interval: str = "day",
+    cumulative: bool = False,
+) -> ExpenseSeries:
+    """Count and total per bucket and currency, zero-filled over ``[start, end)``.
+
+    Raises :class:`TooManyBuckets` for ranges that would need more than
+    :data:`MAX_BUCKETS` buckets.
+    """
+    buckets = bucket_starts(start, end, interval)
+    running: dict[str, np.ndarray] = {}
+    if not buckets:
+        lines = {}
+    elif db.get_bind().dialect.name == "postgresql":
+        lines, running = _hot_postgresql(db, user_id, start, end, interval, buckets)
+    else:
+        lines = _hot_by_day(db, user_id, start, end, interval, buckets)
+    if buckets and archive.reaches_archive(db, user_id, start):
+        if _fold_archived(db, lines, user_id, start, end, interval, buckets):
+            running = {}
+
+    result = []
+    for currency, (counts, minor) in sorted(lines.items()):
+        scale = float(scales([currency])[0])
+        line = SeriesLine(currency=currency, count=counts.tolist(), total=(minor / scale).tolist())
+        if cumulative:
+            totals = running.get(currency)
+            if totals is None:
+                totals = np.cumsum(minor)
+            line.cumulative = (totals / scale).tolist()
+        result.append(line)
+    return ExpenseSeries(
+        interval=interval, start=start, end=end, buckets=buckets, series=result
+    )
@@ -0,0 +1,324 @@
+"""Vectorized per-category statistics over a user's expense amounts.
+
+Only ``category_id``, ``currency``, ``amount_minor`` and the epoch of
+``created_at`` are selected, and rows are streamed in fixed-size chunks that are turned
+straight into NumPy arrays. Each chunk is folded into running per-group
+accumulators (Chan's parallel update for mean/variance, ``bincount`` for a
+fine log-spaced histogram), so memory stays bounded by the chunk size no
+matter how long the history is. Count, total, mean, standard deviation,
+min and max are exact; quantiles and the returned histogram come from the
+fine histogram and are accurate to well under one percent.
+
+With ``approx`` only a random sample of the hot rows is read (see
+app.services.sampling), and archived rows are kept with the same
+probability. Counts, totals and the histogram are then scaled up to the
+whole range. Count, total, mean and the quantiles come with 95% intervals.
+The quantile intervals come from binomial bounds on the sample ranks.
+They are left out when fewer than five sampled values lie beyond the
+quantile.
+"""
+from datetime import datetime, timezone
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db.currency import scales
+from app.db.models import Expense
+from app.schema.stats import AmountHistogram, CategoryStatistics, ExpenseStatistics
+from app.schema.summary import Interval
+from app.services import archive, categories, sampling
+
+CHUNK_ROWS = 50_000
+QUANTILES = np.array([0.5, 0.9, 0.99])
+# Sampled values needed beyond a quantile before approx mode gives it an interval.
+_TAIL_ROWS = 5
+# ~0.9% wide geometric bins from 0.0001 up to 10^12.
+_FINE_EDGES = np.geomspace(1e-4, 1e12, 4097)
+_FINE_BINS = len(_FINE_EDGES) - 1
+
+
+class _Accumulator:
+    """Running statistics for a growing set of (category, currency) groups."""
+
+    def __init__(self) -> None:
+        self.groups: dict[tuple[str, str], int] = {}
+        self.count = np.zeros(0, dtype=np.int64)
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros(0)
+        self.total = np.zeros(0)
+        self.low = np.zeros(0)
+        self.high = np.zeros(0)
+        self.first = np.zeros(0)
+        self.last = np.zeros(0)
+        self.fine = np.zeros((0, _FINE_BINS), dtype=np.int64)
+
+    def _codes(self, categories, currencies, labels: dict | None) -> np.ndarray:
+        keys = np.rec.fromarrays([np.asarray(categories), np.asarray(currencies, dtype=str)])
+        unique, inverse = np.unique(keys, return_inverse=True)
+        mapping = np.empty(len(unique), dtype=np.int64)
+        for index, (category, currency) in enumerate(unique.tolist()):
+            name = labels[category] if labels is not None else category
+            mapping[index] = self.groups.setdefault((name, currency), len(self.groups))
+        self._grow(len(self.groups))
+        return mapping[inverse.ravel()]
+
+    def _grow(self, size: int) -> None:
+        extra = size - len(self.count)
+        if extra <= 0:
+            return
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+        self.mean = np.concatenate([self.mean, np.zeros(extra)])
+        self.m2 = np.concatenate([self.m2, np.zeros(extra)])
+        self.total = np.concatenate([self.total, np.zeros(extra)])
+        self.low = np.concatenate([self.low, np.full(extra, np.inf)])
+        self.high = np.concatenate([self.high, np.full(extra, -np.inf)])
+        self.first = np.concatenate([self.first, np.full(extra, np.inf)])
+        self.last = np.concatenate([self.last, np.full(extra, -np.inf)])
+        self.fine = np.vstack([self.fine, np.zeros((extra, _FINE_BINS), dtype=np.int64)])
+
+    def add(
+        self,
+        categories,
+        currencies,
+        amounts: np.ndarray,
+        epochs: np.ndarray,
+        labels: dict | None = None,
+    ) -> None:
+        """Fold in one chunk; ``labels`` names the categories when they are ids."""
+        if len(amounts) == 0:
+            return
+        codes = self._codes(categories, currencies, labels)
+        size = len(self.groups)
+
+        count = np.bincount(codes, minlength=size)
+        total = np.bincount(codes, weights=amounts, minlength=size)
+        present = count > 0
+        mean = np.divide(total, count, out=np.zeros(size), where=present)
+        m2 = np.bincount(codes, weights=(amounts - mean[codes]) ** 2, minlength=size)
+
+        # Chan et al. pairwise combination of (count, mean, M2).
+        combined = self.count + count
+        delta = mean - self.mean
+        safe = np.maximum(combined, 1)
+        self.m2 += m2 + delta**2 * self.count * count / safe
+        self.mean += delta * count / safe
+        self.count = combined
+        self.total += total
+
+        np.minimum.at(self.low, codes, amounts)
+        np.maximum.at(self.high, codes, amounts)
+        np.minimum.at(self.first, codes, epochs)
+        np.maximum.at(self.last, codes, epochs)
+
+        bins = np.clip(np.searchsorted(_FINE_EDGES, amounts, side="right") - 1, 0, _FINE_BINS - 1)
+        self.fine += np.bincount(
+            codes * _FINE_BINS + bins, minlength=size * _FINE_BINS
+        ).reshape(size, _FINE_BINS)
+
+
+def _order_statistics(
+    fine: np.ndarray,
+    cumulative: np.ndarray,
+    positions: np.ndarray,
+    count: int,
+    low: float,
+    high: float,
+) -> np.ndarray:
+    """The values at 0-based ``positions`` in sorted order, placed geometrically in their bin.
+
+    The smallest and largest values are known exactly.
+    """
+    bins = np.searchsorted(cumulative, positions, side="right")
+    before = np.where(bins > 0, cumulative[bins - 1], 0)
+    fraction = (positions - before + 0.5) / fine[bins]
+    lower, upper = _FINE_EDGES[bins], _FINE_EDGES[bins + 1]
+    values = np.clip(lower * (upper / lower) ** fraction, low, high)
+    values = np.where(positions == 0, low, values)
+    return np.where(positions == count - 1, high, values)
+
+
+def _quantiles(
+    fine: np.ndarray,
+    count: int,
+    low: float,
+    high: float,
+    quantiles: np.ndarray = QUANTILES,
+) -> np.ndarray:
+    """Quantiles with numpy's "linear" method, from the fine histogram.
+
+    Like ``np.quantile``, each quantile interpolates linearly between the
+    order statistics just below and above its rank.
+    """
+    cumulative = np.cumsum(fine)
+    ranks = quantiles * (count - 1)
+    below = np.floor(ranks)
+    above = np.minimum(below + 1, count - 1)
+    lower = _order_statistics(fine, cumulative, below, count, low, high)
+    upper = _order_statistics(fine, cumulative, above, count, low, high)
+    return lower + (ranks - below) * (upper - lower)
+
+
+def _histogram(
+    fine: np.ndarray, low: float, high: float, bins: int, scale: float = 1.0
+) -> AmountHistogram:
+    if low == high:
+        return AmountHistogram(edges=[low, high], counts=[int(round(fine.sum() * scale))])
+    edges = np.geomspace(low, high, bins + 1)
+    occupied = np.flatnonzero(fine)
+    centers = np.sqrt(_FINE_EDGES[occupied] * _FINE_EDGES[occupied + 1])
+    target = np.clip(np.searchsorted(edges, centers, side="right") - 1, 0, bins - 1)
+    counts = np.bincount(target, weights=fine[occupied], minlength=bins)
+    return AmountHistogram(
+        edges=np.round(edges, 4).tolist(),
+        counts=np.round(counts * scale).astype(np.int64).tolist(),
+    )
+
+
+def _timestamp(epoch: float) -> datetime:
+    return datetime.fromtimestamp(epoch, tz=timezone.utc)
+
+
+def _hot_chunks(db: Session, user_id: int, start: datetime | None, end: datetime | None):
+    query = select(
+        Expense.category_id,
+        Expense.currency,
+        Expense.amount_minor,
+        func.extract("epoch", Expense.created_at),
+    ).where(Expense.user_id == user_id)
+    if start is not None:
+        query = query.where(Expense.created_at >= start)
+    if end is not None:
+        query = query.where(Expense.created_at < end)
+    result = db.execute(query.execution_options(yield_per=CHUNK_ROWS))
+    for rows in result.partitions():
+        yield zip(*rows), len(rows)
+
+
+def _sampled_chunks(sample: sampling.Sample):
+    category_ids, currencies, amounts, _, epochs = zip(*sample.rows)
+    yield (category_ids, currencies, amounts, epochs), len(sample.rows)
+
+
+def _interval(low: float, high: float) -> Interval:
+    return Interval(low=round(float(low), 4), high=round(float(high), 4))
+
+
+def compute_statistics(
+    db: Session,
+    user_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    bins: int = 20,
+    approx: bool = False,
+    sample_size: int | None = None,
+) -> ExpenseStatistics:
+    """Statistics per category and currency over the range.
+
+    With ``approx``, ranges of more than ``sample_size`` hot rows are
+    estimated from a sample of that size.
+    """
+    accumulator = _Accumulator()
+    sample = sampling.draw(db, user_id, start, end, sample_size) if approx else None
+
+    chunks = _hot_chunks(db, user_id, start, end) if sample is None else _sampled_chunks(sample)
+    for (ids, currencies, amounts, epochs), size in chunks:
+        accumulator.add(
+            np.fromiter(ids, dtype=np.int64, count=size),
+            currencies,
+            np.fromiter(amounts, dtype=np.float64, count=size) / scales(currencies),
+            np.fromiter(epochs, dtype=np.float64, count=size),
+            categories.names(db, user_id, set(ids)),
+        )
+
+    population = sample.population if sample is not None else 0
+    if archive.reaches_archive(db, user_id, start):
+        cold = archive.read_archived(db, user_id, start, end)
+        population += cold.num_rows
+        if sample is not None:
+            cold = cold.filter(np.random.default_rng().random(cold.num_rows) < sample.fraction)
+        for batch in cold.to_batches(max_chunksize=CHUNK_ROWS):
+            created_at = batch.column("created_at").cast("int64").to_numpy()
+            accumulator.add(
+                batch.column("category").to_pylist(),
+                batch.column("currency").to_pylist(),
+                batch.column("amount").to_numpy(),
+                created_at / 1e6,
+            )
+
+    sampled = int(accumulator.count.sum())
+    if sample is not None:
+        # Indicators square to themselves, and M2 gives each group its sum of squares.
+        counts, count_half = sampling.estimate(
+            population, sampled, accumulator.count, accumulator.count
+        )
+        totals, total_half = sampling.estimate(
+            population,
+            sampled,
+            accumulator.total,
+            accumulator.m2 + accumulator.count * accumulator.mean**2,
+        )
+        correction = np.sqrt(max(1 - sampled / population, 0))
+
+    results = []
+    for (category, currency), index in sorted(accumulator.groups.items()):
+        count = int(accumulator.count[index])
+        low, high = float(accumulator.low[index]), float(accumulator.high[index])
+        fine = accumulator.fine[index]
+        median, p90, p99 = _quantiles(fine, count, low, high)
+        std = np.sqrt(accumulator.m2[index] / (count - 1)) if count > 1 else 0.0
+        mean = accumulator.mean[index]
+        total = accumulator.total[index]
+        scale, intervals = 1.0, None
+        if sample is not None:
+            scale = population / sampled
+            # Ranks whose order statistics bound each quantile.
+            spread = sampling.Z * np.sqrt(QUANTILES * (1 - QUANTILES) / count) * correction
+            lower = _quantiles(fine, count, low, high, np.clip(QUANTILES - spread, 0, 1))
+            upper = _quantiles(fine, count, low, high, np.clip(QUANTILES + spread, 0, 1))
+            mean_half = sampling.Z * std / np.sqrt(count) * correction
+            intervals = {
+                # Amounts are positive, so a category has at least what the sample shows.
+                "count": _interval(
+                    max(counts[index] - count_half[index], count),
+                    counts[index] + count_half[index],
+                ),
+                "total": _interval(
+                    max(totals[index] - total_half[index], total),
+                    totals[index] + total_half[index],
+                ),
+                "mean": _interval(mean - mean_half, mean + mean_half),
+                **{
+                    name: _interval(lower[position], upper[position])
+                    for position, name in enumerate(("median", "p90", "p99"))
+                    # Too few sampled values beyond a quantile to bound it.
+                    if min(QUANTILES[position], 1 - QUANTILES[position]) * count >= _TAIL_ROWS
+                },
+            }
+            count, total = int(round(counts[index])), totals[index]
+        results.append(
+            CategoryStatistics(
+                category=category,
+                currency=currency,
+                count=count,
+                total=round(float(total), 2),
+                mean=round(float(mean), 4),
+                median=round(float(median), 4),
+                p90=round(float(p90), 4),
+                p99=round(float(p99), 4),
+                std=round(float(std), 4),
+                min=low,
+                max=high,
+                first_at=_timestamp(accumulator.first[index]),
+                last_at=_timestamp(accumulator.last[index]),
+                histogram=_histogram(fine, low, high, bins, scale),
+                intervals=intervals,
+            )
+        )
+    return ExpenseStatistics(
+        start=start,
+        end=end,
+        categories=results,
+        approximate=sample is not None,
+        sample_size=sampled if sample is not None else None,
+    )
@@ -0,0 +1,303 @@
+"""Per-category totals over a date range, across hot and archived expenses.
+
+Hot rows are grouped by integer ``category_id`` and named afterwards from
+the category dictionary. With a reporting currency, totals are grouped per
+day in SQL so each day's sum is converted at that day's rate in a single
+vectorized step.
+
+With ``approx`` the hot rows are sampled instead (see app.services.sampling).
+The per-category counts and totals are then estimates with 95% intervals,
+to which archived rows are still added exactly. The overall count stays exact.
+A category that the sample missed shows its archived figures only.
+"""
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.db.currency import scales, to_major, to_minor
+from app.db.models import Expense
+from app.schema.summary import CategoryTotal, ExpenseSummary, Interval
+from app.services import archive, categories, fx, sampling, tags
+
+
+def _filtered(
+    query,
+    user_id: int,
+    start: datetime | None,
+    end: datetime | None,
+    tagged: list[str] | None,
+):
+    query = query.filter(Expense.user_id == user_id)
+    if start is not None:
+        query = query.filter(Expense.created_at >= start)
+    if end is not None:
+        query = query.filter(Expense.created_at < end)
+    if tagged:
+        query = query.filter(Expense.id.in_(tags.tagged_ids(user_id, tagged, start, end)))
+    return query
+
+
+def _archived(
+    db: Session,
+    user_id: int,
+    start: datetime | None,
+    end: datetime | None,
+    tagged: list[str] | None,
+) -> pa.Table:
+    cold = archive.read_archived(db, user_id, start, end)
+    if tagged:
+        cold = tags.filter_archived(db, cold, user_id, tagged, start, end)
+    return cold
+
+
+def _converted_totals(
+    db: Session,
+    user_id: int,
+    start: datetime | None,
+    end: datetime | None,
+    currency: str,
+    tagged: list[str] | None,
+) -> dict[tuple[str, str], list]:
+    day = func.date(Expense.created_at)
+    query = _filtered(
+        db.query(
+            Expense.category_id,
+            Expense.currency,
+            day,
+            func.count(Expense.id),
+            func.sum(Expense.amount_minor),
+        ),
+        user_id,
+        start,
+        end,
+        tagged,
+    )
+    rows = [tuple(row) for row in query.group_by(Expense.category_id, Expense.currency, day)]
+    if rows:
+        ids, currencies, days, counts, minor = (list(column) for column in zip(*rows))
+        labels = categories.names(db, user_id, ids)
+        names = [labels[category_id] for category_id in ids]
+        amounts = np.array(minor, dtype=np.float64) / scales(currencies)
+    else:
+        names, currencies, days, counts, amounts = [], [], [], [], np.zeros(0)
+
+    if archive.reaches_archive(db, user_id, start):
+        cold = _archived(db, user_id, start, end, tagged)
+        cold = cold.append_column("day", pc.cast(cold["created_at"], pa.date32()))
+        grouped = cold.group_by(["category", "currency", "day"]).aggregate(
+            [("id", "count"), ("amount", "sum")]
+        )
+        names += grouped["category"].to_pylist()
+        currencies += grouped["currency"].to_pylist()
+        days += grouped["day"].to_pylist()
+        counts += grouped["id_count"].to_pylist()
+        amounts = np.concatenate([amounts, grouped["amount_sum"].to_numpy()])
+    if not names:
+        return {}
+
+    converted = fx.rate_table().convert(
+        amounts,
+        np.array(currencies, dtype=object),
+        fx.to_days(days),
+        currency,
+    )
+    totals: dict[tuple[str, str], list] = {}
+    for category, count, total in zip(names, counts, converted):
+        entry = totals.setdefault((category, currency), [0, 0.0])
+        entry[0] += count
+        entry[1] += float(total)
+    return totals
+
+
+def summarize(
+    db: Session,
+    user_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    currency: str | None = None,
+    tagged: list[str] | None = None,
+    approx: bool = False,
+    sample_size: int | None = None,
+) -> ExpenseSummary:
+    """Count and total per category; per currency unless ``currency`` is given.
+
+    ``tagged`` limits the totals to expenses carrying every given tag. With
+    ``approx``, ranges of more than ``sample_size`` hot rows are estimated
+    from a sample of that size.
+
+    Raises :class:`app.services.fx.RateMissing` when an amount cannot be
+    converted.
+    """
+    if approx:
+        sample = sampling.draw(db, user_id, start, end, sample_size, tagged)
+        if sample is not None:
+            code = currency.upper() if currency is not None else None
+            return _approximate(db, user_id, start, end, code, tagged, sample)
+    if currency is not None:
+        totals = _converted_totals(db, user_id, start, end, currency.upper(), tagged)
+        return _summary(start, end, totals, currency.upper())
+
+    query = _filtered(
+        db.query(
+            Expense.category_id,
+            Expense.currency,
+            func.count(Expense.id),
+            func.sum(Expense.amount_minor),
+        ),
+        user_id,
+        start,
+        end,
+        tagged,
+    )
+
+    # Exact integer sums in minor units, converted to decimals once at the end.
+    rows = query.group_by(Expense.category_id, Expense.currency).all()
+    labels = categories.names(db, user_id, [row[0] for row in rows])
+    totals: dict[tuple[str, str], list] = {}
+    for category_id, code, count, total in rows:
+        totals[(labels[category_id], code)] = [count, int(total or 0)]
+
+    if archive.reaches_archive(db, user_id, start):
+        cold = _archived(db, user_id, start, end, tagged)
+        grouped = cold.group_by(["category", "currency"]).aggregate(
+            [("id", "count"), ("amount", "sum")]
+        )
+        for row in grouped.to_pylist():
+            entry = totals.setdefault((row["category"], row["currency"]), [0, 0])
+            entry[0] += row["id_count"]
+            entry[1] += to_minor(row["amount_sum"], row["currency"])
+
+    for (_, code), entry in totals.items():
+        entry[1] = to_major(entry[1], code)
+    return _summary(start, end, totals)
+
+
+def _archived_totals(
+    db: Session,
+    user_id: int,
+    start: datetime | None,
+    end: datetime | None,
+    currency: str | None,
+    tagged: list[str] | None,
+) -> dict[tuple[str, str], tuple[int, float]]:
+    if not archive.reaches_archive(db, user_id, start):
+        return {}
+    cold = _archived(db, user_id, start, end, tagged)
+    if cold.num_rows == 0:
+        return {}
+    amounts = cold["amount"].to_numpy()
+    codes = cold["currency"]
+    if currency is not None:
+        amounts = fx.rate_table().convert(
+            amounts,
+            np.array(codes.to_pylist(), dtype=object),
+            fx.to_days(pc.cast(cold["created_at"], pa.date32()).to_pylist()),
+            currency,
+        )
+        codes = pa.repeat(pa.scalar(currency), cold.num_rows)
+    grouped = pa.table(
+        {"category": cold["category"], "currency": codes, "amount": amounts}
+    ).group_by(["category", "currency"]).aggregate([("amount", "count"), ("amount", "sum")])
+    return {
+        (row["category"], row["currency"]): (row["amount_count"], row["amount_sum"])
+        for row in grouped.to_pylist()
+    }
+
+
+def _interval(low: float, high: float, exact: float) -> Interval:
+    return Interval(low=round(float(low + exact), 2), high=round(float(high + exact), 2))
+
+
+def _approximate(
+    db: Session,
+    user_id: int,
+    start: datetime | None,
+    end: datetime | None,
+    currency: str | None,
+    tagged: list[str] | None,
+    sample: sampling.Sample,
+) -> ExpenseSummary:
+    category_ids, currencies, minor, days, _ = (list(column) for column in zip(*sample.rows))
+    labels = categories.names(db, user_id, set(category_ids))
+    amounts = np.array(minor, dtype=np.float64) / scales(currencies)
+    if currency is not None:
+        amounts = fx.rate_table().convert(
+            amounts, np.array(currencies, dtype=object), fx.to_days(days), currency
+        )
+        currencies = [currency] * len(category_ids)
+    groups: dict[tuple[str, str], int] = {}
+    codes = np.array(
+        [
+            groups.setdefault((labels[category_id], code), len(groups))
+            for category_id, code in zip(category_ids, currencies)
+        ]
+    )
+    sampled = len(codes)
+    archived = _archived_totals(db, user_id, start, end, currency, tagged)
+    for key in archived:
+        groups.setdefault(key, len(groups))
+
+    size = len(groups)
+    seen = np.bincount(codes, minlength=size)
+    seen_total = np.bincount(codes, weights=amounts, minlength=size)
+    count, count_half = sampling.estimate(sample.population, sampled, seen, seen)
+    total, total_half = sampling.estimate(
+        sample.population,
+        sampled,
+        seen_total,
+        np.bincount(codes, weights=amounts**2, minlength=size),
+    )
+    # Amounts are positive, so a category has at least what the sample shows.
+    count_low = np.maximum(count - count_half, seen)
+    total_low = np.maximum(total - total_half, seen_total)
+    items = []
+    for key, index in sorted(groups.items()):
+        exact_count, exact_total = archived.get(key, (0, 0.0))
+        items.append(
+            CategoryTotal(
+                category=key[0],
+                currency=key[1],
+                count=int(round(count[index] + exact_count)),
+                total=round(float(total[index] + exact_total), 2),
+                intervals={
+                    "count": _interval(
+                        count_low[index], count[index] + count_half[index], exact_count
+                    ),
+                    "total": _interval(
+                        total_low[index], total[index] + total_half[index], exact_total
+                    ),
+                },
+            )
+        )
+    return ExpenseSummary(
+        start=start,
+        end=end,
+        currency=currency,
+        count=sample.population + sum(rows for rows, _ in archived.values()),
+        categories=items,
+        approximate=True,
+        sample_size=sampled,
+    )
+
+
+def _summary(
+    start: datetime | None,
+    end: datetime | None,
+    totals: dict[tuple[str, str], list],
+    currency: str | None = None,
+) -> ExpenseSummary:
+    categories = [
+        CategoryTotal(category=category, currency=code, count=count, total=round(total, 2))
+        for (category, code), (count, total) in sorted(totals.items())
+    ]
+    return ExpenseSummary(
+        start=start,
+        end=end,
+        currency=currency,
+        count=sum(item.count for item in categories),
+        categories=categories,
+    )
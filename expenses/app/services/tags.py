@@ -0,0 +1,97 @@
+"""Free-form expense tags, queried through the ``expense_tags`` index.
+
+Tags are stripped and lower-cased, so ``Trip`` and ``trip `` are one tag.
+Each tag row carries the owner and ``created_at`` of its expense, which lets
+"expenses tagged X this year" and the tag cloud run as range scans over
+``(user_id, tag, created_at)`` without reading a single expense row.
+"""
+from collections.abc import Iterable
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from sqlalchemy import Select, func, select
+from sqlalchemy.orm import Session
+
+from app.db.models import Expense, ExpenseTag
+
+_LOOKUP_CHUNK = 1000
+
+
+def normalize(tags: Iterable[str]) -> list[str]:
+    """Stripped, lower-cased, de-duplicated and sorted tags."""
+    return sorted({tag.strip().lower() for tag in tags if tag.strip()})
+
+
+def set_tags(expense: Expense, tags: Iterable[str]) -> None:
+    """Replace the tags of ``expense``; its ``created_at`` must already be set."""
+    wanted = normalize(tags)
+    kept = [row for row in expense.tag_rows if row.tag in wanted]
+    present = {row.tag for row in kept}
+    expense.tag_rows = kept + [
+        ExpenseTag(tag=tag, user_id=expense.user_id, created_at=expense.created_at)
+        for tag in wanted
+        if tag not in present
+    ]
+
+
+def tagged_ids(
+    user_id: int,
+    tags: list[str],
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> Select:
+    """Ids of the user's expenses that carry every tag in ``tags``."""
+    tags = normalize(tags)
+    query = select(ExpenseTag.expense_id).where(
+        ExpenseTag.user_id == user_id, ExpenseTag.tag.in_(tags)
+    )
+    if start is not None:
+        query = query.where(ExpenseTag.created_at >= start)
+    if end is not None:
+        query = query.where(ExpenseTag.created_at < end)
+    return query.group_by(ExpenseTag.expense_id).having(func.count() == len(tags))
+
+
+def filter_archived(
+    db: Session,
+    table: pa.Table,
+    user_id: int,
+    tags: list[str],
+    start: datetime | None = None,
+    end: datetime | None = None,
+) -> pa.Table:
+    """Keep the archived rows of ``table`` that carry every tag in ``tags``."""
+    ids = db.execute(tagged_ids(user_id, tags, start, end)).scalars().all()
+    return table.filter(pc.is_in(table["id"], value_set=pa.array(ids, type=pa.int64())))
+
+
+def tags_for(db: Session, expense_ids: list[int]) -> dict[int, list[str]]:
+    """Tags of each expense in ``expense_ids`` (for archived rows, which have no ORM object)."""
+    found: dict[int, list[str]] = {}
+    for offset in range(0, len(expense_ids), _LOOKUP_CHUNK):
+        rows = db.execute(
+            select(ExpenseTag.expense_id, ExpenseTag.tag)
+            .where(ExpenseTag.expense_id.in_(expense_ids[offset:offset + _LOOKUP_CHUNK]))
+            .order_by(ExpenseTag.expense_id, ExpenseTag.tag)
+        )
+        for expense_id, tag in rows:
+            found.setdefault(expense_id, []).append(tag)
+    return found
+
+
+def tag_cloud(
+    db: Session,
+    user_id: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    limit: int = 100,
+) -> list[tuple[str, int]]:
+    """``(tag, expenses)`` pairs, most used first, counted from the tag index only."""
+    query = select(ExpenseTag.tag, func.count()).where(ExpenseTag.user_id == user_id)
+    if start is not None:
+        query = query.where(ExpenseTag.created_at >= start)
+    if end is not None:
+        query = query.where(ExpenseTag.created_at < end)
+    query = query.group_by(ExpenseTag.tag).order_by(func.count().desc(), ExpenseTag.tag)
+    return [(tag, count) for tag, count in db.execute(query.limit(limit))]
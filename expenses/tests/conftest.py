@@ -0,0 +1,42 @@
+"""Shared test setup: a throwaway SQLite database and the settings the app requires.
+
+The environment is set before anything imports ``app``, because the engines
+are created from the settings at import time. Any database configured in the
+shell or a ``.env`` file is ignored so that tests never touch real data.
+"""
+import os
+from pathlib import Path
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+_DB_DIR = tempfile.mkdtemp(prefix="expenses-tests-")
+os.environ["EXPENSES_DATABASE_URL"] = f"sqlite:///{_DB_DIR}/test.db"
+os.environ.pop("DATABASE_URL", None)
+os.environ.pop("EXPENSES_SHARD_URLS", None)
+os.environ.setdefault("AUTH_JWT_SECRET", "test-secret")
+
+
+@pytest.fixture
+def db():
+    """A session on the test database, emptied again after each test."""
+    from app.db import Base, init_db
+    from app.db.session import SessionLocal
+    from app.services import categories
+
+    init_db()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        for table in reversed(Base.metadata.sorted_tables):
+            session.execute(table.delete())
+        session.commit()
+        session.close()
+        # Ids are reused once the tables are empty; forget the cached names.
+        categories._ids.clear()
+        categories._names.clear()
@@ -0,0 +1,71 @@
+from fastapi import HTTPException
+from sqlalchemy import select, update
+import pytest
+
+from app.api import routes
+from app.db.models import Expense
+from app.schema.bulk import ExpenseBulkChange
+from app.services import anomaly, bulk, categories
+
+
+@pytest.fixture
+def expenses(db):
+    category_id = categories.resolve_one(db, 1, "food")
+    db.commit()
+    rows = [
+        Expense(
+            user_id=1,
+            amount_minor=500,
+            currency="USD",
+            category_id=category_id,
+            category="food",
+            merchant="cafe",
+        )
+        for _ in range(3)
+    ]
+    db.add_all(rows)
+    db.commit()
+    return [row.id for row in rows]
+
+
+def _state(db, ids) -> list[tuple[str, int]]:
+    db.expire_all()
+    return db.execute(
+        select(Expense.merchant, Expense.version).where(Expense.id.in_(ids)).order_by(Expense.id)
+    ).all()
+
+
+def test_bulk_update_bumps_every_version(db, expenses):
+    routes.bulk_update_expenses(
+        [ExpenseBulkChange(id=expense_id, merchant="bakery") for expense_id in expenses],
+        db,
+        current_user_id=1,
+    )
+    assert _state(db, expenses) == [("bakery", 2)] * 3
+
+
+def test_a_write_between_the_read_and_the_update_is_a_conflict(db, expenses, monkeypatch):
+    replay = anomaly.replay
+
+    def concurrent_edit(db, *args):
+        # Stands in for another request committing after the version check.
+        db.execute(
+            update(Expense.__table__)
+            .where(Expense.id == expenses[1])
+            .values(merchant="elsewhere", version=Expense.version + 1)
+        )
+        replay(db, *args)
+
+    monkeypatch.setattr(anomaly, "replay", concurrent_edit)
+    with pytest.raises(bulk.VersionConflict):
+        bulk.update_many(db, 1, [{"id": expense_id, "note": "x"} for expense_id in expenses])
+    db.rollback()
+
+    with pytest.raises(HTTPException) as stale:
+        routes.bulk_update_expenses(
+            [ExpenseBulkChange(id=expense_id, merchant="bakery") for expense_id in expenses],
+            db,
+            current_user_id=1,
+        )
+    assert stale.value.status_code == 412
+    assert _state(db, expenses) == [("cafe", 1)] * 3
@@ -0,0 +1,146 @@
+import asyncio
+import gzip
+import json
+import zlib
+
+import brotli
+from fastapi import Body, FastAPI
+import pytest
+import zstandard
+
+from app.core.compression import CompressionMiddleware
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware)
+
+
+@app.post("/echo")
+def echo(items: list = Body()) -> list:
+    return items
+
+
+ITEMS = [{"id": index, "merchant": "corner shop"} for index in range(100)]
+BOMB = bytes(8 * 1024 * 1024)
+COMPRESS = {
+    "gzip": gzip.compress,
+    "br": brotli.compress,
+    "zstd": zstandard.ZstdCompressor().compress,
+}
+DECOMPRESS = {
+    "gzip": gzip.decompress,
+    "br": brotli.decompress,
+    "zstd": lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+}
+
+
+def _post(body: bytes, **headers: str) -> tuple[int, dict[str, str], bytes]:
+    """Send one request straight through the ASGI app, without an HTTP client."""
+    raw = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    raw += [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/echo",
+        "raw_path": b"/echo",
+        "query_string": b"",
+        "root_path": "",
+        "headers": raw,
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    start = sent[0]
+    response_headers = {name.decode(): value.decode() for name, value in start["headers"]}
+    content = b"".join(message.get("body", b"") for message in sent[1:])
+    return start["status"], response_headers, content
+
+
+@pytest.mark.parametrize("encoding", sorted(COMPRESS))
+def test_compressed_bodies_are_decoded(encoding):
+    body = COMPRESS[encoding](json.dumps(ITEMS).encode())
+    status, _, content = _post(body, content_encoding=encoding, accept_encoding="identity")
+    assert status == 200 and json.loads(content) == ITEMS
+
+
+@pytest.mark.parametrize("encoding", sorted(COMPRESS))
+def test_bodies_larger_than_one_decoding_step_are_decoded(encoding):
+    items = [{"id": index, "note": f"receipt {index ** 3:x}"} for index in range(20_000)]
+    body = COMPRESS[encoding](json.dumps(items).encode())
+    status, _, content = _post(body, content_encoding=encoding, accept_encoding="identity")
+    assert status == 200 and json.loads(content) == items
+
+
+@pytest.mark.parametrize("encoding", sorted(COMPRESS))
+def test_decompression_bombs_are_refused(encoding):
+    body = COMPRESS[encoding](BOMB)
+    assert len(body) * 100 < len(BOMB)
+
+    status, _, content = _post(body, content_encoding=encoding)
+
+    assert status == 413
+    assert json.loads(content) == {"detail": "decompressed request body too large"}
+
+
+def test_truncated_bodies_are_refused():
+    body = gzip.compress(json.dumps(ITEMS).encode())
+    status, _, content = _post(body[: len(body) // 2], content_encoding="gzip")
+    assert status == 400
+    assert json.loads(content) == {"detail": "truncated compressed request body"}
+
+
+def test_malformed_bodies_are_refused():
+    status, _, _ = _post(b"not gzip at all", content_encoding="gzip")
+    assert status == 400
+
+
+def test_unknown_encodings_are_unsupported():
+    body = zlib.compress(json.dumps(ITEMS).encode())
+    status, headers, _ = _post(body, content_encoding="compress")
+    assert status == 415
+    assert "gzip" in headers["accept-encoding"]
+
+
+@pytest.mark.parametrize(
+    ("accept", "expected"),
+    [
+        ("gzip", "gzip"),
+        ("br", "br"),
+        ("zstd", "zstd"),
+        ("gzip, br, zstd", "zstd"),
+        ("gzip;q=1, br;q=0.5", "gzip"),
+        ("*", "zstd"),
+    ],
+)
+def test_responses_use_the_preferred_accepted_encoding(accept, expected):
+    status, headers, content = _post(json.dumps(ITEMS).encode(), accept_encoding=accept)
+
+    assert status == 200
+    assert headers["content-encoding"] == expected
+    assert headers["vary"] == "Accept-Encoding"
+    assert json.loads(DECOMPRESS[expected](content)) == ITEMS
+
+
+@pytest.mark.parametrize("accept", [None, "identity", "gzip;q=0"])
+def test_responses_stay_plain_without_an_accepted_encoding(accept):
+    headers = {} if accept is None else {"accept_encoding": accept}
+    status, response_headers, content = _post(json.dumps(ITEMS).encode(), **headers)
+
+    assert status == 200 and "content-encoding" not in response_headers
+    assert json.loads(content) == ITEMS
+
+
+def test_small_responses_are_not_compressed():
+    status, headers, content = _post(b"[1, 2, 3]", accept_encoding="gzip")
+    assert status == 200 and "content-encoding" not in headers
+    assert json.loads(content) == [1, 2, 3]
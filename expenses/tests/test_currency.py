@@ -0,0 +1,35 @@
+from pydantic import ValidationError
+import pytest
+
+from app.db.models import CategoryAmountStats, Expense
+from app.schema.budgets import BudgetSet
+from app.schema.exp import ExpenseCreate, ExpenseImport
+from app.services import anomaly
+
+
+@pytest.mark.parametrize(
+    ("amount", "currency"), [(0.001, "USD"), (0.005, "USD"), (0.4, "JPY"), (0.5, "JPY")]
+)
+def test_amount_rounding_to_zero_is_rejected(db, amount, currency):
+    for schema in (ExpenseCreate, ExpenseImport):
+        with pytest.raises(ValidationError, match="rounds to zero"):
+            schema(amount=amount, currency=currency)
+    with pytest.raises(ValidationError, match="rounds to zero"):
+        BudgetSet(category="food", limit=amount, currency=currency)
+
+
+@pytest.mark.parametrize(("amount", "currency"), [(0.01, "USD"), (0.006, "USD"), (0.6, "JPY")])
+def test_smallest_amounts_are_accepted(db, amount, currency):
+    assert ExpenseCreate(amount=amount, currency=currency).amount == amount
+
+
+def test_anomaly_skips_amounts_without_a_logarithm(db):
+    stats = CategoryAmountStats(count=10, mean=1.0, m2=4.0)
+    expense = Expense(amount_minor=0, currency="USD")
+
+    assert anomaly.score(stats, 0) is None
+    anomaly._observe(stats, expense)
+    anomaly._forget(stats, expense)
+
+    assert expense.anomaly_score is None and not expense.is_anomaly
+    assert (stats.count, stats.mean, stats.m2) == (10, 1.0, 4.0)
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+
+from app.core.config import get_settings
+from app.db.models import Expense
+from app.services import categories, dedupe
+
+
+def _add(db, user_id: int, category: str, amount_minor: int, created_at: datetime) -> int:
+    expense = Expense(
+        user_id=user_id,
+        category_id=categories.resolve_one(db, user_id, category),
+        amount_minor=amount_minor,
+        currency="USD",
+        created_at=created_at,
+    )
+    expense.category = category
+    expense.fingerprint = dedupe.fingerprint_of(expense)
+    db.add(expense)
+    # New category names are added on a connection of their own; keep SQLite unlocked.
+    db.commit()
+    return expense.id
+
+
+def test_offline_scan_matches_across_a_bucket_boundary(db):
+    window = get_settings().dedupe_window_seconds
+    boundary = datetime.fromtimestamp(1_800_000 * window, tz=timezone.utc)
+    first = _add(db, 1, "food", 1250, boundary - timedelta(seconds=5))
+    second = _add(db, 1, "Food", 1250, boundary + timedelta(seconds=5))
+    # Same fields, but further apart than the window.
+    _add(db, 1, "food", 1250, boundary + timedelta(seconds=5 + window + 1))
+    # Other amount, other user.
+    _add(db, 1, "food", 1251, boundary)
+    _add(db, 2, "food", 1250, boundary)
+
+    assert list(dedupe.find_duplicates(db)) == [[first, second]]
+
+
+def test_offline_scan_chains_like_create(db):
+    window = get_settings().dedupe_window_seconds
+    start = datetime(2026, 1, 5, tzinfo=timezone.utc)
+    ids = [
+        _add(db, 1, "rent", 90000, start + timedelta(seconds=step * window)) for step in range(3)
+    ]
+
+    assert list(dedupe.find_duplicates(db)) == [ids]
+    assert list(dedupe.find_duplicates(db, user_ids=[2])) == []
@@ -0,0 +1,69 @@
+import random
+
+from fastapi import HTTPException
+import pytest
+
+from app.api import groups as routes
+from app.schema.groups import GroupMemberAdd
+from app.services import groups
+
+
+def test_equal_shares_give_the_remainder_to_the_lowest_ids():
+    assert groups.equal_shares(1001, [9, 3, 5]) == {3: 334, 5: 334, 9: 333}
+    assert groups.equal_shares(1000, [2, 1]) == {1: 500, 2: 500}
+    with pytest.raises(groups.GroupError):
+        groups.equal_shares(100, [])
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_settle_clears_every_balance_in_fewer_transfers_than_members(seed):
+    rng = random.Random(seed)
+    balances = {user_id: rng.randint(-10_000, 10_000) for user_id in range(rng.randint(1, 12))}
+    balances[len(balances)] = -sum(balances.values())
+
+    transfers = groups.settle(balances)
+
+    remaining = dict(balances)
+    for debtor, creditor, amount in transfers:
+        assert amount > 0
+        remaining[debtor] += amount
+        remaining[creditor] -= amount
+    assert set(remaining.values()) == {0}
+    assert len(transfers) <= len(balances) - 1
+
+
+def test_deleting_an_expense_restores_the_balances(db):
+    group = groups.create_group(db, "trip", "USD", 1, [2, 3])
+    groups.add_expense(db, group, 1, 9000, groups.equal_shares(9000, [1, 2, 3]))
+    before = groups.balances(db, group.id)
+
+    expense = groups.add_expense(db, group, 2, 1001, {1: 500, 3: 501}, "dinner")
+    assert groups.balances(db, group.id) != before
+    groups.delete_expense(db, expense)
+
+    assert groups.balances(db, group.id) == before == {1: 6000, 2: -3000, 3: -3000}
+
+
+def test_only_the_creator_adds_members(db):
+    group = groups.create_group(db, "flat", "USD", 1, [2])
+
+    with pytest.raises(HTTPException) as refused:
+        routes.add_member(group.id, GroupMemberAdd(user_id=3), db, current_user_id=2)
+    assert refused.value.status_code == 403
+    routes.add_member(group.id, GroupMemberAdd(user_id=3), db, current_user_id=1)
+    assert groups.member_ids(db, group.id) == {1, 2, 3}
+
+
+def test_only_the_payer_or_the_creator_deletes_an_entry(db):
+    group = groups.create_group(db, "flat", "USD", 1, [2, 3])
+    first, second = (
+        groups.add_expense(db, group, 2, 3000, groups.equal_shares(3000, [1, 2, 3]))
+        for _ in range(2)
+    )
+
+    with pytest.raises(HTTPException) as refused:
+        routes.delete_group_expense(group.id, first.id, db, current_user_id=3)
+    assert refused.value.status_code == 403
+    routes.delete_group_expense(group.id, first.id, db, current_user_id=2)
+    routes.delete_group_expense(group.id, second.id, db, current_user_id=1)
+    assert groups.expenses(db, group.id, 10) == []
@@ -0,0 +1,107 @@
+from datetime import datetime, timedelta, timezone
+from typing import ClassVar
+
+from sqlalchemy import select
+import pytest
+
+from app.db.models import CurrencyExponent, Job
+from app.services import jobs
+
+
+class Probe(jobs.JobSpec):
+    """Inserts a marker row, then raises when ``fail`` is set."""
+
+    kind: ClassVar[str] = "test.probe"
+    max_attempts: ClassVar[int] = 3
+    code: str
+    fail: bool = False
+
+
+def _probe(db, job: Probe) -> None:
+    db.add(CurrencyExponent(currency=job.code, exponent=2))
+    db.flush()
+    if job.fail:
+        raise RuntimeError(f"probe {job.code} failed")
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    monkeypatch.setitem(jobs._BY_KIND, Probe.kind, (Probe, _probe))
+
+
+def _jobs(db) -> list[Job]:
+    db.expire_all()
+    return list(db.scalars(select(Job).order_by(Job.id)))
+
+
+def test_enqueue_keeps_one_queued_job_per_payload(db):
+    jobs.enqueue(db, Probe(code="A"))
+    jobs.enqueue(db, Probe(code="A"))
+    jobs.enqueue(db, Probe(code="B"))
+    db.commit()
+    assert [job.payload["code"] for job in _jobs(db)] == ["A", "B"]
+
+    jobs.claim(db, "w1")
+    jobs.enqueue(db, Probe(code="A"))
+    db.commit()
+    # Only queued jobs are unique: a running one may be queued again.
+    assert sorted((job.payload["code"], job.status) for job in _jobs(db)) == [
+        ("A", "queued"),
+        ("A", "running"),
+        ("B", "running"),
+    ]
+
+
+def test_claim_takes_over_jobs_whose_lease_expired(db):
+    jobs.enqueue(db, Probe(code="A"))
+    db.commit()
+    now = datetime.now(timezone.utc)
+
+    assert len(jobs.claim(db, "w1", now=now)) == 1
+    assert jobs.claim(db, "w2", now=now + jobs.LEASE / 2) == []
+    [job] = jobs.claim(db, "w2", now=now + jobs.LEASE + timedelta(seconds=1))
+    db.commit()
+
+    assert job.attempts == 2
+    assert _jobs(db)[0].locked_by == "w2"
+
+
+def test_failures_back_off_until_max_attempts(db):
+    jobs.enqueue(db, Probe(code="A"))
+    db.commit()
+    later = datetime.now(timezone.utc)
+
+    for attempt in range(1, Probe.max_attempts + 1):
+        later += jobs.BACKOFF_MAX * 2
+        [job] = jobs.claim(db, "w1", now=later)
+        assert job.attempts == attempt
+        jobs._fail(db, job, "w1", "boom")
+        db.commit()
+        [row] = _jobs(db)
+        if attempt < Probe.max_attempts:
+            assert row.status == "queued" and row.locked_by is None
+            assert row.run_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc)
+    assert (row.status, row.last_error) == ("failed", "boom")
+    assert jobs.claim(db, "w1", now=later + jobs.BACKOFF_MAX * 2) == []
+
+
+def test_backoff_doubles_up_to_the_cap():
+    for attempts in range(1, 12):
+        expected = min(jobs.BACKOFF_BASE * 2 ** (attempts - 1), jobs.BACKOFF_MAX)
+        assert expected / 2 <= jobs.backoff(attempts) <= expected
+
+
+def test_work_keeps_a_failing_job_from_undoing_the_others(db, probes):
+    for code, fail in [("A", False), ("B", True), ("C", False)]:
+        jobs.enqueue(db, Probe(code=code, fail=fail))
+    db.commit()
+
+    assert jobs.work(db, "w1") == (2, 1)
+
+    [left] = _jobs(db)
+    assert (left.payload["code"], left.status, left.attempts) == ("B", "queued", 1)
+    assert left.last_error == "RuntimeError: probe B failed"
+    markers = db.scalars(
+        select(CurrencyExponent.currency).where(CurrencyExponent.currency.in_(["A", "B", "C"]))
+    )
+    assert sorted(markers) == ["A", "C"]
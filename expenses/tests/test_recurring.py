@@ -0,0 +1,68 @@
+from datetime import date, datetime, timezone
+
+from sqlalchemy import select
+import pytest
+
+from app.api import routes
+from app.db.models import CategoryAmountStats, Expense, RecurringExpense
+from app.services import anomaly, bulk, categories, recurring
+
+
+@pytest.fixture
+def rent(db):
+    """Three rent expenses entered by hand, and three materialized occurrences."""
+    category_id = categories.resolve_one(db, 1, "rent")
+    db.commit()
+    for amount_minor in (90000, 95000, 100000):
+        expense = Expense(
+            user_id=1,
+            amount_minor=amount_minor,
+            currency="USD",
+            category_id=category_id,
+            category="rent",
+        )
+        db.add(expense)
+        anomaly.observe(db, expense)
+    db.add(
+        RecurringExpense(
+            user_id=1,
+            category_id=category_id,
+            amount_minor=120000,
+            currency="USD",
+            day_of_month=1,
+            starts_on=date(2026, 1, 1),
+            next_run_at=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        )
+    )
+    db.commit()
+    assert recurring.materialize(db, now=datetime(2026, 3, 15, tzinfo=timezone.utc)) == (1, 3)
+    return db.scalars(select(Expense.id).where(Expense.recurring_id.is_not(None))).all()
+
+
+def _stats(db) -> tuple[int, float, float]:
+    db.expire_all()
+    stats = db.scalars(select(CategoryAmountStats)).one()
+    return stats.count, stats.mean, stats.m2
+
+
+def test_occurrences_stay_out_of_the_category_statistics(db, rent):
+    before = _stats(db)
+    assert before[0] == 3
+
+    routes.delete_expense(rent[0], None, db, current_user_id=1)
+    bulk.update_many(db, 1, [{"id": rent[1], "amount": 2000.0}])
+    bulk.delete_matching(db, 1, ids=[rent[2]])
+    db.commit()
+    assert _stats(db) == before
+
+
+def test_rescore_leaves_occurrences_out(db, rent):
+    before = _stats(db)
+
+    assert anomaly.rescore(db, [1]) == 3
+
+    assert _stats(db)[0] == 3 and _stats(db)[1] == pytest.approx(before[1])
+    occurrences = db.scalars(select(Expense).where(Expense.id.in_(rent))).all()
+    assert {(expense.anomaly_score, expense.is_anomaly) for expense in occurrences} == {
+        (None, False)
+    }
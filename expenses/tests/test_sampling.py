@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from app.db.models import Expense
+from app.services import categories, sampling
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_estimate_matches_the_simple_random_sample_formulas(seed):
+    rng = np.random.default_rng(seed)
+    population, sampled = 5000, 200
+    values = rng.lognormal(3, 1, sampled)
+    groups = rng.integers(0, 3, sampled)
+    # Each group's values, with zero for rows outside the group.
+    columns = np.where(groups == np.arange(3)[:, None], values, 0.0)
+
+    totals, half = sampling.estimate(
+        population, sampled, columns.sum(axis=1), (columns**2).sum(axis=1)
+    )
+
+    fpc = 1 - sampled / population
+    for group, column in enumerate(columns):
+        standard_error = population * np.sqrt(fpc * column.var(ddof=1) / sampled)
+        assert totals[group] == pytest.approx(population * column.mean())
+        assert half[group] == pytest.approx(sampling.Z * standard_error)
+
+
+def test_estimate_of_a_census_has_no_error():
+    sums, squares = np.array([10.0]), np.array([60.0])
+    totals, half = sampling.estimate(3, 3, sums, squares)
+    assert totals.tolist() == [10.0] and half.tolist() == [0.0]
+
+
+def test_draw_samples_only_when_there_are_more_rows_than_the_sample(db):
+    category_id = categories.resolve_one(db, 1, "food")
+    db.add_all(
+        Expense(
+            user_id=1,
+            amount_minor=100 * (index + 1),
+            currency="USD",
+            category_id=category_id,
+            category="food",
+        )
+        for index in range(5)
+    )
+    db.commit()
+
+    assert sampling.draw(db, 1, size=5) is None
+    assert sampling.draw(db, 1, size=50) is None
+    sample = sampling.draw(db, 1, size=3)
+    assert sample.population == 5
+    assert len(sample.rows) == 3 and sample.fraction == pytest.approx(0.6)
+    assert len({row.amount_minor for row in sample.rows}) == 3
@@ -0,0 +1,40 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.db.models import Expense
+from app.services import categories
+from app.services.search import SearchUnsupported, search_expenses
+
+
+def test_prefix_words_match_merchants_and_notes(db):
+    category_id = categories.resolve_one(db, 1, "food")
+    for user_id, merchant, note in [
+        (1, "Starbucks", "flat white"),
+        (1, "Bakery", "sourdough for the starving"),
+        (1, "Cinema", None),
+        (2, "Starbucks", None),
+    ]:
+        db.add(
+            Expense(
+                user_id=user_id,
+                amount_minor=500,
+                currency="USD",
+                category_id=category_id,
+                category="food",
+                merchant=merchant,
+                note=note,
+            )
+        )
+    db.commit()
+
+    hits = search_expenses(db, 1, "star")
+
+    assert sorted(expense.merchant for expense, _ in hits) == ["Bakery", "Starbucks"]
+    assert search_expenses(db, 1, "!!!") == []
+
+
+def test_other_databases_are_refused():
+    bind = SimpleNamespace(dialect=SimpleNamespace(name="mysql"))
+    with pytest.raises(SearchUnsupported, match="mysql"):
+        search_expenses(SimpleNamespace(get_bind=lambda: bind), 1, "coffee")
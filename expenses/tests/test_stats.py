@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from app.services.stats import QUANTILES, _Accumulator, _quantiles
+
+
+def _accumulate(amounts: np.ndarray, chunk: int) -> _Accumulator:
+    accumulator = _Accumulator()
+    for begin in range(0, len(amounts), chunk):
+        part = amounts[begin:begin + chunk]
+        accumulator.add(["food"] * len(part), ["USD"] * len(part), part, np.zeros(len(part)))
+    return accumulator
+
+
+@pytest.mark.parametrize(
+    "amounts",
+    [
+        [5.0, 20.0],
+        [7.0],
+        [1.0, 2.0, 3.0, 1000.0],
+        [0.5, 0.5, 0.5, 9.99, 10.0],
+        np.random.default_rng(7).lognormal(3, 1.2, 5000).round(2),
+    ],
+)
+def test_quantiles_match_numpy_linear(amounts):
+    amounts = np.asarray(amounts, dtype=np.float64)
+    accumulator = _accumulate(amounts, chunk=len(amounts))
+    quantiles = _quantiles(accumulator.fine[0], len(amounts), amounts.min(), amounts.max())
+    np.testing.assert_allclose(quantiles, np.quantile(amounts, QUANTILES), rtol=0.01)
+
+
+def test_two_amounts_interpolate_between_them():
+    accumulator = _accumulate(np.array([5.0, 20.0]), chunk=2)
+    np.testing.assert_allclose(
+        _quantiles(accumulator.fine[0], 2, 5.0, 20.0), [12.5, 18.5, 19.85]
+    )
+
+
+def test_chunks_merge_to_the_single_pass_moments():
+    amounts = np.random.default_rng(3).lognormal(2, 1, 10_001)
+    whole = _accumulate(amounts, chunk=len(amounts))
+    for chunk in (1, 7, 1000):
+        merged = _accumulate(amounts, chunk=chunk)
+        assert merged.count[0] == len(amounts)
+        np.testing.assert_allclose(merged.mean[0], amounts.mean(), rtol=1e-12)
+        variance = merged.m2[0] / (len(amounts) - 1)
+        np.testing.assert_allclose(variance, amounts.var(ddof=1), rtol=1e-9)
+        np.testing.assert_allclose(merged.total[0], amounts.sum(), rtol=1e-12)
+        np.testing.assert_array_equal(merged.fine, whole.fine)
+        assert merged.low[0] == amounts.min() and merged.high[0] == amounts.max()
+
+
+def test_groups_are_kept_apart_across_chunks():
+    accumulator = _Accumulator()
+    accumulator.add(["food", "rent"], ["USD", "USD"], np.array([10.0, 900.0]), np.zeros(2))
+    accumulator.add(["rent", "food"], ["USD", "EUR"], np.array([1100.0, 4.0]), np.zeros(2))
+    groups = accumulator.groups
+    assert accumulator.count[groups[("rent", "USD")]] == 2
+    assert accumulator.mean[groups[("rent", "USD")]] == 1000.0
+    assert accumulator.count[groups[("food", "USD")]] == 1
+    assert accumulator.count[groups[("food", "EUR")]] == 1
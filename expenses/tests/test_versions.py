@@ -0,0 +1,89 @@
+from fastapi import HTTPException, Response
+from sqlalchemy import update
+import pytest
+
+from app.api import routes
+from app.db.models import Expense
+from app.db.session import SessionLocal
+from app.schema.exp import ExpenseUpdate
+from app.services import anomaly, categories
+
+
+@pytest.fixture
+def expense_id(db) -> int:
+    category_id = categories.resolve_one(db, 1, "food")
+    db.commit()
+    expense = Expense(
+        user_id=1, amount_minor=500, currency="USD", category_id=category_id, category="food"
+    )
+    db.add(expense)
+    db.commit()
+    return expense.id
+
+
+def _update(db, expense_id, if_match=None, **changes) -> str:
+    response = Response()
+    routes.update_expense(
+        expense_id, ExpenseUpdate(**changes), response, if_match, db, current_user_id=1
+    )
+    return response.headers["ETag"]
+
+
+def _status(call, *args, **kwargs) -> int:
+    with pytest.raises(HTTPException) as refused:
+        call(*args, **kwargs)
+    return refused.value.status_code
+
+
+def _commit_elsewhere(expense_id):
+    """Patch for anomaly.forget: another request bumps the expense first."""
+    forget = anomaly.forget
+
+    def forget_after_concurrent_write(db, expense):
+        with SessionLocal() as other:
+            other.execute(
+                update(Expense)
+                .where(Expense.id == expense_id)
+                .values(note="elsewhere", version=Expense.version + 1)
+            )
+            other.commit()
+        forget(db, expense)
+
+    return forget_after_concurrent_write
+
+
+def test_if_match_and_version_guard_updates(db, expense_id):
+    assert _update(db, expense_id, '"1"', note="a") == '"2"'
+    assert _status(_update, db, expense_id, '"1"', note="b") == 412
+    assert _status(_update, db, expense_id, version=1, note="b") == 412
+    assert _update(db, expense_id, version=2, note="b") == '"3"'
+
+
+def test_weak_etags_never_match_and_star_always_does(db, expense_id):
+    assert _status(_update, db, expense_id, 'W/"1"', note="a") == 412
+    assert _update(db, expense_id, "*", note="a") == '"2"'
+    assert _update(db, expense_id, '"7", "2"', note="b") == '"3"'
+    assert _update(db, expense_id, note="c") == '"4"'
+
+
+def test_stale_if_match_keeps_the_expense(db, expense_id):
+    assert _status(routes.delete_expense, expense_id, '"2"', db, current_user_id=1) == 412
+    routes.delete_expense(expense_id, '"1"', db, current_user_id=1)
+    assert db.get(Expense, expense_id) is None
+
+
+def test_a_concurrent_commit_fails_the_update(db, expense_id, monkeypatch):
+    monkeypatch.setattr(anomaly, "forget", _commit_elsewhere(expense_id))
+    assert _status(_update, db, expense_id, amount=9.0) == 412
+
+    db.expire_all()
+    expense = db.get(Expense, expense_id)
+    assert (expense.version, expense.note, expense.amount_minor) == (2, "elsewhere", 500)
+
+
+def test_a_concurrent_commit_fails_the_delete(db, expense_id, monkeypatch):
+    monkeypatch.setattr(anomaly, "forget", _commit_elsewhere(expense_id))
+    assert _status(routes.delete_expense, expense_id, None, db, current_user_id=1) == 412
+
+    db.expire_all()
+    assert db.get(Expense, expense_id).version == 2
@@ -0,0 +1,261 @@
+"""Content negotiation for compressed responses and compressed request bodies.
+
+Responses are compressed with the best of zstd, brotli and gzip that the
+client's ``Accept-Encoding`` allows. Small bodies, already-encoded bodies,
+ranges and media that is already compressed pass through unchanged. Streaming
+responses such as the CSV export are compressed chunk by chunk, and each
+chunk is flushed, so the client keeps receiving data while the export runs.
+Responses that carry an ``ETag`` are left alone, so ``If-Match`` keeps
+comparing against the exact bytes the client received.
+
+Request bodies sent with ``Content-Encoding`` are decompressed as the
+application reads them. Decompression runs in bounded steps. A body that
+grows past ``max_ratio`` times its compressed size, or past ``max_size``,
+is rejected with 413 before it is ever held in memory in full.
+"""
+import re
+import zlib
+from collections.abc import Iterator
+
+import brotli
+import zstandard
+from fastapi import HTTPException
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+MINIMUM_SIZE = 1024
+MAX_RATIO = 100
+MAX_SIZE = 64 * 1024 * 1024
+# Every body may reach this size, however well it compressed.
+_RATIO_FLOOR = 1024 * 1024
+_STEP = 64 * 1024
+# zstd has no output limit per call; feed it small slices and check after each.
+_ZSTD_SLICE = 512
+
+_PREFERENCE = ("zstd", "br", "gzip")
+_COMPRESSIBLE = re.compile(
+    r"^(text/|application/(json|xml|javascript|x-ndjson|msgpack|vnd\.apache\.arrow\.stream)"
+    r"|application/[\w.+-]+\+(json|xml))"
+)
+
+
+def _accepted(header: str) -> str | None:
+    """The preferred encoding allowed by an ``Accept-Encoding`` header."""
+    weights: dict[str, float] = {}
+    for item in header.split(","):
+        name, *params = item.strip().lower().split(";")
+        weight = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if name:
+            weights[name] = weight
+    wildcard = weights.get("*", 0.0)
+    candidates = [
+        (weights.get(name, wildcard), -rank, name)
+        for rank, name in enumerate(_PREFERENCE)
+    ]
+    weight, _, name = max(candidates)
+    return name if weight > 0 else None
+
+
+class _Encoder:
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == "zstd":
+            self._zstd = zstandard.ZstdCompressor(level=3).compressobj()
+        elif encoding == "br":
+            self._brotli = brotli.Compressor(quality=4)
+        else:
+            self._zlib = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, last: bool) -> bytes:
+        """Compress ``data``; unless ``last``, flush so the client can decode it now."""
+        if self.encoding == "zstd":
+            mode = (
+                zstandard.COMPRESSOBJ_FLUSH_FINISH if last else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            )
+            return self._zstd.compress(data) + self._zstd.flush(mode)
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if last else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+class _Decoder:
+    """Incremental decompression that never produces more than one step at a time."""
+
+    ENCODINGS = ("gzip", "x-gzip", "deflate", "br", "zstd")
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == "zstd":
+            self._zstd = zstandard.ZstdDecompressor().decompressobj()
+        elif encoding == "br":
+            self._brotli = brotli.Decompressor()
+        else:
+            # 47 accepts gzip and zlib headers; raw deflate is not worth guessing.
+            self._zlib = zlib.decompressobj(47)
+
+    def decode(self, data: bytes) -> Iterator[bytes]:
+        if self.encoding == "zstd":
+            for offset in range(0, len(data), _ZSTD_SLICE):
+                yield self._zstd.decompress(data[offset:offset + _ZSTD_SLICE])
+        elif self.encoding == "br":
+            part = self._brotli.process(data, output_buffer_limit=_STEP)
+            yield part
+            # Some brotli releases report can_accept_more_data() while output
+            # is still pending, so also drain until a step comes back empty.
+            while not self._brotli.is_finished() and (
+                part or not self._brotli.can_accept_more_data()
+            ):
+                part = self._brotli.process(b"", output_buffer_limit=_STEP)
+                yield part
+        else:
+            yield self._zlib.decompress(data, _STEP)
+            while self._zlib.unconsumed_tail:
+                yield self._zlib.decompress(self._zlib.unconsumed_tail, _STEP)
+
+    def finished(self) -> bool:
+        if self.encoding == "zstd":
+            return self._zstd.eof
+        if self.encoding == "br":
+            return self._brotli.is_finished()
+        return self._zlib.eof
+
+
+class CompressionMiddleware:
+    """Negotiate response compression and decode compressed request bodies."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = MINIMUM_SIZE,
+        max_ratio: int = MAX_RATIO,
+        max_size: int = MAX_SIZE,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.max_ratio = max_ratio
+        self.max_size = max_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        content_encoding = headers.get("content-encoding", "identity").strip().lower()
+        if content_encoding != "identity":
+            if content_encoding not in _Decoder.ENCODINGS:
+                await self._unsupported(send)
+                return
+            scope = dict(scope)
+            scope["headers"] = [
+                (name, value)
+                for name, value in scope["headers"]
+                if name not in (b"content-encoding", b"content-length")
+            ]
+            receive = self._decoding(receive, _Decoder(content_encoding))
+        encoding = _accepted(headers.get("accept-encoding", ""))
+        if encoding is not None:
+            send = self._encoding(send, encoding)
+        await self.app(scope, receive, send)
+
+    async def _unsupported(self, send: Send) -> None:
+        body = b'{"detail":"unsupported content-encoding"}'
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 415,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"accept-encoding", ", ".join(_Decoder.ENCODINGS).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    def _decoding(self, receive: Receive, decoder: _Decoder) -> Receive:
+        consumed = produced = 0
+
+        async def decoded() -> Message:
+            nonlocal consumed, produced
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            consumed += len(message.get("body", b""))
+            limit = min(self.max_size, max(self.max_ratio * consumed, _RATIO_FLOOR))
+            parts = []
+            try:
+                for part in decoder.decode(message.get("body", b"")):
+                    produced += len(part)
+                    if produced > limit:
+                        # 413 has no stable constant name across Starlette releases.
+                        raise HTTPException(
+                            status_code=413, detail="decompressed request body too large"
+                        )
+                    parts.append(part)
+            except (zlib.error, brotli.error, zstandard.ZstdError):
+                raise HTTPException(status_code=400, detail="malformed compressed request body")
+            if not message.get("more_body", False) and not decoder.finished():
+                raise HTTPException(status_code=400, detail="truncated compressed request body")
+            return {**message, "body": b"".join(parts)}
+
+        return decoded
+
+    def _encoding(self, send: Send, encoding: str) -> Send:
+        start: Message | None = None
+        encoder: _Encoder | None = None
+
+        async def encoded(message: Message) -> None:
+            nonlocal start, encoder
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+            if message["type"] != "http.response.body":
+                await send(start)
+                start = None
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if encoder is None:
+                headers = MutableHeaders(raw=list(start["headers"]))
+                if not self._compressible(start["status"], headers, body, more):
+                    await send(start)
+                    await send(message)
+                    start = None
+                    return
+                encoder = _Encoder(encoding)
+                del headers["content-length"]
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                await send({**start, "headers": headers.raw})
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": encoder.compress(body, not more),
+                    "more_body": more,
+                }
+            )
+
+        return encoded
+
+    def _compressible(self, status: int, headers: MutableHeaders, body: bytes, more: bool) -> bool:
+        if status < 200 or status in (204, 206, 304):
+            return False
+        if "content-encoding" in headers or "etag" in headers:
+            return False
+        if not _COMPRESSIBLE.match(headers.get("content-type", "")):
+            return False
+        return more or len(body) >= self.minimum_size
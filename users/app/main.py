@@ -1,12 +1,15 @@
 from fastapi import FastAPI
 
 from app.api.routes import router
+from app.core.compression import CompressionMiddleware
 from app.db import init_db
 
 
 def create_app() -> FastAPI:
     application = FastAPI(title="Users Service", version="0.1.0")
 
+    application.add_middleware(CompressionMiddleware)
+
     @application.on_event("startup")
     def on_startup() -> None:
         init_db()